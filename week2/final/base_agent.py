@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+import numpy as np
+from rng import GLOBAL_RNG
 
 class OrderIntent:
     def __init__(self, side, price, qty, action_type='Limit'):
@@ -7,20 +9,134 @@ class OrderIntent:
         self.qty = qty
         self.action_type = action_type # 'Limit', 'Market', 'Cancel'
 
+class IntentBuffer:
+    # Reusable per-tick order columns. Agents append with write_intents and the owner
+    # flushes through MatchingEngine.submit, so no OrderIntent/Order is built for
+    # orders that never rest. Slots are preallocated and overwritten every tick.
+    def __init__(self, capacity=256):
+        self.is_buy = [False] * capacity
+        self.price = [None] * capacity # None = market order
+        self.qty = [0] * capacity
+        self.owner = [None] * capacity
+        self.n = 0
+
+    def append(self, is_buy, price, qty, owner_id):
+        n = self.n
+        if n == len(self.qty):
+            for col in (self.is_buy, self.price, self.qty, self.owner): col.extend(col)
+        self.is_buy[n] = is_buy
+        self.price[n] = price
+        self.qty[n] = qty
+        self.owner[n] = owner_id
+        self.n = n + 1
+
+    def flush(self, engine, timestamp):
+        submit, is_buy, price, qty, owner = engine.submit, self.is_buy, self.price, self.qty, self.owner
+        for i in range(self.n):
+            submit(is_buy[i], price[i], qty[i], owner[i], timestamp)
+        self.n = 0
+
 class Agent(ABC):
-    def __init__(self, agent_id):
+    ledger = None # Set by bind_ledger: cash/inventory then live in ledger row self.row
+
+    def __init__(self, agent_id, rng=None):
         self.id = agent_id
         self.cash = 100000
         self.inventory = 0
+        self.rng = rng if rng is not None else GLOBAL_RNG # BlockRNG from RngStreams, or the legacy global state
         
+    def bind_ledger(self, ledger):
+        self.row = ledger.register(self.id, self.cash, self.inventory)
+        self.ledger = ledger
+
+    # Reads come from the ledger's arrays as of its last sync (the owner syncs once per
+    # engine step), so fills inside the current step show up from the next one. They
+    # return Python scalars: numpy ones would leak into order prices and slow every
+    # heap comparison in the book. Writes book pending trades first.
+    @property
+    def cash(self):
+        ledger = self.ledger
+        if ledger is None: return self._cash
+        return ledger.cash.item(self.row)
+
+    @cash.setter
+    def cash(self, value):
+        ledger = self.ledger
+        if ledger is None: self._cash = value
+        else:
+            ledger.refresh()
+            ledger.cash[self.row] = value
+
+    @property
+    def inventory(self):
+        ledger = self.ledger
+        if ledger is None: return self._inventory
+        return ledger.inventory.item(self.row)
+
+    @inventory.setter
+    def inventory(self, value):
+        ledger = self.ledger
+        if ledger is None: self._inventory = value
+        else:
+            ledger.refresh()
+            ledger.inventory[self.row] = value
+
     @abstractmethod
     def get_action(self, snapshot):
         pass
 
+    def write_intents(self, snapshot, buf):
+        # Same orders as get_action, appended to an IntentBuffer; hot agents override
+        # this to skip the OrderIntent objects
+        for intent in self.get_action(snapshot):
+            buf.append(intent.side == 'Buy', intent.price, intent.qty, self.id)
+
     def notify_fill(self, side, price, qty):
         if side == 'Buy':
             self.inventory += qty
             self.cash -= price * qty
         else:
             self.inventory -= qty
-            self.cash += price * qty
\ No newline at end of file
+            self.cash += price * qty
+
+class Population(ABC):
+    # n agents of one kind held as arrays; subclasses emit order columns for a
+    # tick's active agents in a single vectorized call.
+    ledger = None
+
+    def __init__(self, n, prefix, rng=None):
+        self.n = n
+        self.prefix = prefix
+        self.rng = rng if rng is not None else GLOBAL_RNG # np.random.Generator or GLOBAL_RNG
+        self.ids = np.array([f"{prefix}_{i}" for i in range(n)], dtype=object)
+        self.index = {agent_id: i for i, agent_id in enumerate(self.ids)}
+        self._cash = np.full(n, 100000.0)
+        self._inventory = np.zeros(n, dtype=np.int64)
+
+    def bind_ledger(self, ledger):
+        self.rows = ledger.register_block(self.ids, self._cash, self._inventory)
+        self.ledger = ledger
+
+    # Views into the ledger when bound (re-sliced on access, so they survive ledger
+    # growth), as of its last sync
+    @property
+    def cash(self):
+        if self.ledger is None: return self._cash
+        return self.ledger.cash[self.rows]
+
+    @property
+    def inventory(self):
+        if self.ledger is None: return self._inventory
+        return self.ledger.inventory[self.rows]
+
+    @abstractmethod
+    def get_actions(self, snapshot, active):
+        # -> (owner_idx, is_buy, price, qty); NaN price = market order
+        pass
+
+    def step(self, snapshot, engine, timestamp, activation_prob):
+        active = np.flatnonzero(self.rng.random(self.n) < activation_prob)
+        if len(active) == 0: return None
+        idx, is_buy, price, qty = self.get_actions(snapshot, active)
+        if len(idx) == 0: return None
+        return engine.process_batch(is_buy, price, qty, self.ids[idx], timestamp)
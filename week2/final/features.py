@@ -0,0 +1,65 @@
+from rolling import RollingWindow
+
+class MarketFeatures:
+    # Per-step market state computed once and shared by every agent. Windowed
+    # indicators are created on first request and then updated in O(1) per step,
+    # so agents with the same parameters read the same cached values.
+    # Also answers snapshot.get('mid_price') like the old dict snapshot.
+    def __init__(self):
+        self.time = None
+        self.mid_price = None
+        self.best_bid = None
+        self.best_ask = None
+        self.spread = None
+        self.bid_depth = 0
+        self.ask_depth = 0
+        self.n_updates = 0
+        self._windows = {} # lookback -> RollingWindow of mids
+        self._emas = {}    # span -> [alpha, value]
+
+    def update(self, time, mid_price, best_bid=None, best_ask=None, bid_depth=0, ask_depth=0):
+        self.time = time
+        self.mid_price = mid_price
+        self.best_bid = best_bid
+        self.best_ask = best_ask
+        self.spread = best_ask - best_bid if (best_bid and best_ask) else None
+        self.bid_depth = bid_depth
+        self.ask_depth = ask_depth
+        self.n_updates += 1
+
+        if mid_price is None: return
+        for w in self._windows.values(): w.push(mid_price)
+        for ema in self._emas.values():
+            ema[1] = mid_price if ema[1] is None else ema[1] + ema[0] * (mid_price - ema[1])
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def window(self, lookback):
+        w = self._windows.get(lookback)
+        if w is None:
+            w = self._windows[lookback] = RollingWindow(lookback)
+            if self.mid_price is not None: w.push(self.mid_price)
+        return w
+
+    def sma(self, lookback):
+        w = self.window(lookback)
+        return w.mean() if w.full else None
+
+    def change(self, lookback):
+        # last - first over the last `lookback` mids
+        w = self.window(lookback)
+        return w.last() - w.oldest() if w.full else None
+
+    def ret(self, lookback):
+        w = self.window(lookback)
+        return w.last() / w.oldest() - 1.0 if w.full else None
+
+    def ema(self, span):
+        ema = self._emas.get(span)
+        if ema is None:
+            ema = self._emas[span] = [2.0 / (span + 1), self.mid_price]
+        return ema[1]
@@ -0,0 +1,162 @@
+import numpy as np
+from matching_engine import ExecutionReport
+
+SCALAR_FILLS = 32 # syncs with fewer new trades book them one by one instead of through arrays
+
+class Ledger:
+    # Cash / inventory / average cost for every agent, one row per agent id.
+    # Fills are booked in bulk from execution reports; agents and populations
+    # bound to the ledger (bind_ledger) read their positions from its arrays. The
+    # owner syncs once per engine step; the reports below book any pending trades
+    # first (refresh), so they are exact between syncs too.
+    def __init__(self, capacity=64, engine=None):
+        self.index = {} # agent id -> row
+        self.ids = []
+        self.n = 0
+        self.cash = np.zeros(capacity)
+        self.start_cash = np.zeros(capacity)
+        self.inventory = np.zeros(capacity, dtype=np.int64)
+        self.avg_cost = np.zeros(capacity)
+        self.engine = engine
+        self.cursor = 0 # engine.trades already booked
+
+    def _reserve(self, k):
+        if self.n + k <= len(self.cash): return
+        capacity = max(2 * len(self.cash), self.n + k)
+        for name in ('cash', 'start_cash', 'inventory', 'avg_cost'):
+            old = getattr(self, name)
+            arr = np.zeros(capacity, dtype=old.dtype)
+            arr[:self.n] = old[:self.n]
+            setattr(self, name, arr)
+
+    def register(self, agent_id, cash=100000.0, inventory=0):
+        # Trades only carry owner ids, so re-registering an id takes over (and resets) its row
+        row = self.index.get(agent_id)
+        if row is None:
+            self._reserve(1)
+            row = self.index[agent_id] = self.n
+            self.ids.append(agent_id)
+            self.n += 1
+        self.cash[row] = self.start_cash[row] = cash
+        self.inventory[row] = inventory
+        self.avg_cost[row] = 0.0
+        return row
+
+    def register_block(self, ids, cash=100000.0, inventory=0):
+        # -> slice of contiguous rows for a population
+        ids = list(ids)
+        if any(agent_id in self.index for agent_id in ids): raise ValueError("Population ids already registered")
+        self._reserve(len(ids))
+        rows = slice(self.n, self.n + len(ids))
+        self.index.update(zip(ids, range(rows.start, rows.stop)))
+        self.ids.extend(ids)
+        self.n = rows.stop
+        self.cash[rows] = self.start_cash[rows] = cash
+        self.inventory[rows] = inventory
+        return rows
+
+    def sync(self, engine):
+        # Book every trade printed since the last sync
+        self.engine = engine
+        trades, start = engine.trades, self.cursor
+        end = len(trades)
+        if end == start: return
+        if end - start < SCALAR_FILLS: self._book(trades, start, end)
+        else: self.apply(ExecutionReport(trades[start:end]))
+        self.cursor = end
+
+    def refresh(self):
+        # Book pending trades, if the engine has printed any since the last sync
+        engine = self.engine
+        if engine is not None and len(engine.trades) > self.cursor: self.sync(engine)
+
+    def _book(self, trades, start, end):
+        # Trades one by one on Python floats, touching only the rows that traded
+        # (numpy scalar arithmetic would dominate). Same average-cost rule as apply()
+        # on one-trade batches: adding to a position blends the price in, flipping
+        # restarts at it, flat resets it, reducing keeps it.
+        get, rows = self.index.get, {}
+        cash, inventory, avg_cost = self.cash, self.inventory, self.avg_cost
+        for i in range(start, end):
+            t = trades[i]
+            qty, price = t.qty, t.price
+            row = get(t.buyer_id)
+            if row is not None:
+                pos = rows.get(row)
+                if pos is None: pos = rows[row] = [cash.item(row), inventory.item(row), avg_cost.item(row)]
+                pos0 = pos[1]
+                pos1 = pos[1] = pos0 + qty
+                if pos0 >= 0: pos[2] = (pos0 * pos[2] + qty * price) / pos1
+                elif pos1 > 0: pos[2] = price
+                elif pos1 == 0: pos[2] = 0.0
+                pos[0] -= qty * price
+            row = get(t.seller_id)
+            if row is not None:
+                pos = rows.get(row)
+                if pos is None: pos = rows[row] = [cash.item(row), inventory.item(row), avg_cost.item(row)]
+                pos0 = pos[1]
+                pos1 = pos[1] = pos0 - qty
+                if pos0 <= 0: pos[2] = (qty * price - pos0 * pos[2]) / -pos1
+                elif pos1 < 0: pos[2] = price
+                elif pos1 == 0: pos[2] = 0.0
+                pos[0] += qty * price
+        for row, (c, q, a) in rows.items():
+            cash[row], inventory[row], avg_cost[row] = c, q, a
+
+    def apply(self, report):
+        n = self.n
+        buy_idx, sell_idx, price, qty = report.index_arrays(self.index)
+        b, s = buy_idx >= 0, sell_idx >= 0 # Unregistered owners (e.g. the RL agent) are skipped
+        notional = price * qty
+        buy_q = np.bincount(buy_idx[b], qty[b], n)
+        buy_v = np.bincount(buy_idx[b], notional[b], n)
+        sell_q = np.bincount(sell_idx[s], qty[s], n)
+        sell_v = np.bincount(sell_idx[s], notional[s], n)
+
+        pos0 = self.inventory[:n]
+        net = (buy_q - sell_q).astype(np.int64)
+        pos1 = pos0 + net
+
+        # Average cost moves on the batch's net flow: adding to (or opening) a position
+        # blends in that side's VWAP, reducing keeps it, flipping through zero restarts it.
+        # Cash uses the gross flows, so round trips inside a batch still show up as realized.
+        # (Cash and inventory match booking the trades one by one; average cost can differ
+        # when an agent trades both ways inside the batch.)
+        avg = self.avg_cost[:n]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vwap = np.where(net > 0, buy_v / buy_q, sell_v / sell_q)
+            blended = (np.abs(pos0) * avg + np.abs(net) * vwap) / np.abs(pos1)
+        adding = (net != 0) & (pos0 * net >= 0)
+        flipped = pos0 * pos1 < 0
+        avg[:] = np.where(adding, blended, np.where(flipped, vwap, avg))
+        avg[pos1 == 0] = 0.0
+
+        self.cash[:n] += sell_v - buy_v
+        pos0[:] = pos1
+
+    @property
+    def realized_pnl(self):
+        self.refresh()
+        n = self.n
+        return self.cash[:n] - self.start_cash[:n] + self.inventory[:n] * self.avg_cost[:n]
+
+    def mark_to_market(self, price):
+        # -> (equity, unrealized_pnl) for every agent at one mark price
+        self.refresh()
+        n = self.n
+        inventory = self.inventory[:n]
+        return self.cash[:n] + inventory * price, inventory * (price - self.avg_cost[:n])
+
+    def get_dataframe(self, price):
+        import pandas as pd
+        equity, unrealized = self.mark_to_market(price)
+        n = self.n
+        return pd.DataFrame({
+            'agent_id': self.ids,
+            'cash': self.cash[:n],
+            'inventory': self.inventory[:n],
+            'avg_cost': self.avg_cost[:n],
+            'realized_pnl': self.realized_pnl,
+            'unrealized_pnl': unrealized,
+            'equity': equity
+        })
@@ -1,6 +1,8 @@
 import heapq
 import itertools
+from bisect import bisect_left, insort
 from collections import deque
+import numpy as np
 
 class Order:
     _id_counter = itertools.count()
@@ -23,57 +25,174 @@ class Trade:
         self.buyer_id = buyer
         self.seller_id = seller
 
+class ExecutionReport:
+    def __init__(self, trades, orders=None):
+        self.trades = trades
+        self.orders = orders # process_batch: resting Order per submitted row (None if it did not rest)
+
+    def __len__(self):
+        return len(self.trades)
+
+    def index_arrays(self, index):
+        # Owner ids -> integer indices via `index` (-1 when the owner is not in it)
+        trades = self.trades
+        buy_idx = np.fromiter((index.get(t.buyer_id, -1) for t in trades), np.int64, len(trades))
+        sell_idx = np.fromiter((index.get(t.seller_id, -1) for t in trades), np.int64, len(trades))
+        price = np.fromiter((t.price for t in trades), np.float64, len(trades))
+        qty = np.fromiter((t.qty for t in trades), np.int64, len(trades))
+        return buy_idx, sell_idx, price, qty
+
+class LevelBook:
+    # Resting qty aggregated per price level for one side, with the level prices kept
+    # sorted, so the top k levels are a slice instead of a scan of the heap.
+    def __init__(self, descending):
+        self.descending = descending # bids: best = highest
+        self.qty = {}
+        self.prices = [] # ascending
+        self.depth = 0
+        self.added = 0 # cumulative qty rested / removed (fills + cancels)
+        self.removed = 0
+
+    def add(self, price, qty):
+        if price in self.qty: self.qty[price] += qty
+        else:
+            self.qty[price] = qty
+            insort(self.prices, price)
+        self.depth += qty
+        self.added += qty
+
+    def remove(self, price, qty):
+        left = self.qty[price] - qty
+        if left > 0: self.qty[price] = left
+        else:
+            del self.qty[price]
+            del self.prices[bisect_left(self.prices, price)]
+        self.depth -= qty
+        self.removed += qty
+
+    def top(self, k):
+        prices = self.prices[:-k - 1:-1] if self.descending else self.prices[:k]
+        return [(p, self.qty[p]) for p in prices]
+
 class MatchingEngine:
-    def __init__(self):
+    def __init__(self, track_levels=False):
         self.asks = [] 
         self.bids = [] 
         self.trades = []
+        self.n_cancelled = 0 # Cancelled entries still sitting in the heaps
+        # Optional L2 cache + aggressor counters, maintained on every rest/fill/cancel
+        self.bid_levels = LevelBook(descending=True) if track_levels else None
+        self.ask_levels = LevelBook(descending=False) if track_levels else None
+        self.buy_volume = 0 # aggressor-side traded qty (cumulative)
+        self.sell_volume = 0
 
     def process(self, order):
         if order.price is not None and order.price < 0: raise ValueError("Negative Price")
         if order.qty <= 0: raise ValueError("Non-positive Quantity")
 
-        if order.side == 'Buy': self._match_buy(order)
-        else: self._match_sell(order)
-
-    def _match_buy(self, order):
-        while self.asks and order.qty > 0:
-            best_ask = self.asks[0]
-            price, _, ask_order = best_ask[0], best_ask[1], best_ask[2]
+        if order.side == 'Buy': order.qty = self._match_buy(order.price, order.qty, order.owner_id, order.timestamp)
+        else: order.qty = self._match_sell(order.price, order.qty, order.owner_id, order.timestamp)
+        if order.qty > 0 and order.price is not None: self._rest(order)
+
+    def process_batch(self, is_buy, prices, qtys, owners, timestamp):
+        # Column input from agent populations; NaN price = market order. Rows match
+        # straight from the columns, as submit() does: an Order is only built for a
+        # remainder that rests (report.orders[k]; None when row k did not rest).
+        start = len(self.trades)
+        match_buy, match_sell, rest = self._match_buy, self._match_sell, self._rest
+        orders = []
+        for buy, price, qty, owner in zip(is_buy.tolist(), prices.tolist(), qtys.tolist(), owners):
+            if price != price: price = None
+            elif price < 0: raise ValueError("Negative Price")
+            if qty <= 0: raise ValueError("Non-positive Quantity")
+
+            qty = match_buy(price, qty, owner, timestamp) if buy else match_sell(price, qty, owner, timestamp)
+            if qty > 0 and price is not None:
+                order = Order('Buy' if buy else 'Sell', price, qty, owner, timestamp)
+                rest(order)
+                orders.append(order)
+            else:
+                orders.append(None)
+        return ExecutionReport(self.trades[start:], orders)
+
+    def cancel(self, order):
+        # Lazy: zero the resting qty, drop the heap entry when it surfaces
+        if order.qty <= 0 or order.price is None: return
+        if self.bid_levels is not None:
+            (self.bid_levels if order.side == 'Buy' else self.ask_levels).remove(order.price, order.qty)
+        order.qty = 0
+        self.n_cancelled += 1
+        if self.n_cancelled > 64 and 2 * self.n_cancelled > len(self.bids) + len(self.asks):
+            self.bids = [e for e in self.bids if e[2].qty > 0]
+            self.asks = [e for e in self.asks if e[2].qty > 0]
+            heapq.heapify(self.bids)
+            heapq.heapify(self.asks)
+            self.n_cancelled = 0
+
+    def _pop_cancelled(self, book):
+        while book and book[0][2].qty == 0:
+            heapq.heappop(book)
+            self.n_cancelled -= 1
+
+    def submit(self, is_buy, price, qty, owner_id, timestamp):
+        # Allocation-light process(): scalars in, and an Order is only created
+        # if a remainder rests on the book. price=None = market order.
+        if price is not None and price < 0: raise ValueError("Negative Price")
+        if qty <= 0: raise ValueError("Non-positive Quantity")
+
+        if is_buy: qty = self._match_buy(price, qty, owner_id, timestamp)
+        else: qty = self._match_sell(price, qty, owner_id, timestamp)
+        if qty > 0 and price is not None:
+            self._rest(Order('Buy' if is_buy else 'Sell', price, qty, owner_id, timestamp))
+
+    def _rest(self, order):
+        if order.side == 'Buy': heapq.heappush(self.bids, (-order.price, order.id, order))
+        else: heapq.heappush(self.asks, (order.price, order.id, order))
+        if self.bid_levels is not None:
+            (self.bid_levels if order.side == 'Buy' else self.ask_levels).add(order.price, order.qty)
+
+    def _match_buy(self, limit, qty, owner_id, timestamp):
+        # -> unfilled qty
+        asks, levels, start = self.asks, self.ask_levels, qty
+        while asks and qty > 0:
+            if asks[0][2].qty == 0: self._pop_cancelled(asks); continue
+            price, _, ask_order = asks[0]
             
-            if order.price is not None and order.price < price: break 
+            if limit is not None and limit < price: break 
 
-            qty = min(order.qty, ask_order.qty)
-            self._execute_trade(price, qty, order.timestamp, order, ask_order)
+            fill = min(qty, ask_order.qty)
+            self.trades.append(Trade(price, fill, timestamp, owner_id, ask_order.owner_id))
+            if levels is not None: levels.remove(price, fill)
             
-            order.qty -= qty
-            ask_order.qty -= qty
-            if ask_order.qty == 0: heapq.heappop(self.asks)
-
-        if order.qty > 0 and order.price is not None:
-            heapq.heappush(self.bids, (-order.price, order.id, order))
-
-    def _match_sell(self, order):
-        while self.bids and order.qty > 0:
-            best_bid = self.bids[0]
-            price, _, bid_order = -best_bid[0], best_bid[1], best_bid[2]
-
-            if order.price is not None and order.price > price: break 
-
-            qty = min(order.qty, bid_order.qty)
-            self._execute_trade(price, qty, order.timestamp, bid_order, order)
-
-            order.qty -= qty
-            bid_order.qty -= qty
-            if bid_order.qty == 0: heapq.heappop(self.bids)
-
-        if order.qty > 0 and order.price is not None:
-            heapq.heappush(self.asks, (order.price, order.id, order))
-
-    def _execute_trade(self, price, qty, timestamp, buyer, seller):
-        self.trades.append(Trade(price, qty, timestamp, buyer.owner_id, seller.owner_id))
+            qty -= fill
+            ask_order.qty -= fill
+            if ask_order.qty == 0: heapq.heappop(asks)
+        self.buy_volume += start - qty
+        return qty
+
+    def _match_sell(self, limit, qty, owner_id, timestamp):
+        bids, levels, start = self.bids, self.bid_levels, qty
+        while bids and qty > 0:
+            if bids[0][2].qty == 0: self._pop_cancelled(bids); continue
+            neg_price, _, bid_order = bids[0]
+            price = -neg_price
+
+            if limit is not None and limit > price: break 
+
+            fill = min(qty, bid_order.qty)
+            self.trades.append(Trade(price, fill, timestamp, bid_order.owner_id, owner_id))
+            if levels is not None: levels.remove(price, fill)
+
+            qty -= fill
+            bid_order.qty -= fill
+            if bid_order.qty == 0: heapq.heappop(bids)
+        self.sell_volume += start - qty
+        return qty
 
     def get_l1_snapshot(self):
+        if self.n_cancelled:
+            self._pop_cancelled(self.bids)
+            self._pop_cancelled(self.asks)
         best_bid = -self.bids[0][0] if self.bids else None
         best_ask = self.asks[0][0] if self.asks else None
         return best_bid, best_ask
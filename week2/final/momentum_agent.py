@@ -1,25 +1,25 @@
-from collections import deque
 from base_agent import Agent, OrderIntent
 
 class MomentumAgent(Agent):
-    def __init__(self, agent_id, window=50):
-        super().__init__(agent_id)
-        self.history = deque(maxlen=window)
+    def __init__(self, agent_id, window=50, rng=None):
+        super().__init__(agent_id, rng)
         self.window = window
 
-    def get_action(self, snapshot):
+    def _decide(self, snapshot):
+        # -> True (buy) / False (sell), or None to stay out
         mid = snapshot.get('mid_price')
-        if mid is None: return []
-        
-        self.history.append(mid)
-        
-        if len(self.history) < self.window: return []
-        
-        sma = sum(self.history) / len(self.history)
+        if mid is None: return None
         
-        if mid > sma:
-            return [OrderIntent('Buy', None, 10, 'Market')]
-        elif mid < sma:
-            return [OrderIntent('Sell', None, 10, 'Market')]
-        
-        return []
\ No newline at end of file
+        # SMA is shared across agents through MarketFeatures
+        sma = snapshot.sma(self.window)
+        if sma is None or mid == sma: return None
+        return mid > sma
+
+    def get_action(self, snapshot):
+        is_buy = self._decide(snapshot)
+        if is_buy is None: return []
+        return [OrderIntent('Buy' if is_buy else 'Sell', None, 10, 'Market')]
+
+    def write_intents(self, snapshot, buf):
+        is_buy = self._decide(snapshot)
+        if is_buy is not None: buf.append(is_buy, None, 10, self.id)
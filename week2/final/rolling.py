@@ -0,0 +1,71 @@
+class RollingWindow:
+    # Fixed-size ring buffer with a running sum (and sum of squares when track_var):
+    # push/mean/var are O(1). The sums are rebuilt once per wrap to bound float drift.
+    def __init__(self, size, track_var=False):
+        if size <= 0: raise ValueError("Window size must be positive")
+        self.size = size
+        self.track_var = track_var
+        self.buf = [0.0] * size
+        self.pos = 0 # next slot to write
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x):
+        pos = self.pos
+        if self.count == self.size:
+            old = self.buf[pos]
+            self.total -= old
+            if self.track_var: self.total_sq -= old * old
+        else:
+            self.count += 1
+
+        self.buf[pos] = x
+        self.total += x
+        if self.track_var: self.total_sq += x * x
+
+        pos += 1
+        if pos == self.size:
+            pos = 0
+            self._resum()
+        self.pos = pos
+
+    def _resum(self):
+        vals = self.buf[:self.count]
+        self.total = sum(vals)
+        if self.track_var: self.total_sq = sum(v * v for v in vals)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def var(self):
+        # Population variance (ddof=0), same as np.var
+        if not self.track_var: raise RuntimeError("RollingWindow created without track_var")
+        if self.count == 0: return 0.0
+        m = self.total / self.count
+        return max(self.total_sq / self.count - m * m, 0.0)
+
+    def std(self):
+        return self.var() ** 0.5
+
+    def oldest(self):
+        return self.buf[self.pos if self.count == self.size else 0]
+
+    def last(self):
+        return self.buf[self.pos - 1]
+
+    def values(self):
+        # Chronological copy (O(n), for plotting/debugging)
+        if self.count < self.size: return self.buf[:self.count]
+        return self.buf[self.pos:] + self.buf[:self.pos]
+
+    def clear(self):
+        self.pos = self.count = 0
+        self.total = self.total_sq = 0.0
@@ -4,14 +4,22 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import warnings
+import tracemalloc
+from time import perf_counter_ns
 
 from matching_engine import MatchingEngine, Order, run_integrity_test
-from event_loop import SimulationKernel
-from noise_agent import NoiseTrader
-from market_maker_agent import MarketMakerAgent
+from event_loop import SimulationKernel, KernelStats
+from noise_agent import NoiseTrader, NoiseTraderPopulation
+from market_maker_agent import MarketMakerAgent, MarketMakerPopulation
 from momentum_agent import MomentumAgent
+from base_agent import IntentBuffer
 from tape import Tape
 from snapshots import SnapshotRecorder
+from checkpoint import save_checkpoint, load_checkpoint
+from features import MarketFeatures
+from rng import RngStreams, GLOBAL_RNG
+from hawkes_agent import HawkesFlowAgent
+from ledger import Ledger
 
 warnings.filterwarnings('ignore')
 
@@ -19,65 +27,237 @@ TOTAL_AGENTS = 100
 SIMULATION_TIME = 1800 
 SNAPSHOT_INTERVAL = 1.0
 SEED = 42
+PROFILE = False # Per-category event timing (see KernelStats)
+VECTORIZED = False # Noise traders and MMs as array populations
+ACTIVATION_PROB = 0.1
+RNG_STREAMS = False # Per-agent seeded streams (rng.RngStreams) instead of the global random state
+POOLED = False # Agents write into a reusable IntentBuffer; Orders are only built for resting remainders
+MEASURE_ALLOC = False # tracemalloc / GC comparison of the pooled and legacy paths before the scenarios
 
 class FairValueModel:
-    def __init__(self, start=100.0, vol=0.1):
+    def __init__(self, start=100.0, vol=0.1, rng=None):
         self.current_value = start
         self.vol = vol
+        self.rng = rng if rng is not None else GLOBAL_RNG
     def step(self):
-        self.current_value += np.random.normal(0, self.vol)
+        self.current_value += self.rng.normal(0, self.vol)
         return self.current_value
 
-def run_scenario(name, n_noise, n_mm, n_momo):
-    print(f"Running Scenario {name}: Noise={n_noise}, MM={n_mm}, Momo={n_momo}...")
-    
-    random.seed(SEED)
-    np.random.seed(SEED)
-    
-    kernel = SimulationKernel()
-    engine = MatchingEngine()
-    tape = Tape()
-    snaps = SnapshotRecorder()
-    fv = FairValueModel()
-    
-    agents = []
-    for i in range(n_noise): agents.append(NoiseTrader(f"Noise_{i}", fv))
-    for i in range(n_mm): agents.append(MarketMakerAgent(f"MM_{i}"))
-    for i in range(n_momo): agents.append(MomentumAgent(f"Momo_{i}"))
-    
-    assert len(agents) == TOTAL_AGENTS, "Agent count mismatch"
+class MarketSimulation:
+    # Everything here pickles, so a warm simulation can be checkpointed and
+    # branched into several what-if runs (see checkpoint.py).
+    # seed=None draws from the global random state; an int gives every agent,
+    # population and the fair value their own named stream.
+    def __init__(self, n_noise, n_mm, n_momo, profile=PROFILE, vectorized=VECTORIZED, seed=None, n_hawkes=0, pooled=POOLED):
+        self.stats = KernelStats() if profile else None
+        self.kernel = SimulationKernel(stats=self.stats)
+        self.engine = MatchingEngine()
+        self.snaps = SnapshotRecorder()
+        self.fv = FairValueModel()
+        self.features = MarketFeatures()
+        self.intents = IntentBuffer() if pooled else None
+
+        self.agents = []
+        self.populations = []
+        if vectorized:
+            self.populations.append(NoiseTraderPopulation(n_noise, self.fv))
+            if n_mm: self.populations.append(MarketMakerPopulation(n_mm))
+        else:
+            for i in range(n_noise): self.agents.append(NoiseTrader(f"Noise_{i}", self.fv))
+            for i in range(n_mm): self.agents.append(MarketMakerAgent(f"MM_{i}"))
+        for i in range(n_momo): self.agents.append(MomentumAgent(f"Momo_{i}"))
+        # Self-exciting flow, dispatched at its own arrival times between market steps
+        self.hawkes = HawkesFlowAgent(n_hawkes, self.fv) if n_hawkes else None
+
+        self.ledger = Ledger(self.n_agents, engine=self.engine)
+        for holder in self.populations + self.agents: holder.bind_ledger(self.ledger)
+        if self.hawkes: self.hawkes.bind_ledger(self.ledger)
 
-    def market_step():
-        fv.step()
+        self.reseed(seed)
+        self._register_handlers()
+        self.kernel.schedule(0, 'market_step')
+        if self.hawkes: self.kernel.schedule(self.hawkes.next_arrival(0.0), 'hawkes_arrival')
+
+    def reseed(self, seed):
+        if seed is None: return
+        streams = RngStreams(seed)
+        self.fv.rng = streams.block('fair_value')
+        for agent in self.agents: agent.rng = streams.block(agent.id)
+        for pop in self.populations: pop.rng = streams.generator(pop.prefix)
+        if self.hawkes: self.hawkes.rng = streams.generator(self.hawkes.prefix)
+
+    @property
+    def n_agents(self):
+        return len(self.agents) + sum(pop.n for pop in self.populations) + (self.hawkes.n if self.hawkes else 0)
+
+    def _register_handlers(self):
+        self.kernel.register('market_step', self.market_step)
+        self.kernel.register('hawkes_arrival', self.hawkes_arrival)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._register_handlers()
+
+    def market_step(self, payload=None):
+        kernel, engine, stats = self.kernel, self.engine, self.stats
+        timed = stats is not None
+
+        if timed: t0 = perf_counter_ns()
+        self.fv.step()
+        if timed: t1 = perf_counter_ns(); stats.add('fair_value_rng', t1 - t0)
         
         bb, ba = engine.get_l1_snapshot()
-        snaps.record(kernel.time, bb, ba)
+        self.snaps.record(kernel.time, bb, ba)
+        if timed: stats.add('snapshot', perf_counter_ns() - t1)
         
-        snapshot = {'mid_price': (bb+ba)/2 if (bb and ba) else fv.current_value}
+        snapshot = self.features
+        snapshot.update(kernel.time, (bb+ba)/2 if (bb and ba) else self.fv.current_value,
+                        bb, ba, len(engine.bids), len(engine.asks))
         
-        for agent in agents:
-            if random.random() < 0.1: 
+        if self.intents is not None:
+            self._step_agents_pooled(snapshot)
+        else:
+            self._step_agents(snapshot)
+
+        for pop in self.populations:
+            if timed: t0 = perf_counter_ns()
+            pop.step(snapshot, engine, kernel.time, ACTIVATION_PROB)
+            if timed: stats.add('population', perf_counter_ns() - t0)
+
+        self.ledger.sync(engine) # once per step: agents read positions from the ledger arrays
+        kernel.schedule(SNAPSHOT_INTERVAL, 'market_step')
+
+    def _step_agents(self, snapshot):
+        if self.stats is not None: return self._step_agents_timed(snapshot)
+        kernel, engine = self.kernel, self.engine
+        for agent in self.agents:
+            if agent.rng.random() < ACTIVATION_PROB:
+                for intent in agent.get_action(snapshot):
+                    engine.process(Order(intent.side, intent.price, intent.qty, agent.id, kernel.time))
+
+    def _step_agents_timed(self, snapshot):
+        # _step_agents with get_action / engine sections for KernelStats
+        kernel, engine, stats = self.kernel, self.engine, self.stats
+        for agent in self.agents:
+            if agent.rng.random() < ACTIVATION_PROB:
+                t0 = perf_counter_ns()
                 actions = agent.get_action(snapshot)
+                t1 = perf_counter_ns(); stats.add('get_action', t1 - t0)
                 for intent in actions:
-                    order = Order(intent.side, intent.price, intent.qty, agent.id, kernel.time)
-                    engine.process(order)
-                    
-                    if engine.trades and engine.trades[-1].timestamp == kernel.time:
-                         pass
+                    engine.process(Order(intent.side, intent.price, intent.qty, agent.id, kernel.time))
+                stats.add('engine', perf_counter_ns() - t1)
+
+    def _step_agents_pooled(self, snapshot):
+        # Agents only read the tick-start features and positions (the ledger syncs once
+        # per market step), so buffering the whole tick and submitting in agent order
+        # gives the same tape as _step_agents
+        if self.stats is not None: return self._step_agents_pooled_timed(snapshot)
+        buf = self.intents
+        for agent in self.agents:
+            if agent.rng.random() < ACTIVATION_PROB: agent.write_intents(snapshot, buf)
+        buf.flush(self.engine, self.kernel.time)
+
+    def _step_agents_pooled_timed(self, snapshot):
+        stats, buf = self.stats, self.intents
+        t0 = perf_counter_ns()
+        for agent in self.agents:
+            if agent.rng.random() < ACTIVATION_PROB: agent.write_intents(snapshot, buf)
+        t1 = perf_counter_ns(); stats.add('get_action', t1 - t0)
+        buf.flush(self.engine, self.kernel.time)
+        stats.add('engine', perf_counter_ns() - t1)
+
+    def hawkes_arrival(self, payload=None):
+        now = self.kernel.time
+        self.hawkes.fire(self.features, self.engine, now)
+        self.ledger.sync(self.engine)
+        self.kernel.schedule(self.hawkes.next_arrival(now) - now, 'hawkes_arrival')
+
+    def run_until(self, t):
+        self.kernel.run_until(t)
 
-        kernel.schedule(SNAPSHOT_INTERVAL, market_step)
+    def get_positions(self):
+        bb, ba = self.engine.get_l1_snapshot()
+        mark = (bb+ba)/2 if (bb and ba) else self.fv.current_value
+        return self.ledger.get_dataframe(mark)
 
-    kernel.schedule(0, market_step)
+    def get_dataframes(self):
+        tape = Tape()
+        for t in self.engine.trades: tape.record(t)
+        return tape.get_dataframe(), self.snaps.get_dataframe()
+
+def run_scenario(name, n_noise, n_mm, n_momo, profile=PROFILE, vectorized=VECTORIZED, rng_streams=RNG_STREAMS, pooled=POOLED):
+    print(f"Running Scenario {name}: Noise={n_noise}, MM={n_mm}, Momo={n_momo}...")
     
-    kernel.run(SIMULATION_TIME)
+    random.seed(SEED)
+    np.random.seed(SEED)
     
-    for t in engine.trades: tape.record(t)
+    sim = MarketSimulation(n_noise, n_mm, n_momo, profile=profile, vectorized=vectorized,
+                           seed=SEED if rng_streams else None, pooled=pooled)
+    assert sim.n_agents == TOTAL_AGENTS, "Agent count mismatch"
+
+    sim.run_until(SIMULATION_TIME)
+
+    if sim.stats is not None:
+        print(f"--- Scenario {name}: kernel profile ---")
+        print(sim.stats.report())
     
-    return tape.get_dataframe(), snaps.get_dataframe()
+    return sim.get_dataframes()
+
+def measure_allocations(n_noise, n_mm, n_momo, duration=SIMULATION_TIME, **kwargs):
+    # tracemalloc, tick by tick: retained growth plus the transient peak above it
+    # (memory allocated and dropped again within a tick), and Order objects built
+    random.seed(SEED)
+    np.random.seed(SEED)
+    sim = MarketSimulation(n_noise, n_mm, n_momo, **kwargs)
+    first_id = next(Order._id_counter)
+    transient = []
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    t0 = perf_counter_ns()
+    for t in range(int(duration) + 1):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        sim.run_until(t)
+        current, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - max(before, current))
+    elapsed = perf_counter_ns() - t0
+    tracemalloc.stop()
+    return {
+        'trades': len(sim.engine.trades),
+        'orders_built': next(Order._id_counter) - first_id - 1,
+        'retained_kb': (current - start) / 1024,
+        'transient_kb_mean': np.mean(transient) / 1024,
+        'transient_kb_max': np.max(transient) / 1024,
+        'wall_ms': elapsed / 1e6
+    }
+
+def run_branches(n_noise, n_mm, n_momo, warmup, horizon, branch_seeds, path="warm_state.pkl", rng_streams=RNG_STREAMS):
+    # Simulate the common prefix once, then fork one run per seed from the warm state
+    random.seed(SEED)
+    np.random.seed(SEED)
+    sim = MarketSimulation(n_noise, n_mm, n_momo, seed=SEED if rng_streams else None)
+    sim.run_until(warmup)
+    save_checkpoint(path, sim)
+
+    results = {}
+    for seed in branch_seeds:
+        branch = load_checkpoint(path)
+        random.seed(seed)
+        np.random.seed(seed)
+        if rng_streams: branch.reseed(seed)
+        branch.run_until(horizon)
+        results[seed] = branch.get_dataframes()
+    return results
 
 if __name__ == "__main__":
     run_integrity_test()
 
+    if MEASURE_ALLOC:
+        df_alloc = pd.DataFrame([dict(path=path, **measure_allocations(80, 20, 0, pooled=pooled))
+                                 for path, pooled in (("legacy", False), ("pooled", True))])
+        print("\n--- ALLOCATIONS (Scenario B) ---")
+        print(df_alloc)
+
     scenarios = [
         ("A", 100, 0, 0),
         ("B", 80, 20, 0),
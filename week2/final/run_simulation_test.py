@@ -0,0 +1,47 @@
+import os
+import random
+import numpy as np
+from checkpoint import save_checkpoint, load_checkpoint
+from run_simulation import MarketSimulation
+
+def _tape(sim):
+    return [(t.timestamp, t.price, t.qty, t.buyer_id, t.seller_id) for t in sim.engine.trades]
+
+def _sim(seed=None, **kwargs):
+    random.seed(0)
+    np.random.seed(0)
+    return MarketSimulation(20, 5, 5, seed=seed, **kwargs)
+
+def test_checkpoint_resumes_the_same_tape(tmp_path):
+    # Global random state (seed=None) is part of the checkpoint too
+    for seed in (None, 42):
+        sim = _sim(seed)
+        sim.run_until(100)
+        path = os.path.join(tmp_path, f"warm_{seed}.pkl")
+        save_checkpoint(path, sim)
+        sim.run_until(300)
+
+        resumed = load_checkpoint(path)
+        resumed.run_until(300)
+        assert _tape(resumed) == _tape(sim)
+        assert len(_tape(sim)) > 0
+
+def test_pooled_intents_give_the_legacy_tape():
+    # MMs skew on ledger inventory; it only moves between market steps, so buffering a whole tick is safe
+    tapes = []
+    for pooled in (False, True):
+        sim = _sim(7, pooled=pooled)
+        sim.run_until(200)
+        tapes.append(_tape(sim))
+    assert tapes[0] == tapes[1]
+    assert len(tapes[0]) > 0
+
+def test_profiling_does_not_change_the_tape():
+    for pooled in (False, True):
+        plain, profiled = _sim(3, pooled=pooled), _sim(3, pooled=pooled, profile=True)
+        for sim in (plain, profiled): sim.run_until(100)
+        assert _tape(plain) == _tape(profiled)
+        df = profiled.stats.get_dataframe().set_index('category')
+        assert df.loc['market_step', 'kind'] == 'handler'
+        assert df.loc[['get_action', 'engine', 'snapshot'], 'kind'].eq('section').all()
+        assert df.loc[df['kind'] == 'section', 'total_ms'].sum() < df.loc['market_step', 'total_ms']
@@ -0,0 +1,51 @@
+import numpy as np
+from batch_env import BatchTradingEnv
+
+def _rollout(seed, steps=20, num_envs=8):
+    env = BatchTradingEnv(num_envs, seed=seed)
+    obs = [env.reset()]
+    rewards = []
+    actions = np.random.default_rng(0).integers(0, 3, (steps, num_envs))
+    for a in actions:
+        o, r, _, _ = env.step(a)
+        obs.append(o)
+        rewards.append(r)
+    return env, np.array(obs), np.array(rewards)
+
+def test_step_shapes_and_dtypes():
+    env, obs, rewards = _rollout(0, steps=5)
+    assert obs.shape == (6, 8, 4) and obs.dtype == np.float32
+    assert rewards.shape == (5, 8) and rewards.dtype == np.float32
+    assert all(env.observation_space.contains(o) for o in obs[-1])
+    assert np.isfinite(obs).all() and np.isfinite(rewards).all()
+
+def test_seed_reproduces_the_rollout():
+    _, obs_a, rewards_a = _rollout(5)
+    _, obs_b, rewards_b = _rollout(5)
+    _, obs_c, _ = _rollout(6)
+    assert np.array_equal(obs_a, obs_b) and np.array_equal(rewards_a, rewards_b)
+    assert not np.array_equal(obs_a, obs_c)
+
+def test_book_stays_uncrossed_and_mm_volume_inside_it():
+    env, _, _ = _rollout(1, steps=30)
+    bb, ba = env._best(env.rows)
+    both = ~(np.isnan(bb) | np.isnan(ba))
+    assert both.any()
+    assert (bb[both] < ba[both]).all()
+    assert (env.mm_book <= env.book + 1e-4).all() and (env.mm_book >= -1e-4).all()
+    assert (env.book == np.round(env.book)).all() # whole lots
+
+def test_finished_markets_reset_with_a_terminal_observation():
+    env = BatchTradingEnv(4, seed=2)
+    env.max_steps = 3
+    env.reset()
+    for _ in range(2):
+        _, _, dones, infos = env.step(np.ones(4, dtype=np.int64))
+        assert not dones.any()
+    obs, _, dones, infos = env.step(np.ones(4, dtype=np.int64))
+    assert dones.all()
+    for i, info in enumerate(infos):
+        assert info['TimeLimit.truncated']
+        assert info['terminal_observation'][3] == 0.3 # 3 buys of 10 / max_inventory
+        assert obs[i][3] == 0.0 # the reset market's flat inventory
+    assert (env.current_step == 0).all() and (env.cash == 100000.0).all()
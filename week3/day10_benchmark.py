@@ -1,117 +1,38 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from stable_baselines3 import PPO
-from day2 import TradingEnv
-from requirements.market_maker_agent import MarketMakerAgent
-from requirements.noise_agent import NoiseTrader
-from requirements.momentum_agent import MomentumTrader
+from evaluation import evaluate, summarize
+from model_cache import cached_policy
 
-def calculate_sharpe(returns):
-    if np.std(returns) == 0: return 0.0
-    return np.mean(returns) / np.std(returns) * np.sqrt(252)
-
-def calculate_max_drawdown(wealth_curve):
-    peak = wealth_curve[0]
-    max_dd = 0.0
-    for value in wealth_curve:
-        if value > peak:
-            peak = value
-        dd = (peak - value) / peak
-        if dd > max_dd:
-            max_dd = dd
-    return -max_dd
-
-def run_strategy(env, agent_type, model=None):
-    """Runs a single episode for a specific strategy"""
-    obs, _ = env.reset(seed=42)
-
-    env.background_agents = []
-    for i in range(20): env.background_agents.append(NoiseTrader(f"Noise_{i}", env.fv))
-    for i in range(5): env.background_agents.append(MarketMakerAgent(f"MM_{i}"))
-
-    mom_history = []
-    wealth_history = []
-
-    terminated = False
-    step = 0
-
-    while not terminated and step < 2000:
-        action = 0 
-
-        if agent_type == 'RL':
-            action, _ = model.predict(obs, deterministic=True)
-
-        elif agent_type == 'Random':
-            action = env.action_space.sample()
-
-        elif agent_type == 'BuyHold':
-            if step == 0: action = 1 # Buy once
-            else: action = 0 # Hold forever
-
-        elif agent_type == 'Momentum':
-            price = env.last_mid_price
-            mom_history.append(price)
-            if len(mom_history) > 5:
-                # 5-step return
-                ret = (price - mom_history[-5]) / mom_history[-5]
-                if ret > 0.001: action = 1 # Buy
-                elif ret < -0.001: action = 2 # Sell
-
-        obs, reward, terminated, truncated, info = env.step(action)
-
-        current_wealth = env.rl_cash + (env.rl_inventory * env.last_mid_price)
-
-        wealth_history.append(current_wealth)
-        step += 1
-
-    return np.array(wealth_history)
+N_SEEDS = 100     # Episodes per strategy (seeds 42, 43, ...)
+N_WORKERS = None  # Evaluation processes; None = one per core, 0 = in this process
+RECORD_DIR = None # e.g. "outputs/episodes": also stream every episode to <RECORD_DIR>/<strategy>_<seed>
 
 def run_benchmark():
     print("--- DAY 10: THE ALPHA TEST ---")
 
     print("1. Training RL Agent with Golden Config...")
-    env = TradingEnv()
-
-    model = PPO(
-        "MlpPolicy",
-        env,
+    model = cached_policy(dict(
         learning_rate=0.00045,
         gamma=0.92,
         ent_coef=1e-5,
         batch_size=256,
         policy_kwargs={"net_arch": [64, 64]},
         verbose=0
-    )
-    model.learn(total_timesteps=20000)
+    ), total_timesteps=20000)
     print("   Training Complete.")
 
     strategies = ['BuyHold', 'Random', 'Momentum', 'RL']
-    results = {}
-    curves = {}
-
-    print("2. Running Simulations (Same Market Conditions)...")
-    for strat in strategies:
-        print(f"   Testing: {strat}...")
-        curve = run_strategy(env, strat, model)
-        curves[strat] = curve
-
-        returns = np.diff(curve) / curve[:-1]
-        if len(returns) == 0: returns = [0]
-
-        sharpe = calculate_sharpe(returns)
-        mdd = calculate_max_drawdown(curve)
-        final_return = (curve[-1] - curve[0]) / curve[0]
 
-        results[strat] = {
-            'Sharpe': sharpe,
-            'MaxDD': mdd,
-            'Return': final_return
-        }
+    print(f"2. Running Simulations ({N_SEEDS} seeds per strategy, same market seeds)...")
+    df, curves = evaluate(strategies, seeds=range(42, 42 + N_SEEDS), model=model, n_workers=N_WORKERS,
+                          record_dir=RECORD_DIR)
+    results = summarize(df)
 
-    print("\n--- PERFORMANCE REPORT ---")
-    df_res = pd.DataFrame(results).T
-    print(df_res)
+    print("\n--- PERFORMANCE REPORT (mean, 95% CI over seeds) ---")
+    print(results[['Sharpe', 'Sharpe_lo', 'Sharpe_hi', 'MaxDD', 'MaxDD_lo', 'MaxDD_hi',
+                   'Return', 'Return_lo', 'Return_hi']])
+    curves = {strat: curves[(strat, 42)] for strat in strategies} # Plot the seed-42 market
 
     plt.figure(figsize=(12, 6))
     for strat, curve in curves.items():
@@ -126,13 +47,13 @@ def run_benchmark():
     plt.grid(True, alpha=0.3)
     plt.show()
 
-    rl_sharpe = results['RL']['Sharpe']
-    bh_sharpe = results['BuyHold']['Sharpe']
+    rl_sharpe = results.loc['RL', 'Sharpe']
+    bh_sharpe = results.loc['BuyHold', 'Sharpe']
 
     print("\n--- FINAL VERDICT ---")
     if rl_sharpe > bh_sharpe and rl_sharpe > 0:
         print("SUCCESS: Alpha Detected. The agent beats the market.")
-    elif rl_sharpe > results['Random']['Sharpe']:
+    elif rl_sharpe > results.loc['Random', 'Sharpe']:
         print("MIXED: Beats Random, but loses to Buy & Hold. Needs better reward function.")
     else:
         print("FAILURE: Agent failed to learn. Underperforms random noise.")
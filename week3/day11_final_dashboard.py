@@ -2,15 +2,19 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from stable_baselines3 import PPO
 from day2 import TradingEnv
 from requirements.market_maker_agent import MarketMakerAgent
 from requirements.noise_agent import NoiseTrader
 from requirements.momentum_agent import MomentumTrader
+from recorder import EpisodeRecorder
+from model_cache import cached_policy
+
+RECORD_DIR = None # e.g. "outputs/episodes": also stream each strategy's episode to <RECORD_DIR>/<strategy>
 
 def run_simulation(env, agent_type, model=None):
     """Runs simulation and returns a DataFrame of detailed logs."""
-    obs, _ = env.reset(seed=42)
+    sim = EpisodeRecorder(env, f"{RECORD_DIR}/{agent_type}") if RECORD_DIR else env
+    obs, _ = sim.reset(seed=42)
 
     env.background_agents = []
     for i in range(20): env.background_agents.append(NoiseTrader(f"Noise_{i}", env.fv))
@@ -40,7 +44,7 @@ def run_simulation(env, agent_type, model=None):
         elif agent_type == 'Random':
             action = env.action_space.sample()
 
-        obs, reward, terminated, truncated, info = env.step(action)
+        obs, reward, terminated, truncated, info = sim.step(action)
 
         mid_price = env.last_mid_price
         wealth = env.rl_cash + (env.rl_inventory * mid_price)
@@ -55,6 +59,7 @@ def run_simulation(env, agent_type, model=None):
         })
         step += 1
 
+    if RECORD_DIR: sim.close()
     df = pd.DataFrame(logs)
     df['Step_PnL'] = df['Wealth'].diff().fillna(0)
     df['Cum_PnL'] = (df['Wealth'] - initial_wealth) / initial_wealth * 100 # % Return
@@ -66,12 +71,10 @@ def generate_dashboard():
     env = TradingEnv()
 
     print("1. Loading RL Agent...")
-    model = PPO(
-        "MlpPolicy", env,
+    model = cached_policy(dict(
         learning_rate=0.00045, gamma=0.92, ent_coef=1e-5,
         batch_size=256, policy_kwargs={"net_arch": [64, 64]}, verbose=0
-    )
-    model.learn(total_timesteps=10000)
+    ), total_timesteps=10000)
 
     print("2. Generating Data for Dashboard...")
     df_rl = run_simulation(env, 'RL', model)
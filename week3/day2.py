@@ -1,24 +1,77 @@
 import gymnasium as gym
 from gymnasium import spaces
+import math
 import numpy as np
-import random
 
 from requirements.matching_engine import MatchingEngine, Order
 from requirements.event_loop import SimulationKernel
-from requirements.noise_agent import NoiseTrader
-from requirements.market_maker_agent import MarketMakerAgent
+from requirements.noise_agent import NoiseTrader, NoiseTraderPopulation
+from requirements.market_maker_agent import MarketMakerAgent, MarketMakerPopulation
+from requirements.rewards import RewardEngine
+from requirements.features import MarketFeatures
+from requirements.rng import RngStreams, GLOBAL_RNG
+from requirements.ledger import Ledger
+from requirements.hawkes_agent import HawkesFlowAgent
+
+class SimpleFV:
+    def __init__(self, vol=0.05, rng=None):
+        self.current_value = 100.0
+        self.vol = vol
+        self.rng = rng if rng is not None else GLOBAL_RNG
+    def step(self): self.current_value += self.rng.normal(0, self.vol)
+    def advance(self, n_ticks):
+        # n_ticks Gaussian steps collapse into one draw
+        self.current_value += self.rng.normal(0, self.vol * math.sqrt(n_ticks)) # math: keep the value a Python float
+
+# observation_spec entries -> (size, low, high); 'levels' is per level (x top_k)
+OBS_FEATURES = {
+    'log_ret': (1, -np.inf, np.inf),
+    'spread': (1, 0, np.inf),
+    'imbalance': (1, 0, 1),        # resting order count imbalance
+    'inventory': (1, -1, 1),
+    'levels': (4, -np.inf, np.inf), # bid/ask distance from mid (relative) and log1p(qty) per level
+    'ofi': (1, -1, 1),             # net resting-qty flow, bids minus asks, since the last observation
+    'trade_flow': (1, -1, 1),      # aggressor buy minus sell volume since the last observation
+    'trade_count': (1, 0, np.inf)  # log1p(trades since the last observation)
+}
+L2_FEATURES = {'levels', 'ofi'} # need the engine's level cache
+BACKGROUND_MODES = ('tick', 'event')
 
 class TradingEnv(gym.Env):
     metadata = {'render_modes': ['human']}
 
     def __init__(self, config=None):
         super(TradingEnv, self).__init__()
+        config = config or {}
         
         self.max_steps = 1000        # Episode length
         self.step_size = 10.0        # Simulation seconds per RL step
+        self.dt = 1.0                # Background market tick
+        self.activation_prob = 0.2   # Chance a background agent acts per tick
+        self.n_noise = config.get('n_noise', 10) # Background agents built by reset()
+        self.n_mm = config.get('n_mm', 2)
+        # 'tick': every agent is polled every dt
+        # 'event': agents wake only at their (geometric) arrival times, idle stretches are skipped;
+        # agents waking at the same time are handled as one kernel event. On par with 'tick' at
+        # the default activation_prob, faster when agents are sparse (~1.5-2x at 0.02)
+        self.background_mode = config.get('background_mode', 'tick')
+        if self.background_mode not in BACKGROUND_MODES:
+            raise ValueError(f"Unknown background_mode {self.background_mode!r}, expected one of {BACKGROUND_MODES}")
+        self.vectorized_noise = config.get('vectorized_noise', False) # NoiseTraderPopulation instead of NoiseTraders
+        self.vectorized_mm = config.get('vectorized_mm', False)       # MarketMakerPopulation instead of MarketMakerAgents
+        # Self-exciting flow (HawkesFlowAgent) on top of the background agents, driven by its own kernel events
+        self.hawkes_agents = config.get('hawkes_agents', 0)
+        self.hawkes_params = config.get('hawkes_params', {}) # mu / alpha / beta / ... overrides
+        # Seeded per-agent streams (reset(seed) is then fully reproducible); False = global random state
+        self.use_rng_streams = config.get('rng_streams', True)
+        self.rng_streams = None
         self.max_inventory = 100     # Normalization factor
         self.trade_qty = 10          # Fixed trade size
         self.transaction_cost = 0.0001 # Cost per trade (approx spread/fees)
+        # Risk term penalized by risk_aversion: 'std' | 'downside' | 'drawdown' | 'cvar' over the last reward_window steps
+        self.reward_risk = config.get('reward_risk', 'std')
+        self.reward_window = config.get('reward_window', 50)
+        self.cvar_alpha = config.get('cvar_alpha', 0.1)
         
         # --- Action Space (Discrete) ---
         # 0 = Hold
@@ -27,12 +80,24 @@ class TradingEnv(gym.Env):
         self.action_space = spaces.Discrete(3)
 
         # --- Observation Space (Continuous) ---
-        # [Log_Return, Spread, Vol_Imbalance, Norm_Inventory]
+        # Default [Log_Return, Spread, Vol_Imbalance, Norm_Inventory]; see OBS_FEATURES
+        self.observation_spec = tuple(config.get('observation_spec', ('log_ret', 'spread', 'imbalance', 'inventory')))
+        self.top_k = config.get('top_k', 5) # book levels per side for 'levels'
+        unknown = set(self.observation_spec) - set(OBS_FEATURES)
+        if unknown: raise ValueError(f"Unknown observation features {sorted(unknown)}")
+        self.track_levels = bool(L2_FEATURES & set(self.observation_spec))
+        low, high = [], []
+        for name in self.observation_spec:
+            size, lo, hi = OBS_FEATURES[name]
+            if name == 'levels': size *= self.top_k
+            low += [lo] * size
+            high += [hi] * size
         self.observation_space = spaces.Box(
-            low=np.array([-np.inf, 0, 0, -1], dtype=np.float32), 
-            high=np.array([np.inf, np.inf, 1, 1], dtype=np.float32), 
+            low=np.array(low, dtype=np.float32), 
+            high=np.array(high, dtype=np.float32), 
             dtype=np.float32
         )
+        self._flow_mark = None
 
         self.kernel = None
         self.engine = None
@@ -44,29 +109,56 @@ class TradingEnv(gym.Env):
         self.risk_aversion = 0.01     # Penalty for volatility
         self.inventory_penalty = 0.001 # Penalty for holding large positions
         
-        self.pnl_history = []
+        self.reward_engine = RewardEngine(self.reward_risk, self.reward_window, cvar_alpha=self.cvar_alpha)
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         
         self.kernel = SimulationKernel()
-        self.engine = MatchingEngine()
+        self.engine = MatchingEngine(track_levels=self.track_levels)
+        self._flow_mark = (0, 0, 0, 0, 0)
         
         self.kernel.engine = self.engine
+        self._register_handlers()
         
         self.background_agents = []
+        self.populations = []
         
-        class SimpleFV:
-            def __init__(self): self.current_value = 100.0
-            def step(self): self.current_value += np.random.normal(0, 0.05)
-            
-        self.fv = SimpleFV()
+        if self.use_rng_streams:
+            stream_seed = seed if seed is not None else int(self.np_random.integers(2**31))
+            self.rng_streams = RngStreams(stream_seed)
+        self.fv = SimpleFV(rng=self._agent_rng('fair_value'))
+        self.features = MarketFeatures()
+        self.last_mid_price = 100.0 # MMs quote off it during warmup; not the previous episode's
+        self._fv_time = 0.0
+        self._scheduled_agents = None
+        self._scheduled_count = 0
+        self._schedule_gen = 0
+        self._wakes = {} # event mode: wake time -> agents due then, in scheduling order
         
-        for i in range(10):
-            self.background_agents.append(NoiseTrader(f"Noise_{i}", self.fv))
-        for i in range(2):
-            self.background_agents.append(MarketMakerAgent(f"MM_{i}"))
+        if self.vectorized_noise:
+            self.populations.append(NoiseTraderPopulation(self.n_noise, self.fv, rng=self._population_rng("Noise")))
+        else:
+            for i in range(self.n_noise):
+                self.background_agents.append(NoiseTrader(f"Noise_{i}", self.fv, rng=self._agent_rng(f"Noise_{i}")))
+        if self.vectorized_mm:
+            self.populations.append(MarketMakerPopulation(self.n_mm, rng=self._population_rng("MM")))
+        else:
+            for i in range(self.n_mm):
+                self.background_agents.append(MarketMakerAgent(f"MM_{i}", rng=self._agent_rng(f"MM_{i}")))
+        # Background positions; the RL agent keeps its own rl_cash / rl_inventory
+        self.ledger = Ledger(engine=self.engine)
+        for pop in self.populations: pop.bind_ledger(self.ledger)
+        self.hawkes = None
+        if self.hawkes_agents:
+            self.hawkes = HawkesFlowAgent(self.hawkes_agents, self.fv, rng=self._population_rng("Hawkes"), **self.hawkes_params)
+            self.hawkes.bind_ledger(self.ledger)
+            self.kernel.schedule(self.hawkes.next_arrival(0.0), 'hawkes_arrival')
 
+        if self.background_mode == 'tick':
+            self.kernel.schedule(self.dt, 'background_tick')
+        elif self.populations:
+            self.kernel.schedule(self.dt, 'population_tick')
         self._run_background_simulation(duration=60.0)
         
         self.rl_inventory = 0
@@ -77,7 +169,7 @@ class TradingEnv(gym.Env):
         self.last_mid_price = (best_bid + best_ask) / 2.0 if (best_bid and best_ask) else 100.0
         self.last_net_worth = self._calculate_net_worth(self.last_mid_price)
 
-        self.pnl_history = []
+        self.reward_engine.reset()
         return self._get_observation(), {}
 
     def step(self, action):
@@ -116,16 +208,12 @@ class TradingEnv(gym.Env):
         current_net_worth = self._calculate_net_worth(mid_price)
         step_pnl = current_net_worth - self.last_net_worth
         
-        self.pnl_history.append(step_pnl)
-        if len(self.pnl_history) > 50: 
-            self.pnl_history.pop(0) 
-            
-        volatility = np.std(self.pnl_history) if len(self.pnl_history) > 10 else 0.0
+        risk = self.reward_engine.update(step_pnl, current_net_worth)
         
         norm_inv = self.rl_inventory / self.max_inventory
         inventory_risk = norm_inv ** 2
         
-        penalty_val = (self.risk_aversion * volatility) + (self.inventory_penalty * inventory_risk)
+        penalty_val = (self.risk_aversion * risk) + (self.inventory_penalty * inventory_risk)
         reward = step_pnl - penalty_val
 
         self.last_net_worth = current_net_worth
@@ -149,20 +237,114 @@ class TradingEnv(gym.Env):
 
     
     def _run_background_simulation(self, duration):
-        end_time = self.kernel.time + duration
-        
-        dt = 1.0 
-        while self.kernel.time < end_time:
-            self.kernel.time += dt
-            self.fv.step()
-            
-            snapshot = {'mid_price': self.last_mid_price} 
-            for agent in self.background_agents:
-                if random.random() < 0.2: 
-                    actions = agent.get_action(snapshot)
-                    for intent in actions:
-                        o = Order(intent.side, intent.price, intent.qty, agent.id, self.kernel.time)
-                        self.engine.process(o)
+        # Agents quote off last_mid_price, which only moves between RL steps,
+        # so the shared features are refreshed once per step
+        bb, ba = self.engine.get_l1_snapshot()
+        self.features.update(self.kernel.time, self.last_mid_price, bb, ba,
+                             len(self.engine.bids), len(self.engine.asks))
+        self._sync_agents()
+        self.kernel.advance(duration)
+        # Once per step, like the features: agents and populations read positions from
+        # the ledger arrays, so fills inside a step reach the MM skew from the next one
+        self.ledger.sync(self.engine)
+
+    def _agent_rng(self, name):
+        return self.rng_streams.block(name) if self.rng_streams else None
+
+    def _population_rng(self, prefix):
+        return self.rng_streams.generator(prefix) if self.rng_streams else None
+
+    def _register_handlers(self):
+        self.kernel.register('background_tick', self._background_tick)
+        self.kernel.register('agent_wake', self._wake)
+        self.kernel.register('population_tick', self._population_tick)
+        self.kernel.register('hawkes_arrival', self._hawkes_arrival)
+
+    def __setstate__(self, state):
+        # Checkpoints carry the kernel queue but not its handler registry
+        self.__dict__.update(state)
+        if self.kernel is not None: self._register_handlers()
+
+    def _background_tick(self, payload=None):
+        self.fv.step()
+
+        snapshot = self.features
+        for agent in self.background_agents:
+            if agent.rng.random() < self.activation_prob: 
+                actions = agent.get_action(snapshot)
+                for intent in actions:
+                    o = Order(intent.side, intent.price, intent.qty, agent.id, self.kernel.time)
+                    self.engine.process(o)
+
+        self._step_populations(snapshot)
+        self.kernel.schedule(self.dt, 'background_tick')
+
+    def _population_tick(self, payload=None):
+        # Event mode: populations draw their whole tick in one vectorized call
+        self._sync_fv()
+        self._step_populations(self.features)
+        self.kernel.schedule(self.dt, 'population_tick')
+
+    def _hawkes_arrival(self, payload=None):
+        if self.background_mode == 'event': self._sync_fv()
+        hawkes, now = self.hawkes, self.kernel.time
+        hawkes.fire(self.features, self.engine, now)
+        self.kernel.schedule(hawkes.next_arrival(now) - now, 'hawkes_arrival')
+
+    def _step_populations(self, snapshot):
+        if not self.populations: return
+        engine = self.engine
+        # Fills up to the last ledger sync (previous steps) reach the inventory skew
+        # through the ledger-backed population views
+        for pop in self.populations:
+            pop.step(snapshot, engine, self.kernel.time, self.activation_prob)
+
+    def _sync_fv(self):
+        n_ticks = round((self.kernel.time - self._fv_time) / self.dt)
+        if n_ticks > 0:
+            self.fv.advance(n_ticks)
+            self._fv_time = self.kernel.time
+
+    def _sync_agents(self):
+        # Scripts swap env.background_agents after reset: give newcomers their own
+        # stream and (event mode) orphan the old wake-ups
+        agents = self.background_agents
+        if self._scheduled_agents is agents and self._scheduled_count == len(agents): return
+        self._scheduled_agents, self._scheduled_count = agents, len(agents)
+        for agent in agents:
+            if agent.ledger is not self.ledger: agent.bind_ledger(self.ledger)
+            if self.rng_streams and agent.rng is GLOBAL_RNG: agent.rng = self.rng_streams.block(agent.id)
+        if self.background_mode == 'event':
+            self._schedule_gen += 1
+            self._wakes = {}
+            for agent in agents:
+                self._schedule_wake(agent)
+
+    def _schedule_wake(self, agent):
+        # Bernoulli(p) per tick => next activation is Geometric(p) ticks away.
+        # Wakes land on the dt grid, so agents due at the same time share one kernel event.
+        delay = agent.rng.geometric(self.activation_prob) * self.dt
+        wake_time = self.kernel.time + delay
+        due = self._wakes.get(wake_time)
+        if due is None:
+            self._wakes[wake_time] = [agent]
+            self.kernel.schedule(delay, 'agent_wake', (wake_time, self._schedule_gen))
+        else:
+            due.append(agent)
+
+    def _wake(self, payload):
+        wake_time, gen = payload
+        if gen != self._schedule_gen: return
+
+        # fv advances once per wake time
+        self._sync_fv()
+        snapshot, engine, now = self.features, self.engine, self.kernel.time
+        agents = self._wakes.pop(wake_time)
+        for agent in agents:
+            for intent in agent.get_action(snapshot):
+                engine.process(Order(intent.side, intent.price, intent.qty, agent.id, now))
+        for agent in agents:
+            self._schedule_wake(agent)
             
     def _calculate_net_worth(self, price):
         return self.rl_cash + (self.rl_inventory * price)
@@ -174,22 +356,62 @@ class TradingEnv(gym.Env):
             mid = (best_bid + best_ask) / 2.0
         else:
             mid = self.last_mid_price
-            
-        log_ret = np.log(mid / self.last_mid_price) if self.last_mid_price > 0 else 0
-        
-        spread = (best_ask - best_bid) / mid if (best_bid and best_ask) else 0
-        
-        # Volume Imbalance (Simplified - using Book Depth count)
-        b_vol = len(self.engine.bids)
-        a_vol = len(self.engine.asks)
-        total_vol = b_vol + a_vol
-        imbalance = b_vol / total_vol if total_vol > 0 else 0.5
-        
-        norm_inv = self.rl_inventory / self.max_inventory
+
+        # Flow since the previous observation, from the engine's cumulative counters
+        engine = self.engine
+        if self.track_levels:
+            bids, asks = engine.bid_levels, engine.ask_levels
+            mark = (len(engine.trades), engine.buy_volume, engine.sell_volume,
+                    bids.added - bids.removed, asks.added - asks.removed)
+        else:
+            mark = (len(engine.trades), engine.buy_volume, engine.sell_volume, 0, 0)
+        n_trades, buy_vol, sell_vol, bid_flow, ask_flow = (a - b for a, b in zip(mark, self._flow_mark))
+        self._flow_mark = mark
+
+        obs = []
+        for name in self.observation_spec:
+            if name == 'log_ret':
+                obs.append(np.log(mid / self.last_mid_price) if self.last_mid_price > 0 else 0)
+            elif name == 'spread':
+                obs.append((best_ask - best_bid) / mid if (best_bid and best_ask) else 0)
+            elif name == 'imbalance':
+                # Volume Imbalance (Simplified - using Book Depth count)
+                b_vol = len(engine.bids)
+                a_vol = len(engine.asks)
+                total_vol = b_vol + a_vol
+                obs.append(b_vol / total_vol if total_vol > 0 else 0.5)
+            elif name == 'inventory':
+                obs.append(self.rl_inventory / self.max_inventory)
+            elif name == 'levels':
+                for levels, sign in ((engine.bid_levels, 1), (engine.ask_levels, -1)):
+                    top = levels.top(self.top_k)
+                    top += [(mid, 0)] * (self.top_k - len(top)) # missing levels: at mid, empty
+                    for price, qty in top: obs += [sign * (mid - price) / mid, np.log1p(qty)]
+            elif name == 'ofi':
+                gross = abs(bid_flow) + abs(ask_flow)
+                obs.append((bid_flow - ask_flow) / gross if gross else 0)
+            elif name == 'trade_flow':
+                volume = buy_vol + sell_vol
+                obs.append((buy_vol - sell_vol) / volume if volume else 0)
+            elif name == 'trade_count':
+                obs.append(np.log1p(n_trades))
         
-        obs = np.array([log_ret, spread, imbalance, norm_inv], dtype=np.float32)
+        obs = np.array(obs, dtype=np.float32)
         
         if np.isnan(obs).any():
             obs = np.nan_to_num(obs)
             
-        return obs
\ No newline at end of file
+        return obs
+
+class EnvFactory:
+    # Picklable TradingEnv constructor for subprocess vector envs: everything is plain
+    # data, so it survives spawn/forkserver. `attrs` are set on the env after
+    # construction (transaction_cost, risk_aversion, ...), as the scripts do by hand.
+    def __init__(self, config=None, attrs=None):
+        self.config = dict(config or {})
+        self.attrs = dict(attrs or {})
+
+    def __call__(self):
+        env = TradingEnv(self.config)
+        for name, value in self.attrs.items(): setattr(env, name, value)
+        return env
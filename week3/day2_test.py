@@ -1,3 +1,4 @@
+import pytest
 from day2 import TradingEnv
 import numpy as np
 
@@ -39,4 +40,79 @@ def test_environment():
         print("PASS: Environment appears stable.")
 
 if __name__ == "__main__":
-    test_environment()
\ No newline at end of file
+    test_environment()
+
+def _rollout(env, seed, steps=30):
+    obs, _ = env.reset(seed=seed)
+    trace = [obs]
+    for i in range(steps):
+        obs, reward, _, _, _ = env.step(i % 3)
+        trace += [obs, reward]
+    return trace
+
+def _pending_wakes(env):
+    # Live agent_wake events in the kernel queue -> {time: agents}
+    return {t: env._wakes[payload[0]] for t, _, hid, payload in env.kernel.events
+            if hid == 'agent_wake' and payload[1] == env._schedule_gen}
+
+def test_event_mode_shares_one_kernel_event_per_wake_time():
+    env = TradingEnv({'background_mode': 'event', 'n_noise': 30, 'n_mm': 5})
+    env.reset(seed=1)
+    for i in range(5):
+        pending = _pending_wakes(env)
+        assert len(pending) == len(env._wakes) # one live event per wake time
+        assert all(t > env.kernel.time for t in pending)
+        queued = [agent for agents in pending.values() for agent in agents]
+        assert sorted(a.id for a in queued) == sorted(a.id for a in env.background_agents)
+        env.step(i % 3)
+    assert type(env.fv.current_value) is float # numpy scalars would leak into order prices
+
+def test_event_mode_is_reproducible():
+    config = {'background_mode': 'event', 'n_noise': 12, 'n_mm': 3}
+    a, b = _rollout(TradingEnv(config), seed=7), _rollout(TradingEnv(config), seed=7)
+    assert all(np.array_equal(x, y) for x, y in zip(a, b))
+
+def test_event_mode_reschedules_swapped_agents():
+    # Scripts replace env.background_agents after reset: old wakes are orphaned
+    env = TradingEnv({'background_mode': 'event'})
+    env.reset(seed=3)
+    env.background_agents = env.background_agents[:4]
+    for i in range(5): env.step(0)
+    queued = [agent for agents in _pending_wakes(env).values() for agent in agents]
+    assert sorted(a.id for a in queued) == sorted(a.id for a in env.background_agents)
+
+def test_seeded_reset_is_reproducible():
+    # Every agent draws from its own named stream, so reset(seed) replays the episode
+    env = TradingEnv({'n_noise': 8, 'n_mm': 2, 'hawkes_agents': 3})
+    a, b, c = _rollout(env, seed=11), _rollout(env, seed=11), _rollout(env, seed=12)
+    assert all(np.array_equal(x, y) for x, y in zip(a, b))
+    assert not all(np.array_equal(x, y) for x, y in zip(a, c))
+
+def test_l2_observation_spec():
+    spec = ('log_ret', 'spread', 'imbalance', 'inventory', 'levels', 'ofi', 'trade_flow', 'trade_count')
+    env = TradingEnv({'observation_spec': spec, 'top_k': 3})
+    assert env.observation_space.shape == (4 + 4 * 3 + 3,)
+    obs, _ = env.reset(seed=2)
+    for i in range(20):
+        assert env.observation_space.contains(obs)
+        bids, asks = obs[4:10], obs[10:16]
+        # (distance from mid, log1p qty) per level: bids below mid, asks above, best first
+        assert (bids[0::2] >= 0).all() and (asks[0::2] >= 0).all()
+        assert (np.diff(bids[0::2]) >= 0).all() and (np.diff(asks[0::2]) >= 0).all()
+        obs, _, _, _, _ = env.step(i % 3)
+    top = env.engine.bid_levels.top(3)
+    assert np.allclose(obs[5:10:2], np.log1p([q for _, q in top]))
+
+def test_unknown_background_mode_is_rejected():
+    with pytest.raises(ValueError):
+        TradingEnv({'background_mode': 'events'})
+
+def test_background_positions_match_the_tape():
+    # The ledger is synced at the end of every step, so positions then equal the fills so far
+    env = TradingEnv()
+    env.reset(seed=4)
+    for i in range(10): env.step(i % 3)
+    for agent in env.background_agents:
+        bought = sum(t.qty for t in env.engine.trades if t.buyer_id == agent.id)
+        sold = sum(t.qty for t in env.engine.trades if t.seller_id == agent.id)
+        assert agent.inventory == bought - sold
@@ -1,12 +1,16 @@
 from stable_baselines3 import PPO
 from day2 import TradingEnv
+from recorder import EpisodeRecorder
 import numpy as np
 import matplotlib.pyplot as plt
 
+RECORD_DIR = None # e.g. "outputs/eval_episodes": also stream the episode to memmapped .npy chunks
+
 def evaluate_agent():
     print("--- Loading Trained Agent ---")
     env = TradingEnv()
     model = PPO.load("ppo_trading_agent")
+    if RECORD_DIR: env = EpisodeRecorder(env, RECORD_DIR)
 
     obs, _ = env.reset(seed=42)
     done = False
@@ -26,7 +30,8 @@ def evaluate_agent():
         history_net_worth.append(info['net_worth'])
         history_actions.append(action)
         history_inventory.append(info['inventory'])
-        history_price.append(env.last_mid_price)
+        history_price.append(env.unwrapped.last_mid_price)
+    env.close()
 
     # --- VISUALIZATION ---
     print("Generating Analysis Charts...")
@@ -1,9 +1,18 @@
 import gymnasium as gym
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
+from stable_baselines3.common.vec_env import VecMonitor
 from day2 import TradingEnv 
+from batch_env import BatchTradingEnv
+from surrogate_env import SurrogateTradingEnv
+from training import train_resumable
 import os
 
+BATCH_ENVS = 0 # > 0: train on that many BatchTradingEnv markets stepped as arrays
+PRETRAIN_STEPS = 0 # > 0: first pretrain this many steps on SurrogateTradingEnv, then fine-tune below
+CHECKPOINT_DIR = "checkpoints/day4" # a rerun resumes from the latest checkpoint here
+CHECKPOINT_FREQ = 10000
+
 def train_agent():
     print("--- 1. Initialize Environment ---")
     env = TradingEnv()
@@ -12,17 +21,36 @@ def train_agent():
     check_env(env)
     print("Environment passed checks.")
 
-    model = PPO(
-        "MlpPolicy",
-        env,
-        verbose=1,
-        learning_rate=0.0003,
-        batch_size=64,
-        ent_coef=0.05  # Encouraging exploration initially
-    )
+    n_steps = 2048
+    make_env = TradingEnv
+    if BATCH_ENVS:
+        make_env = lambda: VecMonitor(BatchTradingEnv(BATCH_ENVS))
+        n_steps = max(2048 // BATCH_ENVS, 16) # Keep the rollout size per update
+        print(f"Training on {BATCH_ENVS} batched markets")
+
+    def make_model(env):
+        model = PPO(
+            "MlpPolicy",
+            env,
+            n_steps=n_steps,
+            verbose=1,
+            learning_rate=0.0003,
+            batch_size=64,
+            ent_coef=0.05  # Encouraging exploration initially
+        )
+
+        if PRETRAIN_STEPS:
+            print(f"\n--- Pretraining on the surrogate market ({PRETRAIN_STEPS} Steps) ---")
+            surrogate = VecMonitor(SurrogateTradingEnv(1024))
+            pretrain = PPO("MlpPolicy", surrogate, n_steps=16, batch_size=1024, verbose=1,
+                           learning_rate=0.0003, ent_coef=0.05)
+            pretrain.learn(total_timesteps=PRETRAIN_STEPS)
+            pretrain.save("ppo_surrogate_pretrain")
+            model = PPO.load("ppo_surrogate_pretrain", env=env, n_steps=n_steps, batch_size=64) # Same spaces, new env count
+        return model
 
     print("\n--- Start Training (50k Steps) ---")
-    model.learn(total_timesteps=50000)
+    model = train_resumable(make_model, make_env, 50000, CHECKPOINT_DIR, save_freq=CHECKPOINT_FREQ)
 
     model_name = "ppo_trading_agent"
     model.save(model_name)
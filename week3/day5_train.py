@@ -2,8 +2,11 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
 from day2 import TradingEnv
+from training import train_resumable
+
+CHECKPOINT_DIR = "checkpoints/day5" # a rerun resumes from the latest checkpoint here
+CHECKPOINT_FREQ = 10000
 
 def run_sanity_check():
     print("--- DAY 5: SANITY CHECK (50k Steps) ---")
@@ -12,27 +15,30 @@ def run_sanity_check():
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, "monitor.csv")
 
-    env = TradingEnv()
-    env.transaction_cost = 0.0001
-    env.risk_aversion = 0.05      # Penalty for volatility
-    env.inventory_penalty = 0.01  # Penalty for hoarding
-
-    env = Monitor(env, filename=os.path.join(log_dir, "monitor"))
+    def make_env():
+        env = TradingEnv()
+        env.transaction_cost = 0.0001
+        env.risk_aversion = 0.05      # Penalty for volatility
+        env.inventory_penalty = 0.01  # Penalty for hoarding
+        return env
 
     model_path = "ppo_trading_agent.zip"
     if not os.path.exists(model_path):
         print("Error: ppo_trading_agent.zip not found. Run Day 4 first.")
         return
 
-    print("Loading 'Cowboy' Agent...")
-    model = PPO.load(model_path)
-    model.set_env(env)
+    def make_model(env):
+        print("Loading 'Cowboy' Agent...")
+        model = PPO.load(model_path)
+        model.set_env(env)
 
-    model.learning_rate = 0.0001
-    model.ent_coef = 0.01
+        model.learning_rate = 0.0001
+        model.ent_coef = 0.01
+        return model
 
     print("Starting 50,000 step run...")
-    model.learn(total_timesteps=50000)
+    model = train_resumable(make_model, make_env, 50000, CHECKPOINT_DIR, save_freq=CHECKPOINT_FREQ,
+                            monitor_file=os.path.join(log_dir, "monitor"))
     print("Training Complete.")
 
     model.save("ppo_trading_agent_pro")
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from stable_baselines3 import PPO
+from numpy_policy import load_policy
 from day2 import TradingEnv
 from requirements.market_maker_agent import MarketMakerAgent
 from requirements.noise_agent import NoiseTrader
@@ -19,7 +19,7 @@ def run_market_simulation():
 
     model = None
     if os.path.exists("ppo_trading_agent_pro.zip"):
-        model = PPO.load("ppo_trading_agent_pro")
+        model = load_policy("ppo_trading_agent_pro") # NumPy forward pass, no torch per step
         print("Loaded 'Pro' RL Agent.")
     else:
         print("Warning: Running without RL Agent.")
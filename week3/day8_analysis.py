@@ -56,15 +56,7 @@ def run_simulation():
             print("\nCRASHING PRICE")
             env.last_mid_price = 90.0
 
-        env.step(0)
-
-        for trade in env.engine.trades:
-            if trade.timestamp == step or step == 151:
-                for ag in trackable_agents:
-                    if ag.id == trade.seller_id:
-                        ag.inventory -= trade.qty
-                    if ag.id == trade.buyer_id:
-                        ag.inventory += trade.qty
+        env.step(0) # Fills are booked into env.ledger, which the agents read from
 
         row = {'step': step}
         for ag in trackable_agents:
@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from stable_baselines3 import PPO
+from numpy_policy import load_policy
 from day2 import TradingEnv
 from requirements.market_maker_agent import MarketMakerAgent
 from requirements.noise_agent import NoiseTrader
@@ -17,7 +17,7 @@ def run_herding_simulation():
 
     model = None
     if os.path.exists("ppo_trading_agent_pro.zip"):
-        model = PPO.load("ppo_trading_agent_pro")
+        model = load_policy("ppo_trading_agent_pro") # NumPy forward pass, no torch per step
         print("Loaded 'Pro' RL Agent.")
     else:
         print("Warning: RL Agent not found. Running passive.")
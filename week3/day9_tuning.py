@@ -1,23 +1,66 @@
+import multiprocessing as mp
 import optuna
-import gym
 import numpy as np
 import pandas as pd
+import torch
+from optuna.storages import JournalStorage
+from optuna.storages.journal import JournalFileBackend
+from optuna.study import MaxTrialsCallback
+from optuna.trial import TrialState
 from stable_baselines3 import PPO
-from stable_baselines3.common.evaluation import evaluate_policy
+from stable_baselines3.common.callbacks import EvalCallback
 from stable_baselines3.common.env_util import make_vec_env
-from day2 import TradingEnv
-from requirements.market_maker_agent import MarketMakerAgent
-from requirements.noise_agent import NoiseTrader
-
-def make_env():
-    env = TradingEnv()
-    env.reset(seed=42)
-    env.background_agents = []
-    for i in range(20):
-        env.background_agents.append(NoiseTrader(f"Noise_{i}", env.fv))
-    for i in range(5):
-        env.background_agents.append(MarketMakerAgent(f"MM_{i}"))
-    return env
+from stable_baselines3.common.evaluation import evaluate_policy
+from stable_baselines3.common.monitor import Monitor
+from day2 import EnvFactory
+from shm_vec_env import SharedMemoryVecEnv
+from evaluation import evaluate
+
+# 20 noise traders / 5 market makers, rebuilt by every reset
+make_env = EnvFactory({'n_noise': 20, 'n_mm': 5})
+N_WORKERS = 0 # > 0: train each trial on N_WORKERS envs stepped in subprocesses
+N_JOBS = 1    # Trials run concurrently in this many processes, sharing the study through the journal file
+N_TRIALS = 20
+STUDY_NAME = "day9_ppo"
+JOURNAL_FILE = "optuna_journal.log" # Local storage: an interrupted study resumes from here
+PRUNER = "median" # 'median' | 'hyperband' | None
+TOTAL_TIMESTEPS = 10000 # Training steps per trial
+EVAL_FREQ = 2000   # Intermediate evaluation (and pruning check) every EVAL_FREQ environment steps
+N_EVAL_EPISODES = 2
+
+class TrialEvalCallback(EvalCallback):
+    # Reports each intermediate evaluation to the trial and stops training once the pruner says so.
+    # Scheduled on num_timesteps (not callback calls, which count vector steps), and reported at
+    # the scheduled timestep, so steps line up across trials and with the pruners' resources.
+    def __init__(self, eval_env, trial, n_eval_episodes=N_EVAL_EPISODES, eval_freq=EVAL_FREQ):
+        super().__init__(eval_env, n_eval_episodes=n_eval_episodes, eval_freq=eval_freq, deterministic=True, verbose=0)
+        self.trial = trial
+        self.next_eval = eval_freq
+        self.is_pruned = False
+
+    def _on_step(self):
+        if self.eval_freq > 0 and self.num_timesteps >= self.next_eval:
+            step = self.next_eval
+            while self.next_eval <= self.num_timesteps: self.next_eval += self.eval_freq
+            rewards, _ = evaluate_policy(self.model, self.eval_env, n_eval_episodes=self.n_eval_episodes,
+                                         deterministic=self.deterministic)
+            self.last_mean_reward = float(np.mean(rewards))
+            self.trial.report(self.last_mean_reward, step)
+            if self.trial.should_prune():
+                self.is_pruned = True
+                return False
+        return True
+
+def make_pruner(name=PRUNER):
+    # Steps are training timesteps
+    if name == "median": return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=EVAL_FREQ)
+    if name == "hyperband": return optuna.pruners.HyperbandPruner(min_resource=EVAL_FREQ, max_resource=TOTAL_TIMESTEPS)
+    return optuna.pruners.NopPruner()
+
+def load_study():
+    storage = JournalStorage(JournalFileBackend(JOURNAL_FILE))
+    return optuna.create_study(study_name=STUDY_NAME, storage=storage, direction="maximize",
+                               pruner=make_pruner(), load_if_exists=True)
 
 def objective(trial):
  
@@ -35,7 +78,8 @@ def objective(trial):
     else:
         net_arch = [128, 128]
 
-    env = make_vec_env(make_env, n_envs=1)
+    if N_WORKERS: env = SharedMemoryVecEnv(make_env, n_envs=N_WORKERS, n_workers=N_WORKERS)
+    else: env = make_vec_env(make_env, n_envs=1)
 
     model = PPO(
         "MlpPolicy",
@@ -48,24 +92,49 @@ def objective(trial):
         verbose=0  
     )
 
+    eval_env = Monitor(make_env())
+    callback = TrialEvalCallback(eval_env, trial)
     try:
-        model.learn(total_timesteps=10000)
+        model.learn(total_timesteps=TOTAL_TIMESTEPS, callback=callback)
     except Exception as e:
         print(f"Trial failed: {e}")
         return -99999
+    finally:
+        env.close()
+        callback.eval_env.close()
+    if callback.is_pruned: raise optuna.TrialPruned()
 
-    eval_env = make_env()
-    mean_reward, std_reward = evaluate_policy(model, eval_env, n_eval_episodes=5)
+    # Final score: mean episode reward over the same 5 market seeds for every trial, batched in-process
+    df, _ = evaluate(['RL'], seeds=range(5), model=model, env_fn=make_env, n_workers=0)
 
-    return mean_reward
+    return df['Reward'].mean()
 
-def run_tuning():
-    print("--- HYPERPARAMETER TUNING (OPTUNA) ---")
+def _optimize(study, n_trials):
+    # Stops (every worker) once the study, including earlier interrupted runs, has n_trials finished trials
+    if len(study.get_trials(states=(TrialState.COMPLETE, TrialState.PRUNED))) >= n_trials: return
+    study.optimize(objective, callbacks=[MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))])
 
-    study = optuna.create_study(direction="maximize")
+def _tuning_worker(n_trials):
+    torch.set_num_threads(1) # One core per trial process
+    _optimize(load_study(), n_trials)
 
-    print("Starting optimization (20 Trials)... ")
-    study.optimize(objective, n_trials=20)
+def run_tuning(n_trials=N_TRIALS, n_jobs=N_JOBS):
+    print("--- HYPERPARAMETER TUNING (OPTUNA) ---")
+
+    study = load_study()
+    done = len(study.get_trials(states=(TrialState.COMPLETE, TrialState.PRUNED)))
+    if done: print(f"Resuming study '{STUDY_NAME}' ({done} trials already finished)")
+
+    print(f"Starting optimization ({n_trials} Trials, {n_jobs} processes)... ")
+    if n_jobs > 1:
+        # Plain (non-daemon) processes, so trials can still use SharedMemoryVecEnv workers
+        ctx = mp.get_context('spawn')
+        workers = [ctx.Process(target=_tuning_worker, args=(n_trials,)) for _ in range(n_jobs)]
+        for w in workers: w.start()
+        for w in workers: w.join()
+        study = load_study()
+    else:
+        _optimize(study, n_trials)
 
     print("\n--- TUNING COMPLETE ---")
     print(f"Best Trial: {study.best_trial.number}")
@@ -0,0 +1,44 @@
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.monitor import Monitor
+from day2 import EnvFactory
+from day9_tuning import TrialEvalCallback, make_pruner
+
+make_env = EnvFactory(attrs={'max_steps': 20})
+
+class _Trial:
+    # Records reports; prunes from the `prune_at`-th report on
+    def __init__(self, prune_at=None):
+        self.reports = []
+        self.prune_at = prune_at
+
+    def report(self, value, step):
+        self.reports.append((step, value))
+
+    def should_prune(self):
+        return self.prune_at is not None and len(self.reports) >= self.prune_at
+
+def _learn(trial, n_envs, total=256):
+    model = PPO("MlpPolicy", make_vec_env(make_env, n_envs=n_envs), n_steps=32, batch_size=32, n_epochs=1, seed=0, verbose=0)
+    callback = TrialEvalCallback(Monitor(make_env()), trial, n_eval_episodes=1, eval_freq=100)
+    model.learn(total_timesteps=total, callback=callback)
+    callback.eval_env.close()
+    return model, callback
+
+def test_evaluations_are_scheduled_on_timesteps():
+    # Same report steps however many envs a vector step covers
+    for n_envs in (1, 4):
+        trial = _Trial()
+        _, callback = _learn(trial, n_envs)
+        assert [step for step, _ in trial.reports] == [100, 200]
+        assert not callback.is_pruned
+
+def test_pruned_trial_stops_training():
+    trial = _Trial(prune_at=1)
+    model, callback = _learn(trial, 1)
+    assert callback.is_pruned and len(trial.reports) == 1
+    assert model.num_timesteps < 200
+
+def test_pruner_resources_are_timesteps():
+    assert make_pruner("median")._n_warmup_steps == 2000
+    assert make_pruner("hyperband")._max_resource == 10000
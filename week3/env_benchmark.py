@@ -0,0 +1,137 @@
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from itertools import product
+import numpy as np
+from day2 import TradingEnv
+from model_cache import code_version
+
+# Background agent counts: reset()'s default market (10 noise + 2 MM), day8 (35), day6 (60);
+# one in six is a market maker, the rest noise traders
+AGENT_COUNTS = (12, 35, 60)
+STEP_SIZES = (1.0, 10.0, 30.0) # simulation seconds per RL step
+VARIANTS = {
+    'tick': {},
+    'global_rng': {'rng_streams': False}, # reset() without per-agent seeded streams
+    'event': {'background_mode': 'event'},
+    'vectorized': {'background_mode': 'event', 'vectorized_noise': True, 'vectorized_mm': True},
+    'l2': {'observation_spec': ('log_ret', 'spread', 'imbalance', 'inventory', 'levels', 'ofi')} # engine level cache on
+}
+OUTPUT = "outputs/env_benchmark.json"
+
+def make_env(variant, n_agents, step_size, steps):
+    n_mm = max(n_agents // 6, 1)
+    env = TradingEnv(dict(VARIANTS[variant], n_noise=n_agents - n_mm, n_mm=n_mm))
+    env.step_size = step_size
+    env.max_steps = steps
+    return env
+
+def run_case(variant, n_agents, step_size, steps=1000, n_resets=5, seed=0, memory=True):
+    # Times n_resets resets, then one full episode of `steps` steps (random actions).
+    # memory: replays the episode under tracemalloc (untimed) for Python heap growth.
+    env = make_env(variant, n_agents, step_size, steps)
+    reset_ns = []
+    for i in range(n_resets):
+        t0 = time.perf_counter_ns()
+        env.reset(seed=seed + i)
+        reset_ns.append(time.perf_counter_ns() - t0)
+
+    actions = np.random.default_rng(seed).integers(0, 3, steps).tolist()
+    step_ns = np.empty(steps, dtype=np.int64)
+    t_start = time.perf_counter_ns()
+    env.reset(seed=seed)
+    n = 0
+    for action in actions:
+        t0 = time.perf_counter_ns()
+        _, _, terminated, truncated, _ = env.step(action)
+        step_ns[n] = time.perf_counter_ns() - t0
+        n += 1
+        if terminated or truncated: break
+    episode_ns = time.perf_counter_ns() - t_start
+    step_ns = step_ns[:n]
+
+    row = {
+        'variant': variant,
+        'n_agents': n_agents,
+        'step_size': step_size,
+        'steps': n,
+        'reset_ms_p50': float(np.median(reset_ns)) / 1e6,
+        'reset_ms_max': max(reset_ns) / 1e6,
+        'step_us_p50': float(np.percentile(step_ns, 50)) / 1e3,
+        'step_us_p99': float(np.percentile(step_ns, 99)) / 1e3,
+        'step_us_mean': float(step_ns.mean()) / 1e3,
+        'steps_per_s': n / (step_ns.sum() / 1e9),
+        'episode_s': episode_ns / 1e9,
+        'resting_orders': len(env.engine.bids) + len(env.engine.asks),
+        'trades': len(env.engine.trades)
+    }
+
+    if memory:
+        tracemalloc.start()
+        env.reset(seed=seed)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for action in actions[:n]:
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated: break
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        row['mem_growth_kb'] = (current - base) / 1024
+        row['mem_peak_kb'] = (peak - base) / 1024
+    return row
+
+def run_benchmark(variants=tuple(VARIANTS), agent_counts=AGENT_COUNTS, step_sizes=STEP_SIZES, steps=1000,
+                  n_resets=5, seed=0, memory=True, output=OUTPUT, verbose=True):
+    # Every (variant, agent count, step_size) case -> JSON at `output` (None: not written)
+    results = []
+    for variant, n_agents, step_size in product(variants, agent_counts, step_sizes):
+        row = run_case(variant, n_agents, step_size, steps, n_resets, seed, memory)
+        results.append(row)
+        if verbose:
+            print(f"{variant:>10} agents={n_agents:<3} step_size={step_size:<5g} "
+                  f"reset {row['reset_ms_p50']:7.2f} ms | step p50 {row['step_us_p50']:8.1f} us "
+                  f"p99 {row['step_us_p99']:8.1f} us | {row['steps_per_s']:7.0f} steps/s"
+                  + (f" | {row['mem_growth_kb']:+.0f} KB" if memory else ""))
+
+    report = {
+        'meta': {
+            'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'code_version': code_version(),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'steps': steps,
+            'n_resets': n_resets,
+            'seed': seed
+        },
+        'results': results
+    }
+    if output:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w') as f: json.dump(report, f, indent=2)
+    return report
+
+def compare(old, new, metric='step_us_p50'):
+    # Per-case new/old ratio of `metric` between two reports (dicts or JSON paths)
+    reports = []
+    for report in (old, new):
+        if isinstance(report, str):
+            with open(report) as f: report = json.load(f)
+        reports.append({(r['variant'], r['n_agents'], r['step_size']): r for r in report['results']})
+    before, after = reports
+    return {case: after[case][metric] / before[case][metric] for case in after if case in before and before[case][metric]}
+
+if __name__ == "__main__":
+    previous = None
+    if os.path.exists(OUTPUT):
+        with open(OUTPUT) as f: previous = json.load(f)
+    report = run_benchmark()
+    print(f"Results written to {OUTPUT}")
+    if previous is not None:
+        print("\nStep p50 vs. previous run (new / old):")
+        for (variant, n_agents, step_size), ratio in compare(previous, report).items():
+            print(f"{variant:>10} agents={n_agents:<3} step_size={step_size:<5g} {ratio:6.2f}x")
@@ -0,0 +1,40 @@
+import json
+import os
+import time
+import pytest
+from env_benchmark import VARIANTS, compare, make_env, run_benchmark, run_case
+
+def test_cases_run_every_variant():
+    for variant in VARIANTS:
+        row = run_case(variant, 12, 1.0, steps=15, n_resets=1)
+        assert row['variant'] == variant and row['steps'] == 15 # max_steps stops the episode exactly
+        assert 0 < row['step_us_p50'] <= row['step_us_p99'] and row['steps_per_s'] > 0
+        assert 'mem_growth_kb' in row and row['trades'] > 0
+
+def test_report_round_trips_and_compares(tmp_path):
+    output = os.path.join(tmp_path, "out", "bench.json")
+    report = run_benchmark(('tick',), (12,), (1.0, 10.0), steps=5, n_resets=1, memory=False, output=output, verbose=False)
+    with open(output) as f: saved = json.load(f)
+    assert saved == json.loads(json.dumps(report))
+    assert len(saved['meta']['code_version']) == 64
+    assert [(r['variant'], r['n_agents'], r['step_size']) for r in saved['results']] == [('tick', 12, 1.0), ('tick', 12, 10.0)]
+
+    faster = json.loads(json.dumps(report))
+    for row in faster['results']: row['step_us_p50'] /= 2
+    ratios = compare(output, faster)
+    assert list(ratios) == [('tick', 12, 1.0), ('tick', 12, 10.0)]
+    assert all(r == pytest.approx(0.5) for r in ratios.values())
+
+def test_seeded_streams_keep_reset_cheap():
+    # Per-agent streams are built lazily with small first blocks; eager 1024-draw
+    # blocks made the default reset ~1.5x slower than the global-state one (building
+    # the ~13 seeded generators still costs ~1.2x). Interleaved rounds, best of each,
+    # to stay clear of machine noise.
+    envs = {variant: make_env(variant, 12, 1.0, 5) for variant in ('tick', 'global_rng')}
+    best = dict.fromkeys(envs, float('inf'))
+    for _ in range(10):
+        for variant, env in envs.items():
+            t0 = time.perf_counter()
+            for seed in range(10): env.reset(seed=seed)
+            best[variant] = min(best[variant], time.perf_counter() - t0)
+    assert best['tick'] < 1.4 * best['global_rng']
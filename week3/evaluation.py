@@ -0,0 +1,140 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from day2 import EnvFactory
+from numpy_policy import NumpyPolicy
+from recorder import EpisodeRecorder
+
+STRATEGIES = ('BuyHold', 'Random', 'Momentum', 'RL')
+# day10's market: 20 noise traders / 5 market makers
+DEFAULT_ENV = EnvFactory({'n_noise': 20, 'n_mm': 5})
+
+def sharpe_ratio(wealth):
+    returns = np.diff(wealth) / wealth[:-1]
+    if len(returns) == 0 or np.std(returns) == 0: return 0.0
+    return float(np.mean(returns) / np.std(returns) * np.sqrt(252))
+
+def max_drawdown(wealth):
+    peak = np.maximum.accumulate(wealth)
+    return float(-np.max((peak - wealth) / peak))
+
+def _actions(strategy, step, envs, obs, state, model, rngs):
+    # One action per env for this step; `state` carries per-strategy memory across steps
+    n = len(envs)
+    if strategy == 'RL':
+        action, _ = model.predict(np.stack(obs), deterministic=True) # whole batch in one forward pass
+        return action
+    if strategy == 'Random': return np.array([rng.integers(0, 3) for rng in rngs]) # each episode's own stream
+    if strategy == 'BuyHold': return np.full(n, 1 if step == 0 else 0)
+    if strategy == 'Momentum':
+        # 5-step return of the mid
+        state.append([env.last_mid_price for env in envs])
+        action = np.zeros(n, dtype=np.int64)
+        if len(state) > 5:
+            price, past = np.array(state[-1]), np.array(state[-5])
+            ret = (price - past) / past
+            action[ret > 0.001] = 1
+            action[ret < -0.001] = 2
+        return action
+    raise ValueError(f"Unknown strategy {strategy!r}")
+
+def run_episodes(strategy, seeds, model=None, env_fn=DEFAULT_ENV, max_steps=None, record_dir=None):
+    # One episode per seed, stepped in lock-step so RL inference is batched over seeds.
+    # max_steps: episode length (the env's truncation), None = the env's own max_steps.
+    # record_dir: also stream each episode to <record_dir>/<strategy>_<seed> (EpisodeRecorder).
+    # -> list of (seed, wealth curve, total reward)
+    seeds = list(seeds)
+    sims = [env_fn() for _ in seeds]
+    if max_steps is not None:
+        for sim in sims: sim.unwrapped.max_steps = max_steps
+    if record_dir: sims = [EpisodeRecorder(sim, f"{record_dir}/{strategy}_{seed}") for sim, seed in zip(sims, seeds)]
+    envs = [sim.unwrapped for sim in sims]
+    obs = [sim.reset(seed=seed)[0] for sim, seed in zip(sims, seeds)]
+    rngs = [np.random.default_rng(seed) for seed in seeds] # Random: same actions for a seed whatever its block
+    live = list(range(len(envs)))
+    wealth = [[] for _ in envs]
+    rewards = np.zeros(len(envs))
+    state = []
+    step = 0
+    while live:
+        actions = _actions(strategy, step, [envs[i] for i in live], [obs[i] for i in live], state, model,
+                           [rngs[i] for i in live])
+        still = []
+        for i, action in zip(live, np.asarray(actions).tolist()):
+            env = envs[i]
+            obs[i], reward, terminated, truncated, _ = sims[i].step(action)
+            rewards[i] += reward
+            wealth[i].append(env.rl_cash + env.rl_inventory * env.last_mid_price)
+            if not (terminated or truncated): still.append(i)
+        if strategy == 'Momentum' and len(still) < len(live):
+            keep = [live.index(i) for i in still]
+            state[:] = [[row[k] for k in keep] for row in state]
+        live = still
+        step += 1
+    for sim in sims: sim.close()
+    return [(seed, np.array(w), float(r)) for seed, w, r in zip(seeds, wealth, rewards)]
+
+def _job(strategy, seeds, model, env_fn, max_steps, record_dir):
+    # model: a NumpyPolicy, or the path of an SB3 model
+    if strategy == 'RL' and isinstance(model, str):
+        import torch
+        from stable_baselines3 import PPO
+        torch.set_num_threads(1)
+        model = PPO.load(model, device='cpu')
+    return strategy, run_episodes(strategy, seeds, model, env_fn, max_steps, record_dir)
+
+def evaluate(strategies=STRATEGIES, seeds=range(100), model=None, model_path=None, env_fn=DEFAULT_ENV,
+             n_workers=None, batch_size=10, max_steps=None, record_dir=None):
+    # Fans (strategy, block of batch_size seeds) jobs out over n_workers processes
+    # (n_workers=0: in this process, `model` used directly). A NumpyPolicy `model` is
+    # sent to the workers as is; otherwise they load the SB3 policy from model_path,
+    # and a `model` without a path is saved to a temp file first.
+    # -> (DataFrame with one row per strategy and seed, {(strategy, seed): wealth curve})
+    seeds = list(seeds)
+    blocks = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+    results = []
+    if n_workers == 0:
+        for strategy in strategies:
+            for block in blocks: results.append((strategy, run_episodes(strategy, block, model, env_fn, max_steps, record_dir)))
+    else:
+        tmp, policy = None, model_path
+        if isinstance(model, NumpyPolicy): policy = model
+        elif 'RL' in strategies and model_path is None:
+            tmp = tempfile.mkdtemp()
+            policy = os.path.join(tmp, "eval_policy")
+            model.save(policy)
+        ctx = mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn')
+        with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count(), mp_context=ctx) as pool:
+            futures = [pool.submit(_job, strategy, block, policy, env_fn, max_steps, record_dir)
+                       for strategy in strategies for block in blocks]
+            results = [f.result() for f in futures]
+        if tmp:
+            os.remove(policy + ".zip")
+            os.rmdir(tmp)
+
+    rows, curves = [], {}
+    for strategy, episodes in results:
+        for seed, wealth, reward in episodes:
+            curves[(strategy, seed)] = wealth
+            rows.append({'Strategy': strategy, 'Seed': seed, 'Sharpe': sharpe_ratio(wealth),
+                         'MaxDD': max_drawdown(wealth), 'Return': (wealth[-1] - wealth[0]) / wealth[0],
+                         'Reward': reward})
+    return pd.DataFrame(rows), curves
+
+def summarize(df, metrics=('Sharpe', 'MaxDD', 'Return', 'Reward'), confidence=0.95, n_boot=2000, seed=0):
+    # Mean per strategy with a percentile-bootstrap confidence interval over seeds
+    rng = np.random.default_rng(seed)
+    lo, hi = (1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100
+    rows = {}
+    for strategy, group in df.groupby('Strategy', sort=False):
+        row = {'Seeds': len(group)}
+        for metric in metrics:
+            values = group[metric].to_numpy()
+            boot = values[rng.integers(0, len(values), (n_boot, len(values)))].mean(axis=1)
+            row[metric] = values.mean()
+            row[f'{metric}_lo'], row[f'{metric}_hi'] = np.percentile(boot, [lo, hi])
+        rows[strategy] = row
+    return pd.DataFrame(rows).T
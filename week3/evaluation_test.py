@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from day2 import EnvFactory
+from evaluation import evaluate, summarize, sharpe_ratio, max_drawdown
+from numpy_policy import NumpyPolicy
+
+ENV = EnvFactory()
+
+def _policy():
+    rng = np.random.default_rng(0)
+    return NumpyPolicy([rng.normal(0, 1, (4, 8)).astype(np.float32), rng.normal(0, 1, (8, 3)).astype(np.float32)],
+                       [np.zeros(8, np.float32), np.zeros(3, np.float32)])
+
+def test_results_do_not_depend_on_the_batching():
+    kwargs = dict(strategies=('Random', 'Momentum', 'RL'), seeds=range(4), model=_policy(), env_fn=ENV, n_workers=0, max_steps=12)
+    one, curves_one = evaluate(batch_size=1, **kwargs)
+    all_, curves_all = evaluate(batch_size=4, **kwargs)
+    pd.testing.assert_frame_equal(one, all_)
+    assert curves_one.keys() == curves_all.keys()
+    for key, wealth in curves_one.items():
+        assert len(wealth) == 12 # max_steps reaches the env
+        assert np.array_equal(wealth, curves_all[key])
+
+def test_metrics():
+    wealth = np.array([100.0, 110.0, 99.0, 120.0])
+    returns = np.diff(wealth) / wealth[:-1]
+    assert sharpe_ratio(wealth) == pytest.approx(returns.mean() / returns.std() * np.sqrt(252))
+    assert max_drawdown(wealth) == pytest.approx(-0.1)
+    assert sharpe_ratio(np.full(5, 100.0)) == 0.0
+
+def test_summary_intervals_bracket_the_mean():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'Strategy': ['A'] * 50 + ['B'] * 50, 'Sharpe': rng.normal(0, 1, 100), 'MaxDD': rng.normal(0, 1, 100),
+                       'Return': np.r_[rng.normal(0, 1, 50), np.full(50, 0.5)], 'Reward': rng.normal(0, 1, 100)})
+    summary = summarize(df)
+    assert summary.index.tolist() == ['A', 'B'] and summary['Seeds'].tolist() == [50, 50]
+    for metric in ('Sharpe', 'MaxDD', 'Return', 'Reward'):
+        assert (summary[f'{metric}_lo'] <= summary[metric]).all() and (summary[metric] <= summary[f'{metric}_hi']).all()
+    assert summary.loc['A', 'Return'] == pytest.approx(df['Return'][:50].mean())
+    assert summary.loc['B', 'Return_lo'] == summary.loc['B', 'Return_hi'] == pytest.approx(0.5) # constant: no spread
@@ -0,0 +1,111 @@
+import pickle
+import pytest
+from requirements.event_loop import SimulationKernel, KernelStats
+
+def _recording_kernel(stats=None):
+    # Kernel whose 'a' / 'b' handlers log (handler, time, payload)
+    kernel = SimulationKernel(stats=stats)
+    log = []
+    kernel.register('a', lambda payload: log.append(('a', kernel.time, payload)))
+    kernel.register('b', lambda payload: log.append(('b', kernel.time, payload)))
+    return kernel, log
+
+def _schedule_sample(kernel):
+    for i in range(5): kernel.schedule(i, 'a', i)
+    kernel.schedule(2.5, 'b')
+
+def test_stats_count_every_dispatch():
+    stats = KernelStats()
+    kernel, _ = _recording_kernel(stats)
+    _schedule_sample(kernel)
+    kernel.run(10)
+
+    assert stats.counts == {'a': 5, 'b': 1}
+    assert len(stats.queue_depth) == 6
+    assert [d for _, d in stats.queue_depth] == [5, 4, 3, 2, 1, 0]
+    # Histogram buckets are upper bounds: the top one covers the slowest dispatch
+    assert stats.percentile_ns('a', 100) >= stats.total_ns['a'] / stats.counts['a']
+    assert stats.percentile_ns('a', 50) <= stats.percentile_ns('a', 100)
+    assert stats.report().splitlines()[0].startswith('category')
+
+def test_instrumented_kernel_dispatches_the_same_events():
+    plain, plain_log = _recording_kernel()
+    timed, timed_log = _recording_kernel(KernelStats())
+    for kernel in (plain, timed):
+        _schedule_sample(kernel)
+        kernel.run(3)
+    assert plain_log == timed_log
+    assert [event[0] for event in plain_log] == ['a', 'a', 'a', 'b', 'a']
+
+def test_events_run_in_time_then_scheduling_order():
+    kernel, log = _recording_kernel()
+    kernel.schedule(2, 'a', 'late')
+    kernel.schedule(1, 'b', 'first')
+    kernel.schedule(1, 'a', 'second') # same time: FIFO
+    kernel.schedule(0, 'b', 'now')
+    kernel.run_until(5)
+    assert [payload for _, _, payload in log] == ['now', 'first', 'second', 'late']
+    assert [t for _, t, _ in log] == [0, 1, 1, 2]
+
+def test_run_until_stops_at_the_horizon_and_parks_the_clock():
+    kernel, log = _recording_kernel()
+    for t in (1.0, 2.0, 3.0, 3.5): kernel.schedule(t, 'a', t)
+    kernel.run_until(3.0)
+    assert [payload for _, _, payload in log] == [1.0, 2.0, 3.0] # inclusive horizon
+    assert kernel.time == 3.0
+    assert len(kernel.events) == 1
+
+    kernel.run_until(3.2) # nothing due: the clock still moves
+    assert kernel.time == 3.2 and len(log) == 3
+    kernel.advance(1.0)
+    assert [payload for _, _, payload in log][-1] == 3.5
+    assert kernel.time == 4.2
+
+def test_run_until_dispatches_events_scheduled_inside_the_horizon():
+    kernel = SimulationKernel()
+    ticks = []
+    def tick(payload):
+        ticks.append(kernel.time)
+        kernel.schedule(1.0, 'tick')
+    kernel.register('tick', tick)
+    kernel.schedule(1.0, 'tick')
+    kernel.run_until(4.0)
+    assert ticks == [1.0, 2.0, 3.0, 4.0]
+    kernel.advance(2.0)
+    assert ticks[-2:] == [5.0, 6.0]
+
+def test_unregistered_handler_is_rejected():
+    kernel = SimulationKernel()
+    with pytest.raises(KeyError):
+        kernel.schedule(1, 'missing')
+
+def test_pickled_kernel_resumes_the_same_schedule():
+    # The queue holds (time, seq, handler_id, payload) records; handlers are re-registered after loading
+    kernel, log = _recording_kernel()
+    _schedule_sample(kernel)
+    kernel.run_until(1.5)
+    restored = pickle.loads(pickle.dumps(kernel))
+    assert restored.handlers == {}
+    restored_log = []
+    for hid in ('a', 'b'):
+        restored.register(hid, lambda payload, hid=hid: restored_log.append((hid, restored.time, payload)))
+
+    kernel.run_until(10)
+    restored.run_until(10)
+    assert restored_log == log[2:]
+
+def test_nested_sections_are_reported_against_handler_time():
+    stats = KernelStats()
+    kernel = SimulationKernel(stats=stats)
+    kernel.register('step', lambda payload: stats.add('inner', 1000))
+    for t in range(3): kernel.schedule(t, 'step')
+    kernel.run_until(5)
+
+    df = stats.get_dataframe()
+    assert df['category'].tolist() == ['step', 'inner'] # handlers first
+    assert df['kind'].tolist() == ['handler', 'section']
+    assert stats.handlers == {'step'}
+    handler_ms = df['total_ms'][0]
+    assert df['pct'][0] == 100.0
+    assert df['pct'][1] == pytest.approx(100 * df['total_ms'][1] / handler_ms)
+    assert stats.report().splitlines()[2].split()[:2] == ['inner', 'section']
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from requirements.features import MarketFeatures
+
+def test_indicators_match_a_naive_history():
+    mids = (100 + np.cumsum(np.random.default_rng(1).normal(0, 0.05, 300))).tolist()
+    features = MarketFeatures()
+    first = 10 # windows are created on first request, seeded with the mid at that point
+    for t, mid in enumerate(mids):
+        features.update(t, mid, mid - 0.05, mid + 0.05, 3, 4)
+        if t < first: continue
+        for lookback in (1, 5, 20):
+            seen = mids[first:t + 1][-lookback:]
+            if len(seen) < lookback:
+                assert features.sma(lookback) is None and features.change(lookback) is None
+                continue
+            assert features.sma(lookback) == pytest.approx(np.mean(seen))
+            assert features.change(lookback) == pytest.approx(seen[-1] - seen[0])
+            assert features.ret(lookback) == pytest.approx(seen[-1] / seen[0] - 1)
+    assert features.spread == pytest.approx(0.10)
+    assert features.get('mid_price') == features['mid_price'] == mids[-1]
+
+def test_ema_matches_pandas():
+    pd = pytest.importorskip('pandas')
+    mids = (100 + np.cumsum(np.random.default_rng(2).normal(0, 0.05, 200))).tolist()
+    features = MarketFeatures()
+    features.update(0, mids[0])
+    features.ema(10)
+    values = [features.ema(10)]
+    for t, mid in enumerate(mids[1:], 1):
+        features.update(t, mid)
+        values.append(features.ema(10))
+    expected = pd.Series(mids).ewm(span=10, adjust=False).mean().to_numpy()
+    assert np.allclose(values, expected)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from requirements.hawkes_agent import HawkesFlowAgent
+from requirements.matching_engine import MatchingEngine
+
+class _FV:
+    current_value = 100.0
+
+def _hawkes(seed=0, **params):
+    return HawkesFlowAgent(5, _FV(), rng=np.random.default_rng(seed), **params)
+
+def test_intensity_matches_the_naive_kernel_sum():
+    hawkes = _hawkes(mu=0.3, alpha=0.5, beta=2.0)
+    events = [0.5, 0.7, 2.0, 2.05, 4.5]
+    for t in events: hawkes._register_event(t)
+    for t in (4.5, 5.0, 7.3, 20.0):
+        naive = 0.3 + sum(0.5 * np.exp(-2.0 * (t - ti)) for ti in events)
+        assert hawkes.intensity(t) == pytest.approx(naive)
+    assert hawkes.n_events == len(events)
+
+def test_long_run_rate_is_mu_over_one_minus_branching_ratio():
+    hawkes = _hawkes(mu=0.2, alpha=0.6, beta=1.0)
+    horizon, t = 20000.0, 0.0
+    while True:
+        t = hawkes.next_arrival(t)
+        if t > horizon: break
+        hawkes._register_event(t)
+    expected = 0.2 / (1 - 0.6 / 1.0) * horizon
+    assert abs(hawkes.n_events / expected - 1) < 0.1
+
+def test_next_arrival_is_stable_until_the_event_fires():
+    hawkes = _hawkes()
+    t = hawkes.next_arrival(0.0)
+    assert hawkes.next_arrival(t / 2) == t
+    hawkes.fire({'mid_price': 100.0}, MatchingEngine(), t)
+    assert hawkes.next_arrival(t) > t
+
+def test_step_sends_every_due_arrival_in_one_batch():
+    hawkes, engine = _hawkes(seed=3), MatchingEngine()
+    due = []
+    probe = _hawkes(seed=3)
+    t = probe.next_arrival(0.0)
+    while t <= 50.0:
+        due.append(t)
+        probe._register_event(t)
+        t = probe.next_arrival(t)
+    report = hawkes.step({'mid_price': 100.0}, engine, 50.0)
+    assert hawkes.n_events == len(due) and len(report.orders) == len(due)
+
+def test_non_stationary_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        _hawkes(alpha=1.0, beta=1.0)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from requirements.base_agent import Agent
+from requirements.ledger import Ledger, SCALAR_FILLS
+from requirements.matching_engine import MatchingEngine, Trade
+
+IDS = [f"a{i}" for i in range(6)]
+
+def _random_trades(n, seed=0):
+    # Includes 'RL', an owner the ledger does not track
+    rng = np.random.default_rng(seed)
+    owners = IDS + ['RL']
+    trades = []
+    for _ in range(n):
+        buyer, seller = rng.choice(len(owners), 2, replace=False)
+        trades.append(Trade(round(float(rng.uniform(95, 105)), 2), int(rng.integers(1, 11)), 0,
+                            owners[buyer], owners[seller]))
+    return trades
+
+def _naive_book(trades):
+    # Average-cost accounting, trade by trade -> {id: (cash, position, avg_cost, realized)}
+    book = {i: [100000.0, 0, 0.0, 0.0] for i in IDS}
+    for t in trades:
+        for owner, signed in ((t.buyer_id, t.qty), (t.seller_id, -t.qty)):
+            if owner not in book: continue
+            acct = book[owner]
+            pos, avg = acct[1], acct[2]
+            acct[0] -= signed * t.price
+            if pos == 0 or (pos > 0) == (signed > 0): # opening / adding
+                acct[2] = (abs(pos) * avg + abs(signed) * t.price) / abs(pos + signed)
+            else:
+                closed = min(abs(pos), abs(signed))
+                acct[3] += closed * (t.price - avg) * (1 if pos > 0 else -1)
+                if abs(signed) > abs(pos): acct[2] = t.price # flipped through zero
+            acct[1] = pos + signed
+            if acct[1] == 0: acct[2] = 0.0
+    return {i: tuple(v) for i, v in book.items()}
+
+def _ledger_with(trades, chunk):
+    engine = MatchingEngine()
+    ledger = Ledger(engine=engine)
+    ledger.register_block(IDS)
+    for start in range(0, len(trades), chunk):
+        engine.trades.extend(trades[start:start + chunk])
+        ledger.sync(engine)
+    return ledger
+
+def test_small_syncs_match_per_trade_average_cost():
+    trades = _random_trades(2000)
+    ledger = _ledger_with(trades, chunk=SCALAR_FILLS - 1)
+    naive = _naive_book(trades)
+    realized = ledger.realized_pnl
+    for row, agent_id in enumerate(IDS):
+        cash, pos, avg, pnl = naive[agent_id]
+        assert ledger.cash[row] == pytest.approx(cash)
+        assert ledger.inventory[row] == pos
+        assert ledger.avg_cost[row] == pytest.approx(avg)
+        assert realized[row] == pytest.approx(pnl, abs=1e-6)
+
+def test_batched_syncs_keep_cash_and_inventory_exact():
+    trades = _random_trades(2000, seed=1)
+    ledger = _ledger_with(trades, chunk=4 * SCALAR_FILLS)
+    naive = _naive_book(trades)
+    assert np.allclose(ledger.cash[:ledger.n], [naive[i][0] for i in IDS])
+    assert ledger.inventory[:ledger.n].tolist() == [naive[i][1] for i in IDS]
+    equity, unrealized = ledger.mark_to_market(100.0)
+    assert np.allclose(equity, ledger.cash[:ledger.n] + ledger.inventory[:ledger.n] * 100.0)
+    assert np.allclose(unrealized, ledger.inventory[:ledger.n] * (100.0 - ledger.avg_cost[:ledger.n]))
+
+def test_one_way_batches_match_per_trade_average_cost():
+    # Without intra-batch round trips the vectorized rule is exact for avg cost too
+    buys = [Trade(100.0 + k, 5, 0, 'a0', 'a1') for k in range(40)]
+    ledger = _ledger_with(buys, chunk=40)
+    naive = _naive_book(buys)
+    assert ledger.avg_cost[0] == pytest.approx(naive['a0'][2])
+    assert ledger.avg_cost[1] == pytest.approx(naive['a1'][2])
+
+class _Idle(Agent):
+    def get_action(self, snapshot):
+        return []
+
+def test_agents_read_positions_as_of_the_last_sync():
+    engine = MatchingEngine()
+    ledger = Ledger(engine=engine)
+    agent = _Idle('a0')
+    agent.bind_ledger(ledger)
+    engine.trades.append(Trade(101.5, 4, 0, 'a0', 'x'))
+    assert agent.inventory == 0 and ledger.cursor == 0 # reads do not book
+    assert ledger.realized_pnl[0] == 0.0 and ledger.cursor == 1 # reports do
+    assert agent.inventory == 4 and type(agent.inventory) is int
+    assert agent.cash == pytest.approx(100000 - 406.0) and type(agent.cash) is float
@@ -0,0 +1,57 @@
+import numpy as np
+from requirements.base_agent import IntentBuffer
+from requirements.ledger import Ledger
+from requirements.market_maker_agent import MarketMakerAgent, MarketMakerPopulation
+from requirements.matching_engine import MatchingEngine, Order
+
+SNAPSHOT = {'mid_price': 100.0}
+
+def test_population_quotes_match_the_agents():
+    inventory = [0, 30, -45, 7]
+    pop = MarketMakerPopulation(len(inventory))
+    pop._inventory[:] = inventory
+    idx, is_buy, price, qty = pop.get_actions(SNAPSHOT, np.arange(len(inventory)))
+
+    expected = []
+    for i, inv in enumerate(inventory):
+        agent = MarketMakerAgent(f"MM_{i}")
+        agent.inventory = inv
+        expected += [(intent.side == 'Buy', intent.price, intent.qty) for intent in agent.get_action(SNAPSHOT)]
+    assert list(zip(is_buy.tolist(), price.tolist(), qty.tolist())) == expected
+    assert idx.tolist() == [0, 0, 1, 1, 2, 2, 3, 3]
+
+def test_fills_reach_the_inventory_skew():
+    engine = MatchingEngine()
+    ledger = Ledger(engine=engine)
+    pop = MarketMakerPopulation(2, rng=np.random.default_rng(0))
+    pop.bind_ledger(ledger)
+    pop.step(SNAPSHOT, engine, 0, activation_prob=1.0)
+    engine.process(Order('Buy', None, 10, 'taker', 1)) # lifts one MM's ask
+    assert pop.inventory.tolist() == [0, 0] # not booked until the owner syncs
+    ledger.sync(engine)
+
+    assert sorted(pop.inventory.tolist()) == [-10, 0]
+    short = int(np.argmin(pop.inventory))
+    _, _, price, _ = pop.get_actions(SNAPSHOT, np.array([short]))
+    assert price.tolist() == [round(100.1 - 0.05, 2), round(100.1 + 0.05, 2)] # skewed up by 10 * 0.01
+
+def test_replace_quotes_cancels_the_previous_pair():
+    engine = MatchingEngine(track_levels=True)
+    pop = MarketMakerPopulation(1, replace_quotes=True, rng=np.random.default_rng(0))
+    for t in range(3): pop.step(SNAPSHOT, engine, t, activation_prob=1.0)
+    assert engine.bid_levels.qty == {99.95: 10}
+    assert engine.ask_levels.qty == {100.05: 10}
+    assert len(pop.live_quotes[0]) == 2
+
+def test_write_intents_matches_get_action():
+    engine = MatchingEngine()
+    buf = IntentBuffer()
+    agent = MarketMakerAgent("MM_0")
+    agent.inventory = -12
+    for snapshot in (SNAPSHOT, {'mid_price': None}):
+        expected = [(i.side == 'Buy', i.price, i.qty, "MM_0") for i in agent.get_action(snapshot)]
+        agent.write_intents(snapshot, buf)
+        assert list(zip(buf.is_buy, buf.price, buf.qty, buf.owner))[:buf.n] == expected
+        buf.flush(engine, 0)
+    assert buf.n == 0
+    assert [(o.side, o.price, o.qty) for _, _, o in engine.bids + engine.asks] == [('Buy', 100.07, 10), ('Sell', 100.17, 10)]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from requirements.matching_engine import MatchingEngine, Order
+
+def _random_batches(seed, n_batches=200):
+    # (is_buy, price, qty, owners) columns around 100; NaN price = market order
+    rng = np.random.default_rng(seed)
+    for _ in range(n_batches):
+        m = int(rng.integers(1, 20))
+        price = np.round(100 + rng.normal(0, 0.5, m), 2)
+        price[rng.random(m) < 0.3] = np.nan
+        owners = np.array([f"o{i}" for i in rng.integers(0, 5, m)], dtype=object)
+        yield rng.random(m) < 0.5, price, rng.integers(1, 11, m), owners
+
+def _trades(engine):
+    return [(t.price, t.qty, t.timestamp, t.buyer_id, t.seller_id) for t in engine.trades]
+
+def test_process_batch_matches_processing_rows_one_by_one():
+    batched, single = MatchingEngine(track_levels=True), MatchingEngine(track_levels=True)
+    for ts, (is_buy, price, qty, owners) in enumerate(_random_batches(0)):
+        report = batched.process_batch(is_buy, price, qty, owners, ts)
+        assert len(report.orders) == len(price)
+        for buy, p, q, owner in zip(is_buy, price, qty, owners):
+            single.process(Order('Buy' if buy else 'Sell', None if np.isnan(p) else float(p), int(q), owner, ts))
+
+    assert _trades(batched) == _trades(single)
+    assert batched.get_l1_snapshot() == single.get_l1_snapshot()
+    assert batched.bid_levels.qty == single.bid_levels.qty
+    assert batched.ask_levels.qty == single.ask_levels.qty
+    assert (batched.buy_volume, batched.sell_volume) == (single.buy_volume, single.sell_volume)
+
+def test_process_batch_reports_resting_orders_only():
+    engine = MatchingEngine()
+    engine.process(Order('Sell', 101.0, 5, 'maker', 0))
+    report = engine.process_batch(np.array([True, True, False]), np.array([101.0, 100.0, np.nan]),
+                                  np.array([3, 4, 2]), ['taker', 'bidder', 'seller'], 1)
+    # Row 0 fills in full, row 1 rests, row 2 (market) sells into row 1
+    assert report.orders[0] is None and report.orders[2] is None
+    assert report.orders[1].qty == 2 and report.orders[1].owner_id == 'bidder'
+    assert [(t.price, t.qty) for t in report.trades] == [(101.0, 3), (100.0, 2)]
+
+def test_process_batch_rejects_bad_rows():
+    engine = MatchingEngine()
+    with pytest.raises(ValueError):
+        engine.process_batch(np.array([True]), np.array([-1.0]), np.array([1]), ['x'], 0)
+    with pytest.raises(ValueError):
+        engine.process_batch(np.array([True]), np.array([100.0]), np.array([0]), ['x'], 0)
+
+def _naive_levels(heap, descending):
+    # Aggregate the live heap entries per price, best first
+    qty = {}
+    for _, _, order in heap:
+        if order.qty > 0: qty[order.price] = qty.get(order.price, 0) + order.qty
+    return sorted(qty.items(), reverse=descending)
+
+def test_level_cache_matches_the_heaps():
+    engine = MatchingEngine(track_levels=True)
+    rng = np.random.default_rng(1)
+    resting = []
+    for ts, (is_buy, price, qty, owners) in enumerate(_random_batches(2, 300)):
+        report = engine.process_batch(is_buy, price, qty, owners, ts)
+        resting += [o for o in report.orders if o is not None]
+        for order in [o for o in resting if rng.random() < 0.1]: engine.cancel(order) # cancelled twice is a no-op
+        for levels, heap in ((engine.bid_levels, engine.bids), (engine.ask_levels, engine.asks)):
+            naive = _naive_levels(heap, levels.descending)
+            assert levels.top(5) == naive[:5]
+            assert levels.top(1000) == naive
+            assert levels.depth == sum(q for _, q in naive) == levels.added - levels.removed
@@ -0,0 +1,78 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from importlib.metadata import version
+from day2 import EnvFactory
+from numpy_policy import NumpyPolicy, export_policy
+
+CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_cache"))
+# Sources whose changes invalidate trained models: the env and the market it simulates
+CODE_FILES = ["day2.py", "requirements/*.py"]
+
+def code_version():
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for pattern in CODE_FILES:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, 'rb') as f: digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_key(env_fn, hyperparams, total_timesteps, seed=None, algo=None):
+    # -> (key, metadata); everything that determines the trained weights goes into the hash
+    # (package versions from metadata, so a cache hit never has to import torch)
+    meta = {
+        'algo': algo.__name__ if algo is not None else 'PPO',
+        'env_config': env_fn.config,
+        'env_attrs': env_fn.attrs,
+        'hyperparams': hyperparams,
+        'total_timesteps': total_timesteps,
+        'seed': seed,
+        'code_version': code_version(),
+        'sb3_version': version('stable_baselines3'),
+        'torch_version': version('torch')
+    }
+    blob = json.dumps(meta, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode()).hexdigest()[:24], meta
+
+def cached_model(hyperparams, total_timesteps, env_fn=None, seed=None, algo=None, policy="MlpPolicy",
+                 cache_dir=CACHE_DIR, verbose=True):
+    # Trains algo(policy, env_fn(), **hyperparams) for total_timesteps, or loads the
+    # identical run from cache_dir/<key>.zip (metadata next to it in <key>.json)
+    if algo is None: from stable_baselines3 import PPO as algo
+    env_fn = env_fn if env_fn is not None else EnvFactory()
+    key, meta = cache_key(env_fn, dict(hyperparams, policy=policy), total_timesteps, seed, algo)
+    path = os.path.join(cache_dir, key)
+    env = env_fn()
+    if os.path.exists(path + ".zip"):
+        if verbose: print(f"   Model cache hit ({key}), skipping training.")
+        return algo.load(path, env=env)
+
+    if verbose: print(f"   Model cache miss ({key}), training {total_timesteps} steps...")
+    model = algo(policy, env, seed=seed, **hyperparams)
+    t0 = time.perf_counter()
+    model.learn(total_timesteps=total_timesteps)
+    meta['train_seconds'] = time.perf_counter() - t0
+    meta['created'] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.zip" # renamed into place so readers never see a partial file
+    model.save(tmp)
+    with open(path + ".json", 'w') as f: json.dump(meta, f, indent=2, default=repr)
+    os.replace(tmp, path + ".zip")
+    return model
+
+def cached_policy(hyperparams, total_timesteps, env_fn=None, seed=None, algo=None, policy="MlpPolicy",
+                  cache_dir=CACHE_DIR, verbose=True):
+    # cached_model as a NumpyPolicy (cache_dir/<key>.npz): inference only, and a
+    # cache hit does not import torch
+    env_fn = env_fn if env_fn is not None else EnvFactory()
+    key, _ = cache_key(env_fn, dict(hyperparams, policy=policy), total_timesteps, seed, algo)
+    path = os.path.join(cache_dir, key + ".npz")
+    if os.path.exists(path):
+        if verbose: print(f"   Policy cache hit ({key}), skipping training.")
+        return NumpyPolicy.load(path)
+    model = cached_model(hyperparams, total_timesteps, env_fn, seed, algo, policy, cache_dir, verbose)
+    return export_policy(model, path)
@@ -0,0 +1,37 @@
+import os
+import numpy as np
+from day2 import EnvFactory
+from model_cache import cache_key, cached_model, cached_policy
+from numpy_policy import NumpyPolicy
+
+HYPERPARAMS = {'n_steps': 32, 'batch_size': 32, 'n_epochs': 1}
+
+def test_key_covers_the_training_inputs():
+    key, meta = cache_key(EnvFactory({'n_noise': 5, 'n_mm': 1}), {'a': 1, 'b': 2}, 100, seed=0)
+    assert cache_key(EnvFactory({'n_mm': 1, 'n_noise': 5}), {'b': 2, 'a': 1}, 100, seed=0)[0] == key # order-free
+    assert meta['algo'] == 'PPO' and len(meta['code_version']) == 64
+    for changed in (cache_key(EnvFactory({'n_noise': 6, 'n_mm': 1}), {'a': 1, 'b': 2}, 100, seed=0),
+                    cache_key(EnvFactory({'n_noise': 5, 'n_mm': 1}, {'max_steps': 10}), {'a': 1, 'b': 2}, 100, seed=0),
+                    cache_key(EnvFactory({'n_noise': 5, 'n_mm': 1}), {'a': 1, 'b': 3}, 100, seed=0),
+                    cache_key(EnvFactory({'n_noise': 5, 'n_mm': 1}), {'a': 1, 'b': 2}, 200, seed=0),
+                    cache_key(EnvFactory({'n_noise': 5, 'n_mm': 1}), {'a': 1, 'b': 2}, 100, seed=1)):
+        assert changed[0] != key
+
+def test_second_call_loads_the_cached_model(tmp_path):
+    cache_dir = str(tmp_path)
+    trained = cached_model(HYPERPARAMS, 64, seed=0, cache_dir=cache_dir, verbose=False)
+    files = sorted(os.listdir(cache_dir))
+    assert len(files) == 2 and files[0].endswith('.json') and files[1].endswith('.zip')
+    saved = os.path.getmtime(os.path.join(cache_dir, files[1]))
+
+    loaded = cached_model(HYPERPARAMS, 64, seed=0, cache_dir=cache_dir, verbose=False)
+    assert os.path.getmtime(os.path.join(cache_dir, files[1])) == saved # not retrained
+    for a, b in zip(trained.policy.parameters(), loaded.policy.parameters()):
+        assert np.array_equal(a.detach().numpy(), b.detach().numpy())
+
+    policy = cached_policy(HYPERPARAMS, 64, seed=0, cache_dir=cache_dir, verbose=False)
+    assert len(os.listdir(cache_dir)) == 3 # exported next to the model, no new training run
+    again = cached_policy(HYPERPARAMS, 64, seed=0, cache_dir=cache_dir, verbose=False)
+    assert isinstance(again, NumpyPolicy)
+    for w, v in zip(policy.weights + policy.biases, again.weights + again.biases):
+        assert np.array_equal(w, v)
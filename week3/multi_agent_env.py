@@ -0,0 +1,126 @@
+import numpy as np
+from day2 import TradingEnv
+
+class MultiAgentTradingEnv(TradingEnv):
+    # K learning traders in one book, with the PettingZoo parallel API (agents,
+    # possible_agents, observation_space(agent), reset -> (obs, infos), step(actions)
+    # -> (obs, rewards, terminations, truncations, infos); pettingzoo itself is not needed).
+    # Each step the learners' market orders go through one engine.process_batch call in a
+    # random order, positions live in the background ledger, and observations and rewards
+    # are built as [K, ...] arrays from the shared per-step market features.
+    # Rewards use TradingEnv's std risk term, kept per learner as rolling sums.
+    def __init__(self, n_learners=4, config=None):
+        super().__init__(config)
+        if self.reward_risk != 'std': raise ValueError("MultiAgentTradingEnv only supports reward_risk='std'")
+        self.n_learners = n_learners
+        self.possible_agents = [f"Learner_{i}" for i in range(n_learners)]
+        self.agents = []
+        self.start_cash = 100000.0
+        # Spaces are per-agent methods in the parallel API
+        self._observation_space = self.__dict__.pop('observation_space')
+        self._action_space = self.__dict__.pop('action_space')
+        # Flat positions of the per-learner columns in the shared observation
+        self._inventory_cols, col = [], 0
+        for name in self.observation_spec:
+            if name == 'inventory': self._inventory_cols.append(col)
+            col += self.top_k * 4 if name == 'levels' else 1
+
+    def observation_space(self, agent):
+        return self._observation_space
+
+    def action_space(self, agent):
+        return self._action_space
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed, options=options)
+        self.rows = self.ledger.register_block(self.possible_agents, cash=self.start_cash)
+        self.agents = list(self.possible_agents)
+        self.alive = np.ones(self.n_learners, dtype=bool)
+        self.last_net_worths = np.full(self.n_learners, self.start_cash)
+
+        window = self.reward_window
+        self.pnl_window = np.zeros((window, self.n_learners))
+        self.pnl_sum = np.zeros(self.n_learners)
+        self.pnl_sq = np.zeros(self.n_learners)
+        self.pnl_pos = self.pnl_count = 0
+
+        obs = self._observations()
+        return {agent: obs[i] for i, agent in enumerate(self.agents)}, {agent: {} for agent in self.agents}
+
+    def _observations(self):
+        # Shared features once, then the per-learner inventory columns
+        self.rl_inventory = 0
+        shared = self._get_observation()
+        obs = np.repeat(shared[None, :], self.n_learners, axis=0)
+        inventory = self.ledger.inventory[self.rows] / self.max_inventory
+        for col in self._inventory_cols: obs[:, col] = inventory
+        return obs
+
+    def _rolling_std(self, step_pnl):
+        window = self.pnl_window
+        pos = self.pnl_pos
+        if self.pnl_count == len(window):
+            self.pnl_sum -= window[pos]
+            self.pnl_sq -= window[pos] ** 2
+        else:
+            self.pnl_count += 1
+        window[pos] = step_pnl
+        self.pnl_sum += step_pnl
+        self.pnl_sq += step_pnl ** 2
+        self.pnl_pos = (pos + 1) % len(window)
+        if self.pnl_pos == 0: # rebuild once per wrap to bound float drift
+            self.pnl_sum = window.sum(axis=0)
+            self.pnl_sq = (window ** 2).sum(axis=0)
+        if self.pnl_count <= 10: return np.zeros(self.n_learners)
+        mean = self.pnl_sum / self.pnl_count
+        return np.sqrt(np.maximum(self.pnl_sq / self.pnl_count - mean ** 2, 0.0))
+
+    def step(self, actions):
+        ledger, rows = self.ledger, self.rows
+        acting = np.array([actions.get(agent, 0) if self.alive[i] else 0
+                           for i, agent in enumerate(self.possible_agents)])
+        idx = self.np_random.permutation(np.flatnonzero(acting))
+        if len(idx):
+            ids = self.possible_agents
+            report = self.engine.process_batch(acting[idx] == 1, np.full(len(idx), np.nan),
+                                               np.full(len(idx), self.trade_qty), [ids[i] for i in idx], self.kernel.time)
+            ledger.sync(self.engine)
+            # Fees on filled notional
+            buy_idx, sell_idx, price, qty = report.index_arrays(ledger.index)
+            notional = price * qty
+            fees = np.bincount(buy_idx[buy_idx >= 0], notional[buy_idx >= 0], ledger.n)
+            fees += np.bincount(sell_idx[sell_idx >= 0], notional[sell_idx >= 0], ledger.n)
+            ledger.cash[rows] -= fees[rows] * self.transaction_cost
+
+        self._run_background_simulation(duration=self.step_size)
+
+        best_bid, best_ask = self.engine.get_l1_snapshot()
+        mid_price = self.last_mid_price if best_bid is None or best_ask is None else (best_bid + best_ask) / 2.0
+        inventory = ledger.inventory[rows]
+        net_worths = ledger.cash[rows] + inventory * mid_price
+        step_pnl = net_worths - self.last_net_worths
+        risk = self._rolling_std(step_pnl)
+        penalty = self.risk_aversion * risk + self.inventory_penalty * (inventory / self.max_inventory) ** 2
+        rewards = step_pnl - penalty
+
+        self.last_net_worths = net_worths
+        self.last_mid_price = mid_price
+        self.current_step += 1
+        obs = self._observations()
+
+        broke = self.alive & (net_worths < 0)
+        rewards[broke] -= 1000
+        truncated = self.current_step >= self.max_steps
+        out = ({}, {}, {}, {}, {})
+        for i in np.flatnonzero(self.alive).tolist():
+            agent = self.possible_agents[i]
+            out[0][agent] = obs[i]
+            out[1][agent] = float(rewards[i])
+            out[2][agent] = bool(broke[i])
+            out[3][agent] = truncated
+            out[4][agent] = {'net_worth': net_worths[i], 'step_pnl': step_pnl[i], 'penalty': penalty[i],
+                             'inventory': int(inventory[i])}
+        self.alive &= ~broke
+        if truncated: self.alive[:] = False
+        self.agents = [agent for i, agent in enumerate(self.possible_agents) if self.alive[i]]
+        return out
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from multi_agent_env import MultiAgentTradingEnv
+
+def test_learners_trade_through_the_book_and_pay_fees():
+    env = MultiAgentTradingEnv(3)
+    env.max_steps = 4
+    obs, infos = env.reset(seed=0)
+    assert list(obs) == env.possible_agents and infos == {a: {} for a in env.possible_agents}
+    assert all(env.observation_space(a).contains(o) for a, o in obs.items())
+
+    # Learner_0 buys, Learner_1 sells, Learner_2 holds
+    for step in range(4):
+        obs, rewards, terminations, truncations, infos = env.step({'Learner_0': 1, 'Learner_1': 2, 'Learner_2': 0})
+        assert set(obs) == set(rewards) == set(infos) == set(env.possible_agents)
+        assert obs['Learner_0'][3] == infos['Learner_0']['inventory'] / env.max_inventory
+    assert all(truncations.values()) and not any(terminations.values())
+    assert env.agents == []
+
+    for agent, sign in (('Learner_0', 1), ('Learner_1', -1)):
+        fills = [t for t in env.engine.trades if agent in (t.buyer_id, t.seller_id)]
+        qty = sum(t.qty for t in fills)
+        notional = sum(t.price * t.qty for t in fills)
+        assert infos[agent]['inventory'] == sign * qty == sign * 4 * env.trade_qty
+        cash = env.ledger.cash[env.ledger.index[agent]]
+        assert cash == pytest.approx(env.start_cash - sign * notional - notional * env.transaction_cost)
+    assert infos['Learner_2']['inventory'] == 0 and infos['Learner_2']['step_pnl'] == 0
+
+def test_seeded_reset_is_reproducible():
+    env = MultiAgentTradingEnv(2)
+    runs = []
+    for _ in range(2):
+        env.reset(seed=5)
+        rewards = [env.step({'Learner_0': i % 3, 'Learner_1': (i + 1) % 3})[1] for i in range(10)]
+        runs.append([r[a] for r in rewards for a in env.possible_agents])
+    assert runs[0] == runs[1]
+
+def test_only_the_std_risk_term_is_supported():
+    with pytest.raises(ValueError):
+        MultiAgentTradingEnv(2, {'reward_risk': 'cvar'})
@@ -0,0 +1,46 @@
+import numpy as np
+from requirements.base_agent import IntentBuffer
+from requirements.noise_agent import NoiseTrader, NoiseTraderPopulation
+from requirements.rng import RngStreams
+
+class _FV:
+    current_value = 100.0
+
+def _columns_from_agent(n):
+    agent = NoiseTrader("Noise_0", _FV(), rng=RngStreams(0).block("Noise_0"))
+    intents = [agent.get_action(None)[0] for _ in range(n)]
+    is_buy = np.array([i.side == 'Buy' for i in intents])
+    price = np.array([np.nan if i.price is None else i.price for i in intents])
+    return is_buy, price, np.array([i.qty for i in intents])
+
+def _columns_from_population(n):
+    pop = NoiseTraderPopulation(n, _FV(), rng=RngStreams(0).generator("Noise"))
+    _, is_buy, price, qty = pop.get_actions(None, np.arange(n))
+    return is_buy, price, qty
+
+def test_population_draws_match_the_agent_distribution():
+    n = 20000
+    for is_buy, price, qty in (_columns_from_agent(n), _columns_from_population(n)):
+        limit = ~np.isnan(price)
+        assert abs(is_buy.mean() - 0.5) < 0.02
+        assert abs(limit.mean() - 0.5) < 0.02
+        assert qty.min() == 1 and qty.max() == 10
+        assert abs(qty.mean() - 5.5) < 0.1
+        # Limit prices: fair value + N(0, 0.5), then 0.10 inside it on the order's side
+        offset = price[limit] - 100.0 + np.where(is_buy[limit], 0.10, -0.10)
+        assert abs(offset.mean()) < 0.02
+        assert abs(offset.std() - 0.5) < 0.02
+        assert np.allclose(price[limit], np.round(price[limit], 2))
+
+def test_write_intents_matches_get_action():
+    # Same RNG state -> same order, whichever interface draws it
+    objects = NoiseTrader("Noise_0", _FV(), rng=RngStreams(3).block("Noise_0"))
+    columns = NoiseTrader("Noise_0", _FV(), rng=RngStreams(3).block("Noise_0"))
+    buf = IntentBuffer(capacity=4) # grows past its capacity
+    expected = []
+    for _ in range(50):
+        intent, = objects.get_action(None)
+        expected.append((intent.side == 'Buy', intent.price, intent.qty, "Noise_0"))
+        columns.write_intents(None, buf)
+    assert buf.n == 50
+    assert list(zip(buf.is_buy, buf.price, buf.qty, buf.owner))[:buf.n] == expected
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+
+# Torch-free inference for SB3 ActorCriticPolicy (MlpPolicy) with a Box observation
+# and a Discrete action space: the policy MLP and action head as float32 arrays.
+ACTIVATIONS = {
+    'Tanh': np.tanh,
+    'ReLU': lambda x: np.maximum(x, 0),
+    'Identity': lambda x: x
+}
+
+def export_policy(model, path=None):
+    # SB3 model -> NumpyPolicy; also written to <path>.npz when path is given
+    import torch
+    from gymnasium import spaces
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+    policy = model.policy
+    if not isinstance(model.action_space, spaces.Discrete) or not isinstance(model.observation_space, spaces.Box):
+        raise ValueError("Only Box observation / Discrete action policies can be exported")
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError("Only MlpPolicy feature extractors can be exported")
+    activation = policy.activation_fn.__name__
+    if activation not in ACTIVATIONS: raise ValueError(f"Unsupported activation {activation!r}")
+
+    layers = [m for m in policy.mlp_extractor.policy_net if isinstance(m, torch.nn.Linear)] + [policy.action_net]
+    arrays = {}
+    for i, layer in enumerate(layers):
+        # stored as (in, out) so the forward pass is x @ w + b
+        arrays[f'w{i}'] = np.ascontiguousarray(layer.weight.detach().cpu().numpy().T, dtype=np.float32)
+        arrays[f'b{i}'] = np.ascontiguousarray(layer.bias.detach().cpu().numpy(), dtype=np.float32)
+    numpy_policy = NumpyPolicy([arrays[f'w{i}'] for i in range(len(layers))], [arrays[f'b{i}'] for i in range(len(layers))],
+                               activation, model.observation_space.shape)
+    if path is not None: numpy_policy.save(path)
+    return numpy_policy
+
+class NumpyPolicy:
+    # Drop-in for model.predict in rollouts: same arguments, same output shapes
+    def __init__(self, weights, biases, activation='Tanh', obs_shape=(4,), seed=None):
+        self.weights = weights
+        self.biases = biases
+        self.activation = activation
+        self.act = ACTIVATIONS[activation]
+        self.obs_shape = tuple(obs_shape)
+        self.obs_dim = int(np.prod(self.obs_shape))
+        self.rng = np.random.default_rng(seed)
+
+    def save(self, path):
+        path = path if path.endswith('.npz') else path + '.npz'
+        arrays = {f'w{i}': w for i, w in enumerate(self.weights)}
+        arrays.update({f'b{i}': b for i, b in enumerate(self.biases)})
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, activation=self.activation, obs_shape=np.array(self.obs_shape), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, seed=None):
+        path = path if path.endswith('.npz') else path + '.npz'
+        with np.load(path) as data:
+            n = sum(1 for k in data.files if k.startswith('w'))
+            return cls([data[f'w{i}'] for i in range(n)], [data[f'b{i}'] for i in range(n)],
+                       str(data['activation']), tuple(data['obs_shape']), seed)
+
+    def logits(self, obs):
+        # (n, obs_dim) float32 -> (n, n_actions)
+        x = obs
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w + b
+            if i < last: x = self.act(x)
+        return x
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        obs = np.asarray(observation, dtype=np.float32)
+        vectorized = obs.ndim > len(self.obs_shape)
+        logits = self.logits(obs.reshape(-1, self.obs_dim))
+        if not deterministic:
+            # Gumbel-max: a sample from softmax(logits) per row
+            logits = logits - np.log(-np.log(self.rng.random(logits.shape)))
+        action = logits.argmax(axis=1)
+        return (action if vectorized else action[0]), state
+
+def load_policy(name):
+    # <name>.npz if it is at least as new as <name>.zip; otherwise exports <name>.zip
+    # (the only path that imports torch) and returns the exported policy
+    npz, zip_path = name + '.npz', name + '.zip'
+    if os.path.exists(npz) and (not os.path.exists(zip_path) or os.path.getmtime(npz) >= os.path.getmtime(zip_path)):
+        return NumpyPolicy.load(npz)
+    from stable_baselines3 import PPO
+    return export_policy(PPO.load(zip_path, device='cpu'), npz)
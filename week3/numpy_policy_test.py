@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pytest
+import torch
+from stable_baselines3 import PPO
+from day2 import TradingEnv
+from numpy_policy import NumpyPolicy, export_policy, load_policy
+
+def _model(activation=torch.nn.Tanh):
+    return PPO("MlpPolicy", TradingEnv(), seed=0, device='cpu',
+               policy_kwargs={'net_arch': [32, 16], 'activation_fn': activation})
+
+def _obs(n=500):
+    return np.random.default_rng(0).normal(0, 1, (n, 4)).astype(np.float32)
+
+def _softmax(logits):
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+@pytest.mark.parametrize('activation', [torch.nn.Tanh, torch.nn.ReLU])
+def test_exported_policy_matches_sb3(activation):
+    model, obs = _model(activation), _obs()
+    policy = export_policy(model)
+    with torch.no_grad():
+        probs = model.policy.get_distribution(torch.as_tensor(obs)).distribution.probs.numpy()
+    assert np.allclose(_softmax(policy.logits(obs)), probs, atol=1e-6)
+
+    expected, _ = model.predict(obs, deterministic=True)
+    actions, _ = policy.predict(obs, deterministic=True)
+    assert np.array_equal(actions, expected)
+    single, _ = policy.predict(obs[0], deterministic=True) # unbatched in, scalar out
+    assert np.ndim(single) == 0 and single == expected[0]
+
+def test_sampled_actions_follow_the_policy_distribution():
+    logits = np.log(np.array([[0.2, 0.5, 0.3]], dtype=np.float32))
+    policy = NumpyPolicy([np.zeros((4, 3), np.float32)], [logits[0]], seed=0)
+    actions, _ = policy.predict(np.zeros((20000, 4), np.float32))
+    assert np.allclose(np.bincount(actions, minlength=3) / len(actions), [0.2, 0.5, 0.3], atol=0.01)
+
+def test_saved_policy_round_trips(tmp_path):
+    model = _model()
+    name = os.path.join(tmp_path, "agent")
+    model.save(name)
+    exported = load_policy(name) # exports agent.npz from agent.zip
+    assert os.path.exists(name + ".npz")
+    reloaded = load_policy(name) # now read straight from the .npz
+    obs = _obs()
+    assert np.array_equal(exported.logits(obs), reloaded.logits(obs))
+    assert reloaded.activation == 'Tanh' and reloaded.obs_shape == (4,)
+    assert np.array_equal(reloaded.predict(obs, deterministic=True)[0], model.predict(obs, deterministic=True)[0])
@@ -0,0 +1,172 @@
+import json
+import os
+import gymnasium as gym
+import numpy as np
+from numpy.lib.format import open_memmap
+
+INFO_FIELDS = ('net_worth', 'step_pnl', 'penalty', 'inventory') # TradingEnv.step info
+ENV_FIELDS = ('last_mid_price',)                                # read off the env after each step
+
+class EpisodeRecorder(gym.Wrapper):
+    # Streams transitions to disk for offline RL / behavior cloning. Every field goes
+    # into preallocated .npy memmaps of chunk_size rows (<field>_<chunk>.npy), so RAM
+    # stays flat however long it runs. manifest.json holds the field layout, the rows
+    # used in each chunk and the episodes (boundaries, plus the obs after the last step
+    # as final_obs); it is rewritten on every chunk rollover, episode end and close().
+    # Row t is (obs seen, action taken, reward, terminated, truncated, info/env fields
+    # after the step); the next row's obs, or final_obs, completes the transition.
+    # Reload with load_dataset.
+    def __init__(self, env, path, chunk_size=65536, info_fields=INFO_FIELDS, env_fields=ENV_FIELDS):
+        super().__init__(env)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.info_fields = tuple(info_fields)
+        self.env_fields = tuple(env_fields)
+        os.makedirs(path, exist_ok=True)
+
+        space = env.action_space
+        act_shape = () if isinstance(space, gym.spaces.Discrete) else space.shape
+        act_dtype = np.int64 if isinstance(space, gym.spaces.Discrete) else space.dtype
+        self.fields = {
+            'obs': (env.observation_space.shape, np.dtype(env.observation_space.dtype).str),
+            'action': (act_shape, np.dtype(act_dtype).str),
+            'reward': ((), np.dtype(np.float32).str),
+            'terminated': ((), np.dtype(np.bool_).str),
+            'truncated': ((), np.dtype(np.bool_).str)
+        }
+        for name in self.info_fields + self.env_fields: self.fields[name] = ((), np.dtype(np.float64).str)
+
+        self.chunks = [] # rows used per chunk
+        self.episodes = [] # {'start', 'length', 'return', 'seed', 'final_obs'} in global rows
+        self.buffers = None
+        self.row = 0 # row within the current chunk
+        self.total = 0
+        self.episode = None
+        self.last_obs = None
+
+    def _open_chunk(self):
+        k = len(self.chunks)
+        self.buffers = {name: open_memmap(os.path.join(self.path, f"{name}_{k:04d}.npy"), mode='w+',
+                                          dtype=dtype, shape=(self.chunk_size,) + tuple(shape))
+                        for name, (shape, dtype) in self.fields.items()}
+        self.chunks.append(0)
+        self.row = 0
+
+    def _flush_chunk(self):
+        for buf in self.buffers.values(): buf.flush()
+        self.buffers = None
+        self.write_manifest()
+
+    def _end_episode(self):
+        if self.episode is not None and self.episode['length'] > 0:
+            self.episode['final_obs'] = np.asarray(self.last_obs).tolist()
+            self.episodes.append(self.episode)
+        self.episode = None
+
+    def reset(self, *, seed=None, options=None):
+        # A reset mid-episode keeps the partial episode (it ends without a done flag)
+        self._end_episode()
+        obs, info = self.env.reset(seed=seed, options=options)
+        self.episode = {'start': self.total, 'length': 0, 'return': 0.0, 'seed': seed}
+        self.last_obs = obs
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        if self.buffers is None: self._open_chunk()
+        row, buf = self.row, self.buffers
+        buf['obs'][row] = self.last_obs
+        buf['action'][row] = action
+        buf['reward'][row] = reward
+        buf['terminated'][row] = terminated
+        buf['truncated'][row] = truncated
+        for name in self.info_fields: buf[name][row] = info.get(name, np.nan)
+        unwrapped = self.env.unwrapped
+        for name in self.env_fields: buf[name][row] = getattr(unwrapped, name)
+
+        self.last_obs = obs
+        self.row += 1
+        self.chunks[-1] = self.row
+        self.total += 1
+        self.episode['length'] += 1
+        self.episode['return'] += float(reward)
+        if terminated or truncated:
+            self._end_episode()
+            self.write_manifest()
+        if self.row == self.chunk_size: self._flush_chunk()
+        return obs, reward, terminated, truncated, info
+
+    def write_manifest(self):
+        manifest = {
+            'fields': {name: {'shape': list(shape), 'dtype': dtype} for name, (shape, dtype) in self.fields.items()},
+            'chunk_size': self.chunk_size,
+            'chunks': self.chunks,
+            'episodes': self.episodes
+        }
+        tmp = os.path.join(self.path, 'manifest.json.tmp')
+        with open(tmp, 'w') as f: json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.path, 'manifest.json'))
+
+    def close(self):
+        self._end_episode()
+        if self.buffers is not None: self._flush_chunk()
+        else: self.write_manifest()
+        super().close()
+
+class RecordedDataset:
+    # Read side of EpisodeRecorder. Chunks are opened as read-only memmaps and trimmed
+    # to their used rows, so chunk()/episode() views within a chunk never copy.
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json')) as f: manifest = json.load(f)
+        self.path = path
+        self.fields = {name: (spec['shape'], spec['dtype']) for name, spec in manifest['fields'].items()}
+        self.chunk_rows = manifest['chunks']
+        self.chunk_size = manifest['chunk_size']
+        self.episodes = manifest['episodes']
+        self._chunks = [None] * len(self.chunk_rows)
+
+    def __len__(self):
+        return sum(self.chunk_rows)
+
+    def chunk(self, k):
+        if self._chunks[k] is None:
+            self._chunks[k] = {name: np.load(os.path.join(self.path, f"{name}_{k:04d}.npy"), mmap_mode='r')[:self.chunk_rows[k]]
+                               for name in self.fields}
+        return self._chunks[k]
+
+    def _rows(self, name, start, stop):
+        if stop <= start:
+            shape, dtype = self.fields[name]
+            return np.empty((0,) + tuple(shape), dtype)
+        parts = []
+        for k in range(start // self.chunk_size, (stop - 1) // self.chunk_size + 1):
+            base = k * self.chunk_size
+            parts.append(self.chunk(k)[name][max(start - base, 0):stop - base])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _next_obs(self, start, stop):
+        # obs one row on, with each episode's final_obs on its last row (zeros past the
+        # last recorded episode)
+        shape, dtype = self.fields['obs']
+        out = np.zeros((max(stop - start, 0),) + tuple(shape), dtype)
+        out[:-1] = self._rows('obs', start + 1, stop)
+        for ep in self.episodes:
+            last = ep['start'] + ep['length'] - 1
+            if start <= last < stop: out[last - start] = ep['final_obs']
+        return out
+
+    def __getitem__(self, name):
+        # Whole column; zero-copy for a single chunk, concatenated otherwise. 'next_obs'
+        # is built from obs and the episodes' final_obs
+        if name == 'next_obs': return self._next_obs(0, len(self))
+        return self._rows(name, 0, len(self))
+
+    def episode(self, i):
+        ep = self.episodes[i]
+        start, stop = ep['start'], ep['start'] + ep['length']
+        data = {name: self._rows(name, start, stop) for name in self.fields}
+        data['next_obs'] = self._next_obs(start, stop)
+        return data
+
+def load_dataset(path):
+    return RecordedDataset(path)
@@ -0,0 +1,57 @@
+import numpy as np
+from day2 import TradingEnv
+from recorder import EpisodeRecorder, load_dataset
+
+def test_round_trip_across_chunks(tmp_path):
+    env = TradingEnv()
+    env.max_steps = 10
+    rec = EpisodeRecorder(env, str(tmp_path), chunk_size=7) # episodes straddle chunk files
+    actions = np.random.default_rng(0).integers(0, 3, 40)
+    seen = {'obs': [], 'action': [], 'reward': [], 'net_worth': [], 'last_mid_price': []}
+    ends = []
+    obs, _ = rec.reset(seed=1)
+    for t, action in enumerate(actions.tolist()):
+        seen['obs'].append(obs)
+        seen['action'].append(action)
+        obs, reward, terminated, truncated, info = rec.step(action)
+        seen['reward'].append(reward)
+        seen['net_worth'].append(info['net_worth'])
+        seen['last_mid_price'].append(env.last_mid_price)
+        if terminated or truncated:
+            ends.append(t)
+            obs, _ = rec.reset(seed=2 + len(ends))
+    rec.close()
+
+    data = load_dataset(str(tmp_path))
+    assert len(data) == 40 and data.chunk_rows == [7] * 5 + [5]
+    for name, values in seen.items():
+        assert np.allclose(data[name], np.array(values, dtype=data[name].dtype)), name
+    assert np.flatnonzero(data['truncated'] | data['terminated']).tolist() == ends
+
+    # Three full episodes, then the partial one kept by close()
+    assert [(ep['start'], ep['length'], ep['seed']) for ep in data.episodes] == [(0, 10, 1), (10, 10, 3), (20, 10, 4), (30, 10, 5)]
+    second = data.episode(1)
+    assert np.array_equal(second['action'], actions[10:20])
+    assert np.isclose(data.episodes[1]['return'], second['reward'].sum(), rtol=1e-5)
+
+def test_next_obs_keeps_the_final_observation(tmp_path):
+    env = TradingEnv()
+    env.max_steps = 5
+    rec = EpisodeRecorder(env, str(tmp_path), chunk_size=4)
+    next_obs, finals, ends = [], [], []
+    for seed, steps in ((1, 5), (2, 3)): # truncated by max_steps, then cut short by close()
+        rec.reset(seed=seed)
+        for _ in range(steps):
+            obs, _, terminated, truncated, _ = rec.step(1)
+            next_obs.append(obs)
+        finals.append(obs)
+        ends.append(truncated)
+    rec.close()
+    assert ends == [True, False]
+
+    data = load_dataset(str(tmp_path))
+    assert np.array_equal(data['next_obs'], np.array(next_obs))
+    assert not np.array_equal(data['next_obs'][4], data['obs'][5]) # not the next episode's reset obs
+    for i, final in enumerate(finals):
+        assert np.array_equal(data.episode(i)['next_obs'][-1], final)
+        assert np.allclose(data.episodes[i]['final_obs'], final)
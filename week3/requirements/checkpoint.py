@@ -0,0 +1,37 @@
+import itertools
+import pickle
+import random
+import numpy as np
+from .matching_engine import Order
+
+# A checkpoint is the simulation object graph (kernel, engine, agents, recorders)
+# plus everything that lives outside it: global RNG states and the order-id counter.
+# Objects owning a kernel re-register their handlers in __setstate__.
+
+def _next_order_id():
+    next_id = next(Order._id_counter)
+    Order._id_counter = itertools.count(next_id)
+    return next_id
+
+def capture_globals():
+    return {
+        'random': random.getstate(),
+        'np_random': np.random.get_state(),
+        'next_order_id': _next_order_id()
+    }
+
+def restore_globals(state):
+    random.setstate(state['random'])
+    np.random.set_state(state['np_random'])
+    Order._id_counter = itertools.count(state['next_order_id'])
+
+def save_checkpoint(path, sim):
+    state = dict(capture_globals(), sim=sim)
+    with open(path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    restore_globals(state)
+    return state['sim']
@@ -1,23 +1,145 @@
 import heapq
+from time import perf_counter_ns
 
-class SimulationKernel:
+class KernelStats:
+    # Dispatch counts, wall time and log2(ns) duration histograms per category,
+    # plus a (time, queue depth) series sampled at every dispatch.
+    # Handler categories (add_dispatch, timed by the kernel) are inclusive; sections
+    # timed with add() inside a handler are already counted in it, so percentages are
+    # of the total handler time and the two kinds are never summed together.
     def __init__(self):
+        self.counts = {}
+        self.total_ns = {}
+        self.histograms = {}
+        self.queue_depth = []
+        self.handlers = set()
+
+    def add(self, category, elapsed_ns):
+        self.counts[category] = self.counts.get(category, 0) + 1
+        self.total_ns[category] = self.total_ns.get(category, 0) + elapsed_ns
+        hist = self.histograms.setdefault(category, {})
+        bucket = elapsed_ns.bit_length() # elapsed < 2**bucket ns
+        hist[bucket] = hist.get(bucket, 0) + 1
+
+    def add_dispatch(self, handler_id, elapsed_ns):
+        self.handlers.add(handler_id)
+        self.add(handler_id, elapsed_ns)
+
+    def _rows(self):
+        # (category, kind, count, total_ns, pct of handler time); handlers first
+        handler_ns = sum(self.total_ns[h] for h in self.handlers) or sum(self.total_ns.values()) or 1
+        cats = sorted(self.total_ns, key=lambda c: (c not in self.handlers, -self.total_ns[c]))
+        return [(c, 'handler' if c in self.handlers else 'section', self.counts[c], self.total_ns[c],
+                 100.0 * self.total_ns[c] / handler_ns) for c in cats]
+
+    def percentile_ns(self, category, q):
+        hist = self.histograms.get(category)
+        if not hist: return 0
+        target = q / 100.0 * self.counts[category]
+        seen = 0
+        for bucket in sorted(hist):
+            seen += hist[bucket]
+            if seen >= target: return 2 ** bucket
+        return 2 ** max(hist)
+
+    def get_dataframe(self):
+        import pandas as pd
+        rows = []
+        for cat, kind, n, total, pct in self._rows():
+            rows.append({
+                'category': cat,
+                'kind': kind,
+                'count': n,
+                'total_ms': total / 1e6,
+                'pct': pct,
+                'mean_us': total / n / 1e3,
+                'p50_us': self.percentile_ns(cat, 50) / 1e3,
+                'p99_us': self.percentile_ns(cat, 99) / 1e3
+            })
+        return pd.DataFrame(rows)
+
+    def report(self):
+        # pct: share of the total handler time; sections are nested inside handlers
+        lines = [f"{'category':<16}{'kind':>8}{'count':>10}{'total_ms':>12}{'pct':>8}{'mean_us':>10}{'p50_us':>10}{'p99_us':>10}"]
+        for cat, kind, n, total, pct in self._rows():
+            lines.append(f"{cat:<16}{kind:>8}{n:>10}{total / 1e6:>12.2f}{pct:>7.1f}%{total / n / 1e3:>10.2f}"
+                         f"{self.percentile_ns(cat, 50) / 1e3:>10.2f}{self.percentile_ns(cat, 99) / 1e3:>10.2f}")
+        if self.queue_depth:
+            depths = [d for _, d in self.queue_depth]
+            lines.append(f"queue depth: max={max(depths)} mean={sum(depths) / len(depths):.2f} samples={len(depths)}")
+        return "\n".join(lines)
+
+class SimulationKernel:
+    # Events are plain (handler_id, payload) records dispatched through a registry,
+    # so the queue pickles; handlers are re-registered by the owner after a restore.
+    def __init__(self, stats=None):
         self.time = 0.0
-        self.events = [] # Heap: (timestamp, sequence, function)
+        self.events = [] # Heap: (timestamp, sequence, handler_id, payload)
         self.seq = 0
+        self.stats = stats # KernelStats or None (no instrumentation)
+        self.handlers = {}
+
+    def register(self, handler_id, func):
+        self.handlers[handler_id] = func
 
-    def schedule(self, delay, func):
+    def schedule(self, delay, handler_id, payload=None):
+        if handler_id not in self.handlers: raise KeyError(f"Unregistered handler: {handler_id}")
         timestamp = self.time + delay
-        heapq.heappush(self.events, (timestamp, self.seq, func))
+        heapq.heappush(self.events, (timestamp, self.seq, handler_id, payload))
         self.seq += 1
 
     def run(self, duration):
+        if self.stats is not None: return self._run_instrumented(duration)
+
+        handlers = self.handlers
+        while self.events:
+            t, _, hid, payload = heapq.heappop(self.events)
+
+            if t < self.time: raise RuntimeError("Time Travel detected!")
+
+            self.time = t
+            if self.time > duration: break
+
+            handlers[hid](payload)
+
+    def run_until(self, horizon):
+        # Dispatch every event due at or before `horizon`, then park the clock there.
+        events, stats, handlers = self.events, self.stats, self.handlers
+        while events and events[0][0] <= horizon:
+            t, _, hid, payload = heapq.heappop(events)
+
+            if t < self.time: raise RuntimeError("Time Travel detected!")
+
+            self.time = t
+            if stats is None:
+                handlers[hid](payload)
+            else:
+                stats.queue_depth.append((t, len(events)))
+                t0 = perf_counter_ns()
+                handlers[hid](payload)
+                stats.add_dispatch(hid, perf_counter_ns() - t0)
+
+        if horizon > self.time: self.time = horizon
+
+    def advance(self, duration):
+        self.run_until(self.time + duration)
+
+    def _run_instrumented(self, duration):
+        stats, handlers = self.stats, self.handlers
         while self.events:
-            t, _, func = heapq.heappop(self.events)
-            
+            t, _, hid, payload = heapq.heappop(self.events)
+
             if t < self.time: raise RuntimeError("Time Travel detected!")
-            
+
             self.time = t
             if self.time > duration: break
-            
-            func()
\ No newline at end of file
+
+            stats.queue_depth.append((t, len(self.events)))
+            t0 = perf_counter_ns()
+            handlers[hid](payload)
+            stats.add_dispatch(hid, perf_counter_ns() - t0)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['handlers'] = {}
+        return state
\ No newline at end of file
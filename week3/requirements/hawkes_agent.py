@@ -0,0 +1,79 @@
+import numpy as np
+from .base_agent import Population
+
+class HawkesFlowAgent(Population):
+    # Population whose pooled order arrivals follow a Hawkes process with an
+    # exponential kernel:  lambda(t) = mu + sum_i alpha * exp(-beta * (t - t_i)).
+    # The sum is carried as one decayed excitation term, so evaluating the intensity
+    # and registering an event are O(1). Arrivals are drawn by Ogata thinning and
+    # each one is an order from a uniformly chosen member (NoiseTrader-style marks).
+    def __init__(self, n, fair_value_model, prefix="Hawkes", mu=0.2, alpha=0.6, beta=1.0,
+                 noise_std=0.5, spread=0.20, max_qty=10, market_prob=0.5, rng=None):
+        if alpha >= beta: raise ValueError("alpha / beta must be < 1 for a stationary process")
+        super().__init__(n, prefix, rng)
+        self.fv = fair_value_model
+        self.mu, self.alpha, self.beta = mu, alpha, beta
+        self.noise_std = noise_std
+        self.spread = spread
+        self.max_qty = max_qty
+        self.market_prob = market_prob
+        self.excitation = 0.0 # sum_i alpha * exp(-beta * (t_ref - t_i))
+        self.t_ref = 0.0
+        self.next_time = None # Next accepted arrival, drawn lazily
+        self.n_events = 0
+
+    def intensity(self, t):
+        return self.mu + self.excitation * np.exp(-self.beta * (t - self.t_ref))
+
+    def _decay_to(self, t):
+        self.excitation *= np.exp(-self.beta * (t - self.t_ref))
+        self.t_ref = t
+
+    def next_arrival(self, t):
+        # Ogata thinning: between events the intensity only decays, so lambda(t) bounds it
+        if self.next_time is not None and self.next_time >= t: return self.next_time
+        rng = self.rng
+        self._decay_to(max(t, self.t_ref))
+        while True:
+            bound = self.mu + self.excitation
+            t = self.t_ref + rng.exponential(1.0 / bound)
+            self._decay_to(t)
+            if rng.random() * bound <= self.mu + self.excitation: break
+        self.next_time = t
+        return t
+
+    def _register_event(self, t):
+        self._decay_to(t)
+        self.excitation += self.alpha
+        self.n_events += 1
+        self.next_time = None
+
+    def fire(self, snapshot, engine, timestamp):
+        # One arrival at `timestamp` (the time returned by next_arrival)
+        self._register_event(timestamp)
+        active = self.rng.integers(0, self.n, 1)
+        idx, is_buy, price, qty = self.get_actions(snapshot, active)
+        return engine.process_batch(is_buy, price, qty, self.ids[idx], timestamp)
+
+    def step(self, snapshot, engine, timestamp, activation_prob=None):
+        # Tick-driven use: every arrival due by `timestamp` goes out in one batch, stamped
+        # with the tick time (activation_prob is unused; the intensity sets the rate)
+        k = 0
+        while self.next_arrival(self.t_ref) <= timestamp:
+            self._register_event(self.next_time)
+            k += 1
+        if k == 0: return None
+        idx, is_buy, price, qty = self.get_actions(snapshot, self.rng.integers(0, self.n, k))
+        return engine.process_batch(is_buy, price, qty, self.ids[idx], timestamp)
+
+    def get_actions(self, snapshot, active):
+        m, rng = len(active), self.rng
+        val = self.fv.current_value + rng.normal(0, self.noise_std, m)
+        is_buy = rng.random(m) < 0.5
+        qty = rng.integers(1, self.max_qty + 1, m)
+        is_market = rng.random(m) < self.market_prob
+
+        half = self.spread / 2
+        price = np.round(np.where(is_buy, val - half, val + half), 2)
+        price[is_market] = np.nan
+        return active, is_buy, price, qty
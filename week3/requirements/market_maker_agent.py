@@ -1,21 +1,75 @@
-from .base_agent import Agent, OrderIntent
+import numpy as np
+from .base_agent import Agent, OrderIntent, Population
 
 class MarketMakerAgent(Agent):
-    def __init__(self, agent_id, half_spread=0.05, skew_factor=0.01):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, half_spread=0.05, skew_factor=0.01, rng=None):
+        super().__init__(agent_id, rng)
         self.half_spread = half_spread
         self.skew_factor = skew_factor
 
-    def get_action(self, snapshot):
+    def _decide(self, snapshot):
+        # -> (bid, ask) quotes, or None without a mid price
         mid = snapshot.get('mid_price')
-        if mid is None: return []
+        if mid is None: return None
 
         reservation = mid - (self.inventory * self.skew_factor)
-        
-        bid = round(reservation - self.half_spread, 2)
-        ask = round(reservation + self.half_spread, 2)
-        
+        return round(reservation - self.half_spread, 2), round(reservation + self.half_spread, 2)
+
+    def get_action(self, snapshot):
+        quotes = self._decide(snapshot)
+        if quotes is None: return []
+        bid, ask = quotes
         return [
             OrderIntent('Buy', bid, 10, 'Limit'),
             OrderIntent('Sell', ask, 10, 'Limit')
-        ]
\ No newline at end of file
+        ]
+
+    def write_intents(self, snapshot, buf):
+        quotes = self._decide(snapshot)
+        if quotes is None: return
+        buf.append(True, quotes[0], 10, self.id)
+        buf.append(False, quotes[1], 10, self.id)
+
+class MarketMakerPopulation(Population):
+    # Same quoting as MarketMakerAgent; inventory is read from the ledger, so the
+    # skew follows fills. replace_quotes cancels an agent's previous pair on requote.
+    # Quotes are computed in one NumPy expression but still matched row by row, so the
+    # per-tick NumPy cost dominates for small counts: in TradingEnv (10 noise traders)
+    # it is ~1.8x slower than MarketMakerAgent objects at 2 MMs, ~1.25x slower at 20
+    # and ~1.2x faster at 80.
+    def __init__(self, n, prefix="MM", half_spread=0.05, skew_factor=0.01, quote_qty=10, replace_quotes=False, rng=None):
+        super().__init__(n, prefix, rng)
+        self.half_spread = np.full(n, half_spread)
+        self.skew_factor = np.full(n, skew_factor)
+        self.quote_qty = quote_qty
+        self.replace_quotes = replace_quotes
+        self.live_quotes = [()] * n
+
+    def step(self, snapshot, engine, timestamp, activation_prob):
+        active = np.flatnonzero(self.rng.random(self.n) < activation_prob)
+        if len(active) == 0 or snapshot.get('mid_price') is None: return None
+        if self.replace_quotes:
+            for i in active.tolist():
+                for order in self.live_quotes[i]: engine.cancel(order)
+        idx, is_buy, price, qty = self.get_actions(snapshot, active)
+        report = engine.process_batch(is_buy, price, qty, self.ids[idx], timestamp)
+        if self.replace_quotes:
+            orders = report.orders
+            for k, i in enumerate(active.tolist()):
+                self.live_quotes[i] = tuple(o for o in orders[2 * k:2 * k + 2] if o is not None)
+        return report
+
+    def get_actions(self, snapshot, active):
+        mid = snapshot.get('mid_price')
+        if mid is None: return active[:0], np.empty(0, bool), np.empty(0), np.empty(0, np.int64)
+
+        reservation = mid - self.inventory[active] * self.skew_factor[active]
+        hs = self.half_spread[active]
+
+        # Bid then ask per agent, as MarketMakerAgent emits them
+        price = np.empty(2 * len(active))
+        price[0::2] = np.round(reservation - hs, 2)
+        price[1::2] = np.round(reservation + hs, 2)
+        is_buy = np.zeros(2 * len(active), dtype=bool)
+        is_buy[0::2] = True
+        return np.repeat(active, 2), is_buy, price, np.full(2 * len(active), self.quote_qty)
\ No newline at end of file
@@ -29,10 +29,9 @@
 from .base_agent import Agent, OrderIntent
 
 class MomentumTrader(Agent):
-    def __init__(self, id, lookback=5, panic_threshold=0.0):
-        super().__init__(id)
+    def __init__(self, id, lookback=5, panic_threshold=0.0, rng=None):
+        super().__init__(id, rng)
         self.lookback = lookback
-        self.price_history = []
         self.panic_threshold = panic_threshold
         # FORCE HUGE LIMITS so they don't stop trading
         self.max_inventory = 100000 
@@ -42,16 +41,10 @@ class MomentumTrader(Agent):
         mid_price = market_snapshot.get('mid_price')
         if mid_price is None: return []
         
-        self.price_history.append(mid_price)
-        if len(self.price_history) > self.lookback:
-            self.price_history.pop(0)
-            
-        if len(self.price_history) < self.lookback:
+        # Shared lookback window from MarketFeatures (last - first mid)
+        price_change = market_snapshot.change(self.lookback)
+        if price_change is None:
             return []
-
-        start_price = self.price_history[0]
-        end_price = self.price_history[-1]
-        price_change = end_price - start_price
         
         orders = []
         
@@ -1,21 +1,53 @@
-import random
 import numpy as np
-from .base_agent import Agent, OrderIntent
+from .base_agent import Agent, OrderIntent, Population
 
 class NoiseTrader(Agent):
-    def __init__(self, agent_id, fair_value_model):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, fair_value_model, rng=None):
+        super().__init__(agent_id, rng)
         self.fv = fair_value_model
 
-    def get_action(self, snapshot):
-        val = self.fv.current_value + np.random.normal(0, 0.5)
+    def _decide(self, snapshot):
+        # -> (is_buy, price, qty); price None = market order
+        rng = self.rng
+        val = self.fv.current_value + rng.normal(0, 0.5)
         
-        side = 'Buy' if random.random() < 0.5 else 'Sell'
-        qty = random.randint(1, 10)
+        is_buy = rng.random() < 0.5
+        qty = rng.integers(1, 11)
         
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
             spread = 0.20
-            price = val - (spread/2) if side == 'Buy' else val + (spread/2)
-            return [OrderIntent(side, round(price, 2), qty, 'Limit')]
-        else:
-            return [OrderIntent(side, None, qty, 'Market')]
\ No newline at end of file
+            return is_buy, round(val - (spread/2) if is_buy else val + (spread/2), 2), qty
+        return is_buy, None, qty
+
+    def get_action(self, snapshot):
+        is_buy, price, qty = self._decide(snapshot)
+        return [OrderIntent('Buy' if is_buy else 'Sell', price, qty, 'Market' if price is None else 'Limit')]
+
+    def write_intents(self, snapshot, buf):
+        is_buy, price, qty = self._decide(snapshot)
+        buf.append(is_buy, price, qty, self.id)
+
+class NoiseTraderPopulation(Population):
+    # Struct-of-arrays NoiseTrader: one vectorized draw per tick for every active
+    # agent, same distributions as NoiseTrader.get_action. The fixed NumPy cost per
+    # tick only pays off with many agents: in TradingEnv (with MarketMakerPopulation)
+    # it is ~2.5x slower than NoiseTrader objects at 10 agents, about even at 50-100
+    # and ~1.3x faster at 200.
+    def __init__(self, n, fair_value_model, prefix="Noise", noise_std=0.5, spread=0.20, max_qty=10, rng=None):
+        super().__init__(n, prefix, rng)
+        self.fv = fair_value_model
+        self.noise_std = noise_std
+        self.spread = spread
+        self.max_qty = max_qty
+
+    def get_actions(self, snapshot, active):
+        m, rng = len(active), self.rng
+        val = self.fv.current_value + rng.normal(0, self.noise_std, m)
+        is_buy = rng.random(m) < 0.5
+        qty = rng.integers(1, self.max_qty + 1, m)
+        is_limit = rng.random(m) < 0.5
+
+        half = self.spread / 2
+        price = np.round(np.where(is_buy, val - half, val + half), 2)
+        price[~is_limit] = np.nan
+        return active, is_buy, price, qty
\ No newline at end of file
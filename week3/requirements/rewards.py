@@ -0,0 +1,53 @@
+from bisect import bisect_left, insort
+from collections import deque
+from .rolling import RollingWindow
+
+RISK_MEASURES = ('std', 'downside', 'drawdown', 'cvar')
+
+class RewardEngine:
+    # Risk term of the RL reward over a rolling window of step PnLs, updated in O(1)
+    # per step (CVaR: O(log n) search into a sorted copy of the window, O(k) tail sum).
+    #   std:      std of step PnL (the original volatility penalty)
+    #   downside: downside deviation, sqrt(mean(min(pnl, 0)^2))
+    #   drawdown: peak net worth in the window minus current net worth
+    #   cvar:     mean loss of the worst cvar_alpha fraction of step PnLs
+    # All are in PnL units, so risk_aversion keeps its meaning across measures.
+    def __init__(self, risk='std', window=50, warmup=10, cvar_alpha=0.1):
+        if risk not in RISK_MEASURES: raise ValueError(f"Unknown risk measure {risk!r}, expected one of {RISK_MEASURES}")
+        if not 0 < cvar_alpha <= 1: raise ValueError("cvar_alpha must be in (0, 1]")
+        self.risk = risk
+        self.window = window
+        self.warmup = warmup # no risk term until more than `warmup` steps are in the window
+        self.cvar_alpha = cvar_alpha
+        self.reset()
+
+    def reset(self):
+        self.pnl = RollingWindow(self.window, track_var=True)
+        self.loss_sq = RollingWindow(self.window)
+        self.peaks = deque() # (step, net_worth), decreasing net worth: window max at the front
+        self.sorted_pnl = []
+        self.n = 0
+
+    def update(self, step_pnl, net_worth):
+        # Push one step -> current risk value (>= 0)
+        risk, pnl = self.risk, self.pnl
+        if risk == 'cvar':
+            if pnl.full: del self.sorted_pnl[bisect_left(self.sorted_pnl, pnl.oldest())]
+            insort(self.sorted_pnl, step_pnl)
+        pnl.push(step_pnl)
+        if risk == 'downside':
+            loss = min(step_pnl, 0.0)
+            self.loss_sq.push(loss * loss)
+        elif risk == 'drawdown':
+            peaks = self.peaks
+            while peaks and peaks[-1][1] <= net_worth: peaks.pop()
+            peaks.append((self.n, net_worth))
+            if peaks[0][0] <= self.n - self.window: peaks.popleft()
+        self.n += 1
+
+        if len(pnl) <= self.warmup: return 0.0
+        if risk == 'std': return pnl.std()
+        if risk == 'downside': return self.loss_sq.mean() ** 0.5
+        if risk == 'drawdown': return self.peaks[0][1] - net_worth
+        k = max(1, int(self.cvar_alpha * len(pnl)))
+        return max(-sum(self.sorted_pnl[:k]) / k, 0.0)
@@ -0,0 +1,91 @@
+import math
+import random
+import zlib
+from functools import partial
+import numpy as np
+
+class GlobalRNG:
+    # Legacy adapter over the global `random` / `np.random` state, with the same
+    # interface as BlockRNG and np.random.Generator. Scalar calls hit `random`,
+    # sized calls hit `np.random`, exactly as the agents did before.
+    def random(self, size=None):
+        return random.random() if size is None else np.random.random(size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return np.random.normal(loc, scale, size)
+
+    def integers(self, low, high, size=None):
+        # [low, high)
+        return random.randint(low, high - 1) if size is None else np.random.randint(low, high, size)
+
+    def geometric(self, p):
+        return np.random.geometric(p)
+
+    def exponential(self, scale=1.0, size=None):
+        return np.random.exponential(scale, size)
+
+GLOBAL_RNG = GlobalRNG()
+
+class BlockRNG:
+    # Scalar draws served from pre-generated blocks of a Generator, refilled in
+    # chunks, so the hot loop never pays a NumPy call per draw. Array draws go
+    # straight to .gen (populations hold a Generator directly).
+    # `generator` may be a zero-argument factory: the Generator is then only built on
+    # the first draw. Blocks start at first_block and double up to block_size, so a
+    # stream that is created every reset but drawn from a few times stays cheap.
+    def __init__(self, generator, block_size=1024, first_block=64):
+        self._gen = generator
+        self.block_size = block_size
+        self._next_u = self._next_z = min(first_block, block_size)
+        self._u = []
+        self._z = []
+
+    @property
+    def gen(self):
+        if not isinstance(self._gen, np.random.Generator): self._gen = self._gen()
+        return self._gen
+
+    def random(self):
+        try:
+            return self._u.pop()
+        except IndexError:
+            n = self._next_u
+            self._next_u = min(2 * n, self.block_size)
+            self._u = self.gen.random(n).tolist()
+            return self._u.pop()
+
+    def normal(self, loc=0.0, scale=1.0):
+        try:
+            return loc + scale * self._z.pop()
+        except IndexError:
+            n = self._next_z
+            self._next_z = min(2 * n, self.block_size)
+            self._z = self.gen.standard_normal(n).tolist()
+            return loc + scale * self._z.pop()
+
+    def integers(self, low, high):
+        # [low, high)
+        return low + int(self.random() * (high - low))
+
+    def geometric(self, p):
+        # Trials up to and including the first success (>= 1), by inversion
+        if p >= 1.0: return 1
+        return int(math.log(1.0 - self.random()) / math.log(1.0 - p)) + 1
+
+class RngStreams:
+    # Seeded Generator hierarchy. Streams are keyed by name (agent id, population
+    # prefix), not by spawn order, so adding or removing a consumer never shifts
+    # another consumer's draws, and streams are independent across processes.
+    def __init__(self, seed):
+        self.seed = seed
+        self.root = np.random.SeedSequence(seed)
+
+    def seed_sequence(self, name):
+        return np.random.SeedSequence(self.root.entropy, spawn_key=(zlib.crc32(name.encode()),))
+
+    def generator(self, name):
+        return np.random.Generator(np.random.PCG64(self.seed_sequence(name)))
+
+    def block(self, name, block_size=1024):
+        # Lazy: the stream's Generator is built on its first draw
+        return BlockRNG(partial(self.generator, name), block_size)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from requirements.rewards import RewardEngine, RISK_MEASURES
+
+WINDOW, WARMUP, ALPHA = 50, 10, 0.1
+
+def _reference(risk, pnl, net_worth):
+    # Risk value straight from the window's arrays
+    if len(pnl) <= WARMUP: return 0.0
+    if risk == 'std': return pnl.std()
+    if risk == 'downside': return np.sqrt(np.mean(np.minimum(pnl, 0) ** 2))
+    if risk == 'drawdown': return net_worth.max() - net_worth[-1]
+    k = max(1, int(ALPHA * len(pnl)))
+    return max(-np.sort(pnl)[:k].mean(), 0.0)
+
+def test_risk_measures_match_numpy():
+    rng = np.random.default_rng(0)
+    pnl = rng.normal(0.5, 20, 400).round(2) # rounded: ties in the CVaR tail
+    net_worth = 100000 + np.cumsum(pnl)
+    for risk in RISK_MEASURES:
+        engine = RewardEngine(risk, WINDOW, WARMUP, ALPHA)
+        for run in range(2): # reset() starts a fresh window
+            for t in range(len(pnl)):
+                lo = max(0, t + 1 - WINDOW)
+                value = engine.update(float(pnl[t]), float(net_worth[t]))
+                assert value == pytest.approx(_reference(risk, pnl[lo:t + 1], net_worth[lo:t + 1]), rel=1e-6, abs=1e-6), (risk, t)
+                assert value >= 0.0
+            engine.reset()
+
+def test_bad_arguments_are_rejected():
+    with pytest.raises(ValueError):
+        RewardEngine('var')
+    with pytest.raises(ValueError):
+        RewardEngine('cvar', cvar_alpha=0)
@@ -0,0 +1,47 @@
+import numpy as np
+from requirements.rng import BlockRNG, RngStreams
+
+def _draws(rng, n=50):
+    return [rng.random() for _ in range(n)] + [rng.normal(1.0, 2.0) for _ in range(n)] + \
+           [rng.integers(1, 11) for _ in range(n)] + [rng.geometric(0.2) for _ in range(n)]
+
+def test_same_stream_reproduces():
+    assert _draws(RngStreams(7).block("Noise_3")) == _draws(RngStreams(7).block("Noise_3"))
+    assert np.array_equal(RngStreams(7).generator("MM").random(10), RngStreams(7).generator("MM").random(10))
+    assert _draws(RngStreams(7).block("Noise_3")) != _draws(RngStreams(8).block("Noise_3"))
+    assert _draws(RngStreams(7).block("Noise_3")) != _draws(RngStreams(7).block("Noise_4"))
+
+def test_streams_do_not_depend_on_creation_order():
+    a = RngStreams(1)
+    first = [a.block(name) for name in ("x", "y", "z")]
+    b = RngStreams(1)
+    b.block("extra").random()
+    second = {name: b.block(name) for name in ("z", "y", "x")}
+    for name, rng in zip(("x", "y", "z"), first):
+        assert _draws(rng) == _draws(second[name])
+
+def test_block_rng_serves_the_generator_stream():
+    # Scalars come off pre-generated blocks (last element first), refilled when empty
+    block = BlockRNG(np.random.default_rng(5), block_size=8)
+    ref = np.random.default_rng(5).random(24).reshape(3, 8)[:, ::-1].ravel().tolist()
+    assert [block.random() for _ in range(24)] == ref
+
+def test_block_rng_distributions():
+    rng = RngStreams(0).block("dist")
+    n = 20000
+    ints = [rng.integers(1, 11) for _ in range(n)]
+    assert min(ints) == 1 and max(ints) == 10
+    assert abs(np.mean([rng.geometric(0.2) for _ in range(n)]) - 5.0) < 0.15
+    z = [rng.normal(1.0, 2.0) for _ in range(n)]
+    assert abs(np.mean(z) - 1.0) < 0.05 and abs(np.std(z) - 2.0) < 0.05
+    assert rng.geometric(1.0) == 1
+
+def test_block_streams_start_lazily_and_small():
+    rng = RngStreams(3).block("Noise_0", block_size=256)
+    assert not isinstance(rng._gen, np.random.Generator) # nothing built until the first draw
+    ref = np.random.default_rng(RngStreams(3).seed_sequence("Noise_0"))
+    expected = []
+    for n in (64, 128, 256, 256):
+        expected += ref.random(n)[::-1].tolist()
+    assert [rng.random() for _ in range(len(expected))] == expected
+    assert isinstance(rng.gen, np.random.Generator)
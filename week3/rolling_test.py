@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from requirements.rolling import RollingWindow
+
+def test_window_statistics_match_numpy():
+    x = np.random.default_rng(0).normal(100, 5, 1000)
+    for size in (1, 5, 50):
+        w = RollingWindow(size, track_var=True)
+        for t, value in enumerate(x.tolist()):
+            w.push(value)
+            ref = x[max(0, t + 1 - size):t + 1]
+            assert len(w) == len(ref) and w.full == (len(ref) == size)
+            assert w.mean() == pytest.approx(ref.mean(), rel=1e-12)
+            assert w.var() == pytest.approx(ref.var(), rel=1e-6, abs=1e-9)
+            assert w.std() == pytest.approx(ref.std(), rel=1e-6, abs=1e-6)
+            assert w.oldest() == ref[0] and w.last() == ref[-1]
+        assert w.values() == x[-size:].tolist()
+
+def test_window_guards():
+    with pytest.raises(ValueError):
+        RollingWindow(0)
+    w = RollingWindow(3)
+    assert w.mean() == 0.0
+    with pytest.raises(RuntimeError):
+        w.var()
+    for v in (1.0, 2.0, 3.0, 4.0): w.push(v)
+    w.clear()
+    assert len(w) == 0 and w.values() == []
@@ -0,0 +1,197 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+# Worker commands
+STEP, RESET, CALL, CLOSE = 0, 1, 2, 3
+INFO_KEYS = ('net_worth', 'step_pnl', 'reward', 'penalty', 'inventory') # TradingEnv.step info
+
+def _buffer_specs(n_envs, observation_space, action_space):
+    # name -> (shape, dtype) of every array shared between parent and workers
+    obs_shape, obs_dtype = (n_envs,) + observation_space.shape, observation_space.dtype
+    if isinstance(action_space, spaces.Discrete): act_shape, act_dtype = (n_envs,), np.int64
+    else: act_shape, act_dtype = (n_envs,) + action_space.shape, action_space.dtype
+    return {
+        'obs': (obs_shape, obs_dtype),
+        'terminal_obs': (obs_shape, obs_dtype),
+        'actions': (act_shape, act_dtype),
+        'rewards': ((n_envs,), np.float32),
+        'terminated': ((n_envs,), np.bool_),
+        'truncated': ((n_envs,), np.bool_),
+        'info': ((n_envs, len(INFO_KEYS)), np.float64),
+        'seeds': ((n_envs,), np.int64),
+        'has_seed': ((n_envs,), np.bool_),
+        'command': ((1,), np.int64),
+        'failed': ((1,), np.bool_)
+    }
+
+def _attach(specs, names):
+    blocks = {key: shared_memory.SharedMemory(name=names[key]) for key in specs}
+    arrays = {key: np.ndarray(shape, dtype, buffer=blocks[key].buf) for key, (shape, dtype) in specs.items()}
+    return blocks, arrays
+
+def _worker(factory, env_ids, specs, names, start, done, pipe):
+    # Steps its envs in place in the shared arrays; only CALL goes through the pipe
+    blocks, shm = _attach(specs, names)
+    envs = [factory() for _ in env_ids]
+    try:
+        while True:
+            start.acquire()
+            command = int(shm['command'][0])
+            if command == STEP:
+                for i, env in zip(env_ids, envs):
+                    obs, reward, terminated, truncated, info = env.step(shm['actions'][i])
+                    shm['rewards'][i] = reward
+                    shm['terminated'][i] = terminated
+                    shm['truncated'][i] = truncated
+                    shm['info'][i] = [info.get(key, np.nan) for key in INFO_KEYS]
+                    if terminated or truncated:
+                        shm['terminal_obs'][i] = obs
+                        obs, _ = env.reset()
+                    shm['obs'][i] = obs
+            elif command == RESET:
+                for i, env in zip(env_ids, envs):
+                    seed = int(shm['seeds'][i]) if shm['has_seed'][i] else None
+                    shm['obs'][i], _ = env.reset(seed=seed)
+            elif command == CALL:
+                name, args, kwargs, local = pipe.recv()
+                try:
+                    results = []
+                    for k in local:
+                        env = envs[k]
+                        if name == '__getattr__': results.append(getattr(env, args[0]))
+                        elif name == '__setattr__': setattr(env, *args); results.append(None)
+                        else: results.append(getattr(env, name)(*args, **kwargs))
+                except Exception as e:
+                    results = e
+                pipe.send(results)
+            elif command == CLOSE:
+                break
+            done.release()
+    except BaseException:
+        shm['failed'][0] = True
+        raise
+    finally:
+        for env in envs: env.close()
+        for block in blocks.values(): block.close()
+        done.release()
+
+class SharedMemoryVecEnv(VecEnv):
+    # SubprocVecEnv without per-step pickling: observations, actions, rewards, dones
+    # and TradingEnv's info fields live in multiprocessing.shared_memory arrays, and a
+    # step is just two semaphore round trips per worker. Each worker steps a contiguous
+    # slice of the envs. `env_fn` must be picklable (e.g. day2.EnvFactory).
+    def __init__(self, env_fn, n_envs, n_workers=None, start_method=None):
+        probe = env_fn()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        self.render_mode = getattr(probe, 'render_mode', None)
+        probe.close()
+
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+        n_workers = min(n_workers or mp.cpu_count(), n_envs)
+
+        self.specs = _buffer_specs(n_envs, observation_space, action_space)
+        self.blocks = {}
+        self.shm = {}
+        for key, (shape, dtype) in self.specs.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            self.blocks[key] = shared_memory.SharedMemory(create=True, size=size)
+            self.shm[key] = np.ndarray(shape, dtype, buffer=self.blocks[key].buf)
+            self.shm[key][...] = 0
+        names = {key: block.name for key, block in self.blocks.items()}
+
+        self.slices = np.array_split(np.arange(n_envs), n_workers)
+        self.done = ctx.Semaphore(0)
+        self.starts, self.pipes, self.processes = [], [], []
+        for env_ids in self.slices:
+            start = ctx.Semaphore(0)
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(env_fn, env_ids.tolist(), self.specs, names, start, self.done, child),
+                                  daemon=True)
+            process.start()
+            child.close()
+            self.starts.append(start)
+            self.pipes.append(parent)
+            self.processes.append(process)
+        self.closed = False
+        super().__init__(n_envs, observation_space, action_space)
+
+    def _run(self, command, workers=None):
+        workers = range(len(self.starts)) if workers is None else workers
+        self.shm['command'][0] = command
+        for w in workers: self.starts[w].release()
+        return workers
+
+    def _wait(self, workers):
+        for _ in workers: self.done.acquire()
+        if self.shm['failed'][0]: raise RuntimeError("SharedMemoryVecEnv worker died; see its traceback above")
+
+    def reset(self):
+        for i, seed in enumerate(self._seeds):
+            self.shm['has_seed'][i] = seed is not None
+            if seed is not None: self.shm['seeds'][i] = seed
+        self._wait(self._run(RESET))
+        self._reset_seeds()
+        self._reset_options()
+        return self.shm['obs'].copy()
+
+    def step_async(self, actions):
+        self.shm['actions'][...] = np.asarray(actions).reshape(self.shm['actions'].shape)
+        self._pending = self._run(STEP)
+
+    def step_wait(self):
+        self._wait(self._pending)
+        shm = self.shm
+        terminated, truncated = shm['terminated'], shm['truncated']
+        dones = terminated | truncated
+        infos = [dict(zip(INFO_KEYS, row), **{'TimeLimit.truncated': bool(tr and not te)})
+                 for row, te, tr in zip(shm['info'].tolist(), terminated.tolist(), truncated.tolist())]
+        for i in np.flatnonzero(dones).tolist():
+            infos[i]['terminal_observation'] = shm['terminal_obs'][i].copy()
+        return shm['obs'].copy(), shm['rewards'].copy(), dones, infos
+
+    def _call(self, name, args=(), kwargs=None, indices=None):
+        # Rare, non-step traffic (get/set_attr, env_method) is pickled through the pipes
+        indices = set(self._get_indices(indices))
+        workers = []
+        for w, env_ids in enumerate(self.slices):
+            local = [k for k, i in enumerate(env_ids.tolist()) if i in indices]
+            if local:
+                self.pipes[w].send((name, args, kwargs or {}, local))
+                workers.append(w)
+        self._run(CALL, workers)
+        replies = [self.pipes[w].recv() for w in workers]
+        self._wait(workers)
+        results = []
+        for reply in replies:
+            if isinstance(reply, Exception): raise reply
+            results.extend(reply)
+        return results
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call('__getattr__', (attr_name,), indices=indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call('__setattr__', (attr_name, value), indices=indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call(method_name, method_args, method_kwargs, indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+    def close(self):
+        if self.closed: return
+        if self.shm['failed'][0]:
+            for process in self.processes: process.terminate()
+        else:
+            self._wait(self._run(CLOSE))
+        for process in self.processes: process.join()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.closed = True
@@ -0,0 +1,40 @@
+import numpy as np
+from stable_baselines3.common.vec_env import DummyVecEnv
+from day2 import EnvFactory
+from shm_vec_env import SharedMemoryVecEnv, INFO_KEYS
+
+def _rollout(vec_env, steps):
+    vec_env.seed(11)
+    out = [vec_env.reset()]
+    actions = np.random.default_rng(0).integers(0, 3, (steps, vec_env.num_envs))
+    for a in actions:
+        obs, rewards, dones, infos = vec_env.step(a)
+        out.append((obs, rewards, dones, [{k: info[k] for k in INFO_KEYS + ('TimeLimit.truncated',)} for info in infos],
+                    [info.get('terminal_observation') for info in infos]))
+    return out
+
+def _assert_same(a, b):
+    if isinstance(a, (tuple, list)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b): _assert_same(x, y)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for k in a: _assert_same(a[k], b[k])
+    elif a is None or b is None:
+        assert a is None and b is None
+    else:
+        assert np.allclose(a, b)
+
+def test_matches_dummy_vec_env():
+    # Three envs on two workers; max_steps=8 so every env auto-resets mid-rollout
+    factory = EnvFactory(attrs={'max_steps': 8})
+    expected = _rollout(DummyVecEnv([factory] * 3), 12)
+    shm_env = SharedMemoryVecEnv(factory, n_envs=3, n_workers=2)
+    try:
+        _assert_same(_rollout(shm_env, 12), expected)
+        assert shm_env.get_attr('max_steps') == [8, 8, 8]
+        shm_env.set_attr('max_steps', 20, indices=[1])
+        assert shm_env.get_attr('max_steps') == [8, 20, 8]
+    finally:
+        shm_env.close()
+    assert all(not p.is_alive() for p in shm_env.processes)
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+class SurrogateMarket:
+    # Reduced-form model of TradingEnv's market per RL step, for cheap pretraining:
+    #   mid:       log return r_t = phi * r_{t-1} + sigma * eps + impact * signed RL qty
+    #   spread:    AR(1) in log(relative spread) around spread_mean
+    #   imbalance: AR(1) in logit(imbalance) around imb_mean
+    # Defaults are fit(None, dataset) on five random-action EpisodeRecorder episodes
+    # of the default TradingEnv.
+    def __init__(self, sigma=2.9e-3, phi=-0.156, impact=2.0e-5, spread_mean=-6.79, spread_phi=0.080,
+                 spread_std=1.10, imb_mean=0.134, imb_phi=0.982, imb_std=0.087):
+        self.sigma = sigma
+        self.phi = phi
+        self.impact = impact # log return per share of RL market order flow
+        self.spread_mean, self.spread_phi, self.spread_std = spread_mean, spread_phi, spread_std
+        self.imb_mean, self.imb_phi, self.imb_std = imb_mean, imb_phi, imb_std
+
+    @staticmethod
+    def _ar1(x):
+        # x_t = mean + a (x_{t-1} - mean) + std * eps -> (mean, a, std)
+        x = np.asarray(x, dtype=float)
+        mean = x.mean()
+        prev, cur = x[:-1] - mean, x[1:] - mean
+        a = float(prev @ cur / (prev @ prev)) if prev @ prev > 0 else 0.0
+        return float(mean), a, float((cur - a * prev).std())
+
+    @classmethod
+    def fit(cls, mid_prices="outputs/mid_prices.csv", dataset=None):
+        # mid_prices: simulator tape with a 'price' column per RL step (day6_simulation);
+        # gives the return dynamics (phi, sigma).
+        # dataset: a recorder.RecordedDataset of TradingEnv episodes; its obs give the
+        # spread/imbalance dynamics and its RL flow vs. mid moves give the impact
+        # (and phi/sigma too when there is no mid_prices tape).
+        params = {}
+        if mid_prices is not None:
+            price = pd.read_csv(mid_prices)['price'].to_numpy()
+            ret = np.diff(np.log(price))
+            _, params['phi'], params['sigma'] = cls._ar1(ret)
+        if dataset is not None:
+            obs = dataset['obs']
+            spread = obs[:, 1].astype(float)
+            spread = np.log(spread[spread > 0])
+            params['spread_mean'], params['spread_phi'], params['spread_std'] = cls._ar1(spread)
+            imb = np.clip(obs[:, 2].astype(float), 1e-3, 1 - 1e-3)
+            params['imb_mean'], params['imb_phi'], params['imb_std'] = cls._ar1(np.log(imb / (1 - imb)))
+
+            # OLS of each step's mid return on (previous return, signed RL qty), within episodes
+            mid, inv = dataset['last_mid_price'], dataset['inventory']
+            rows = []
+            for ep in dataset.episodes:
+                s, e = ep['start'], ep['start'] + ep['length']
+                r = np.diff(np.log(mid[s:e]))
+                flow = np.diff(inv[s:e])
+                rows.append(np.column_stack([r[1:], r[:-1], flow[1:]]))
+            y, X = np.concatenate(rows)[:, 0], np.concatenate(rows)[:, 1:]
+            coef = np.linalg.lstsq(X, y, rcond=None)[0]
+            params['impact'] = float(coef[1])
+            if mid_prices is None: params['phi'], params['sigma'] = float(coef[0]), float((y - X @ coef).std())
+        return cls(**params)
+
+class SurrogateTradingEnv(VecEnv):
+    # TradingEnv's observation/action/reward interface on top of SurrogateMarket:
+    # N markets advance with a handful of array ops per step, so a policy can be
+    # pretrained here and fine-tuned on TradingEnv (or BatchTradingEnv) unchanged.
+    # RL orders fill at the touch (mid +/- half spread) and move the mid by the
+    # fitted impact; the background market has no book or agents.
+    metadata = {'render_modes': []}
+
+    def __init__(self, num_envs=1024, market=None, seed=None):
+        self.render_mode = None
+        self.market = market if market is not None else SurrogateMarket()
+        self.max_steps = 1000
+        self.max_inventory = 100
+        self.trade_qty = 10
+        self.transaction_cost = 0.0001
+        self.risk_aversion = 0.01
+        self.inventory_penalty = 0.001
+        self.pnl_window = 50
+
+        action_space = spaces.Discrete(3)
+        observation_space = spaces.Box(
+            low=np.array([-np.inf, 0, 0, -1], dtype=np.float32),
+            high=np.array([np.inf, np.inf, 1, 1], dtype=np.float32),
+            dtype=np.float32
+        )
+        super().__init__(num_envs, observation_space, action_space)
+
+        n = num_envs
+        self.rng = np.random.default_rng(seed)
+        self.mid = np.full(n, 100.0)
+        self.ret = np.zeros(n)
+        self.log_spread = np.zeros(n)
+        self.logit_imb = np.zeros(n)
+        self.cash = np.zeros(n)
+        self.inventory = np.zeros(n, dtype=np.int64)
+        self.last_net_worth = np.zeros(n)
+        self.current_step = np.zeros(n, dtype=np.int64)
+        self.pnl_buf = np.zeros((n, self.pnl_window))
+        self.pnl_count = np.zeros(n, dtype=np.int64)
+        self.rows = np.arange(n)
+        self.actions = None
+
+    # --- VecEnv interface ---
+
+    def reset(self):
+        if self._seeds[0] is not None: self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_rows(self.rows)
+        self._reset_seeds()
+        self._reset_options()
+        return self._observe(self.rows)
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        m, n, qty = self.market, self.num_envs, self.trade_qty
+        buy, sell = self.actions == 1, self.actions == 2
+        signed = np.where(buy, qty, 0) - np.where(sell, qty, 0)
+
+        half_spread = np.exp(self.log_spread) / 2
+        exec_price = self.mid * (1 + np.sign(signed) * half_spread)
+        self.inventory += signed
+        self.cash -= signed * exec_price + np.abs(signed) * exec_price * self.transaction_cost
+
+        eps = self.rng.standard_normal((3, n))
+        self.ret = m.phi * self.ret + m.sigma * eps[0] + m.impact * signed
+        self.mid *= np.exp(self.ret)
+        self.log_spread = m.spread_mean + m.spread_phi * (self.log_spread - m.spread_mean) + m.spread_std * eps[1]
+        self.logit_imb = m.imb_mean + m.imb_phi * (self.logit_imb - m.imb_mean) + m.imb_std * eps[2]
+
+        net_worth = self.cash + self.inventory * self.mid
+        step_pnl = net_worth - self.last_net_worth
+        slot = self.pnl_count % self.pnl_window
+        self.pnl_buf[self.rows, slot] = step_pnl
+        self.pnl_count += 1
+        k = np.minimum(self.pnl_count, self.pnl_window)
+        mean = self.pnl_buf.sum(axis=1) / k
+        var = np.maximum((self.pnl_buf ** 2).sum(axis=1) / k - mean ** 2, 0.0)
+        volatility = np.where(k > 10, np.sqrt(var), 0.0)
+
+        norm_inv = self.inventory / self.max_inventory
+        penalty = self.risk_aversion * volatility + self.inventory_penalty * norm_inv ** 2
+        reward = step_pnl - penalty
+
+        self.last_net_worth = net_worth
+        self.current_step += 1
+
+        truncated = self.current_step >= self.max_steps
+        terminated = net_worth < 0
+        reward = np.where(terminated, reward - 1000, reward)
+        dones = truncated | terminated
+
+        obs = self._observe(self.rows)
+        infos = [{'net_worth': w, 'step_pnl': p, 'reward': r, 'penalty': c, 'inventory': i}
+                 for w, p, r, c, i in zip(net_worth.tolist(), step_pnl.tolist(), reward.tolist(),
+                                          penalty.tolist(), self.inventory.tolist())]
+
+        if dones.any():
+            done_rows = np.flatnonzero(dones)
+            for i in done_rows.tolist():
+                infos[i]['terminal_observation'] = obs[i].copy()
+                infos[i]['TimeLimit.truncated'] = bool(truncated[i] and not terminated[i])
+            self._reset_rows(done_rows)
+            obs[done_rows] = self._observe(done_rows)
+
+        return obs, reward.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        # Parameters are shared by all markets
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs)] * len(self._get_indices(indices))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+    # --- Market ---
+
+    def _reset_rows(self, rows):
+        m = self.market
+        self.mid[rows] = 100.0
+        self.ret[rows] = 0.0
+        self.log_spread[rows] = m.spread_mean
+        self.logit_imb[rows] = m.imb_mean
+        self.cash[rows] = 100000.0
+        self.inventory[rows] = 0
+        self.last_net_worth[rows] = 100000.0
+        self.current_step[rows] = 0
+        self.pnl_buf[rows] = 0.0
+        self.pnl_count[rows] = 0
+
+    def _observe(self, rows):
+        # log_ret is 0 after a step, as in TradingEnv (mid is compared after last_mid_price moves)
+        log_ret = np.zeros(len(rows))
+        spread = np.exp(self.log_spread[rows])
+        imbalance = 1 / (1 + np.exp(-self.logit_imb[rows]))
+        norm_inv = self.inventory[rows] / self.max_inventory
+        return np.stack([log_ret, spread, imbalance, norm_inv], axis=1).astype(np.float32)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from surrogate_env import SurrogateMarket, SurrogateTradingEnv
+
+class _Dataset(dict):
+    # The parts of recorder.RecordedDataset that fit() reads
+    def __init__(self, episodes, **columns):
+        super().__init__(columns)
+        self.episodes = episodes
+
+def _simulate(true, n_episodes=20, length=500, seed=0):
+    # Episodes from the surrogate's own dynamics with random RL flow, recorded like TradingEnv's
+    rng = np.random.default_rng(seed)
+    cols = {'obs': [], 'last_mid_price': [], 'inventory': []}
+    episodes = []
+    for e in range(n_episodes):
+        mid, ret, inv = 100.0, 0.0, 0
+        log_spread, logit_imb = true.spread_mean, true.imb_mean
+        for _ in range(length):
+            cols['obs'].append([0.0, np.exp(log_spread), 1 / (1 + np.exp(-logit_imb)), inv / 100])
+            flow = int(rng.integers(-1, 2)) * 10
+            inv += flow
+            ret = true.phi * ret + true.sigma * rng.standard_normal() + true.impact * flow
+            mid *= np.exp(ret)
+            log_spread = true.spread_mean + true.spread_phi * (log_spread - true.spread_mean) + true.spread_std * rng.standard_normal()
+            logit_imb = true.imb_mean + true.imb_phi * (logit_imb - true.imb_mean) + true.imb_std * rng.standard_normal()
+            cols['last_mid_price'].append(mid)
+            cols['inventory'].append(inv)
+        episodes.append({'start': e * length, 'length': length})
+    return _Dataset(episodes, **{k: np.array(v) for k, v in cols.items()})
+
+def test_fit_recovers_the_generating_parameters():
+    true = SurrogateMarket(sigma=1e-3, phi=-0.3, impact=5e-4, imb_phi=0.9, imb_std=0.2)
+    fitted = SurrogateMarket.fit(None, _simulate(true))
+    assert fitted.phi == pytest.approx(true.phi, abs=0.03)
+    assert fitted.sigma == pytest.approx(true.sigma, rel=0.05)
+    assert fitted.impact == pytest.approx(true.impact, rel=0.05)
+    assert fitted.spread_phi == pytest.approx(true.spread_phi, abs=0.03)
+    assert fitted.spread_std == pytest.approx(true.spread_std, rel=0.05)
+    assert fitted.imb_phi == pytest.approx(true.imb_phi, abs=0.03)
+    assert fitted.imb_std == pytest.approx(true.imb_std, rel=0.05)
+
+def test_fills_at_the_touch_and_pays_fees():
+    env = SurrogateTradingEnv(3, seed=0)
+    obs = env.reset()
+    assert obs.shape == (3, 4) and obs.dtype == np.float32
+    half_spread = np.exp(env.log_spread) / 2
+    env.step(np.array([0, 1, 2]))
+    exec_price = 100.0 * (1 + np.array([0, 1, -1]) * half_spread)
+    expected = 100000.0 - np.array([0, 10, -10]) * exec_price - np.array([0, 10, 10]) * exec_price * env.transaction_cost
+    assert np.allclose(env.cash, expected)
+    assert env.inventory.tolist() == [0, 10, -10]
+
+def test_seeded_rollouts_repeat_and_auto_reset():
+    runs = []
+    for _ in range(2):
+        env = SurrogateTradingEnv(4, seed=3)
+        env.max_steps = 5
+        env.reset()
+        out = [env.step(np.full(4, i % 3)) for i in range(5)]
+        runs.append(np.array([o[1] for o in out]))
+    assert np.array_equal(runs[0], runs[1])
+    _, _, dones, infos = out[-1]
+    assert dones.all() and all(info['TimeLimit.truncated'] for info in infos)
+    assert (env.current_step == 0).all() and (env.inventory == 0).all()
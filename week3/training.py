@@ -0,0 +1,188 @@
+import io
+import os
+import pickle
+import queue
+import threading
+import time
+import torch
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv
+from requirements.checkpoint import capture_globals, restore_globals
+
+# A checkpoint is two files written together: step_<n>.zip (SB3 model: weights,
+# optimizer, num_timesteps) and step_<n>.pkl (everything SB3 does not save:
+# the envs mid-episode and their last obs, Monitor counters and log offset, RNG states, the replay
+# buffer of off-policy algorithms). `latest` names the newest complete pair.
+# Env state is only kept for DummyVecEnv; other VecEnvs start new episodes on resume.
+# Checkpoints are taken at rollout boundaries, where PPO's rollout buffer is empty.
+
+def _monitors(venv):
+    # Monitor wrapper of each env in a DummyVecEnv (None where there is none)
+    out = []
+    for env in venv.envs:
+        while not isinstance(env, Monitor) and hasattr(env, 'env'): env = env.env
+        out.append(env if isinstance(env, Monitor) else None)
+    return out
+
+def _monitor_state(monitor):
+    writer = monitor.results_writer
+    if writer is not None: writer.file_handler.flush()
+    return {
+        'rewards': monitor.rewards,
+        'needs_reset': monitor.needs_reset,
+        'episode_returns': monitor.episode_returns,
+        'episode_lengths': monitor.episode_lengths,
+        'episode_times': monitor.episode_times,
+        'total_steps': monitor.total_steps,
+        'elapsed': time.time() - monitor.t_start,
+        'log_file': writer.file_handler.name if writer is not None else None,
+        'log_offset': writer.file_handler.tell() if writer is not None else None
+    }
+
+def snapshot(model):
+    # -> (zip bytes, state bytes); runs in the training thread so the copy is consistent
+    zip_buf = io.BytesIO()
+    model.save(zip_buf)
+    state = {'globals': capture_globals(), 'torch_rng': torch.get_rng_state(),
+             'ep_info_buffer': model.ep_info_buffer, 'episode_num': model._episode_num,
+             'last_obs': model._last_obs, 'last_episode_starts': model._last_episode_starts}
+    venv = model.get_env()
+    if isinstance(venv, DummyVecEnv):
+        monitors = _monitors(venv)
+        state['envs'] = [m.env if m is not None else env for m, env in zip(monitors, venv.envs)]
+        state['monitors'] = [_monitor_state(m) if m is not None else None for m in monitors]
+    if getattr(model, 'replay_buffer', None) is not None: state['replay_buffer'] = model.replay_buffer
+    return zip_buf.getvalue(), pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+class AsyncCheckpointCallback(BaseCallback):
+    # Snapshots the model every save_freq steps (at the next rollout boundary) and
+    # hands the bytes to a writer thread, so disk I/O overlaps the next rollout.
+    def __init__(self, checkpoint_dir, save_freq=10000, keep=3, verbose=1):
+        super().__init__(verbose)
+        self.checkpoint_dir = checkpoint_dir
+        self.save_freq = save_freq
+        self.keep = keep
+        self.last_save = None
+        self.pending = queue.Queue(maxsize=1) # at most one snapshot waiting behind the writer
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+        self.error = None
+
+    def _on_training_start(self):
+        if self.last_save is None: self.last_save = self.model.num_timesteps
+
+    def _on_rollout_start(self):
+        if self.error is not None: raise self.error
+        if self.model.num_timesteps - self.last_save >= self.save_freq: self.save()
+
+    def _on_step(self):
+        return True
+
+    def save(self):
+        self.last_save = self.model.num_timesteps
+        zip_bytes, state_bytes = snapshot(self.model)
+        self.pending.put((self.model.num_timesteps, zip_bytes, state_bytes))
+
+    def _write_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None: break
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.pending.task_done()
+
+    def _write(self, step, zip_bytes, state_bytes):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        name = f"step_{step:09d}"
+        for ext, data in (('.zip', zip_bytes), ('.pkl', state_bytes)):
+            path = os.path.join(self.checkpoint_dir, name + ext)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+        latest = os.path.join(self.checkpoint_dir, 'latest')
+        with open(latest + '.tmp', 'w') as f: f.write(name)
+        os.replace(latest + '.tmp', latest)
+        if self.verbose: print(f"Checkpoint saved: {name}")
+
+        names = sorted(n[:-4] for n in os.listdir(self.checkpoint_dir) if n.startswith('step_') and n.endswith('.zip'))
+        for old in names[:-self.keep]:
+            for ext in ('.zip', '.pkl'): os.remove(os.path.join(self.checkpoint_dir, old + ext))
+
+    def close(self, final=True):
+        # Final checkpoint (only after a completed learn(): mid-rollout state is not saved), then wait for the writer
+        if final: self.save()
+        self.pending.put(None)
+        self.writer.join()
+        if self.error is not None: raise self.error
+
+def latest_checkpoint(checkpoint_dir):
+    path = os.path.join(checkpoint_dir, 'latest')
+    if not os.path.exists(path): return None
+    with open(path) as f: return os.path.join(checkpoint_dir, f.read().strip())
+
+def _truncate_log(state_path):
+    # Drop Monitor rows written after the checkpoint, before the Monitor reopens the file
+    with open(state_path, 'rb') as f: state = pickle.load(f)
+    for m in state.get('monitors') or []:
+        if m is not None and m['log_file'] and os.path.exists(m['log_file']):
+            with open(m['log_file'], 'r+b') as f: f.truncate(m['log_offset'])
+
+def restore(checkpoint, algo, env, **load_kwargs):
+    # Model + envs + counters + RNGs exactly as they were at the checkpoint
+    model = algo.load(checkpoint + '.zip', env=env, **load_kwargs)
+    with open(checkpoint + '.pkl', 'rb') as f: state = pickle.load(f)
+    venv = model.get_env()
+    venv._reset_seeds() # load() re-seeds the VecEnv, which would re-seed the next episode reset
+    if 'envs' in state and isinstance(venv, DummyVecEnv):
+        for i, (monitor, saved_env, saved) in enumerate(zip(_monitors(venv), state['envs'], state['monitors'])):
+            if monitor is None:
+                venv.envs[i] = saved_env
+                continue
+            monitor.env = saved_env
+            for key in ('rewards', 'needs_reset', 'episode_returns', 'episode_lengths', 'episode_times', 'total_steps'):
+                setattr(monitor, key, saved[key])
+            monitor.t_start = time.time() - saved['elapsed']
+        # load(env=...) drops the last obs, which would reset the envs mid-episode
+        model._last_obs, model._last_episode_starts = state['last_obs'], state['last_episode_starts']
+    if 'replay_buffer' in state: model.replay_buffer = state['replay_buffer']
+    model.ep_info_buffer = state['ep_info_buffer']
+    model._episode_num = state['episode_num']
+    restore_globals(state['globals'])
+    torch.set_rng_state(state['torch_rng'])
+    return model
+
+def train_resumable(make_model, make_env, total_timesteps, checkpoint_dir, algo=PPO, save_freq=10000,
+                    monitor_file=None, keep=3, **learn_kwargs):
+    # Trains to total_timesteps, checkpointing every save_freq steps; if checkpoint_dir
+    # already holds a checkpoint, continues from it instead of calling make_model.
+    # make_env() -> gym env; make_model(env) -> new `algo` model. The Monitor is built here
+    # (monitor_file) so that a resumed run appends to its log from the checkpoint offset.
+    checkpoint = latest_checkpoint(checkpoint_dir)
+    if checkpoint is not None: _truncate_log(checkpoint + '.pkl')
+    env = make_env()
+    if monitor_file is not None: env = Monitor(env, filename=monitor_file, override_existing=checkpoint is None)
+
+    if checkpoint is None:
+        model = make_model(env)
+    else:
+        print(f"Resuming from {checkpoint}")
+        model = restore(checkpoint, algo, env)
+
+    # A fresh run counts from 0 (learn resets num_timesteps) even if make_model pretrained
+    remaining = total_timesteps - (model.num_timesteps if checkpoint is not None else 0)
+    callback = AsyncCheckpointCallback(checkpoint_dir, save_freq, keep)
+    try:
+        model.learn(total_timesteps=max(remaining, 0), callback=callback,
+                    reset_num_timesteps=checkpoint is None, **learn_kwargs)
+    except BaseException:
+        callback.close(final=False) # keep whatever the writer already has
+        raise
+    callback.close()
+    return model
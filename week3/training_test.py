@@ -0,0 +1,43 @@
+import os
+import numpy as np
+from stable_baselines3 import PPO
+from day2 import EnvFactory
+from training import latest_checkpoint, train_resumable
+
+make_env = EnvFactory(attrs={'max_steps': 50}) # episodes end mid-rollout
+
+def _make_model(env):
+    return PPO("MlpPolicy", env, n_steps=64, batch_size=32, n_epochs=2, seed=0, verbose=0)
+
+def _train(checkpoint_dir, total):
+    return train_resumable(_make_model, make_env, total, checkpoint_dir, save_freq=64,
+                           monitor_file=os.path.join(checkpoint_dir, "monitor.csv"))
+
+def _params(model):
+    return [p.detach().numpy().copy() for p in model.policy.parameters()]
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path):
+    straight = _train(str(tmp_path / "straight"), 256)
+
+    resumed_dir = str(tmp_path / "resumed")
+    _train(resumed_dir, 128)
+    assert latest_checkpoint(resumed_dir).endswith("step_000000128")
+    resumed = _train(resumed_dir, 256)
+
+    assert resumed.num_timesteps == straight.num_timesteps == 256
+    for a, b in zip(_params(straight), _params(resumed)):
+        assert np.array_equal(a, b)
+    # The Monitor log carries on from the checkpoint: same episodes as the straight run
+    with open(tmp_path / "straight" / "monitor.csv") as f: straight_log = f.read().splitlines()[2:]
+    with open(tmp_path / "resumed" / "monitor.csv") as f: resumed_log = f.read().splitlines()[2:]
+    assert [row.split(',')[:2] for row in resumed_log] == [row.split(',')[:2] for row in straight_log]
+    assert len(os.listdir(resumed_dir)) == 3 * 2 + 2 # kept pairs, `latest`, monitor.csv
+
+def test_fresh_run_trains_the_full_budget_of_a_pretrained_model(tmp_path):
+    def pretrained(env):
+        model = _make_model(env)
+        model.learn(64)
+        return model
+    model = train_resumable(pretrained, make_env, 128, str(tmp_path), save_freq=64)
+    assert model.num_timesteps == 128 # counted from 0 again, not 64 more on top of the 64
+    assert latest_checkpoint(str(tmp_path)).endswith("step_000000128")